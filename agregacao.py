@@ -0,0 +1,418 @@
+"""Agregações vetorizadas sobre os DataFrames normalizados por ingestao.py."""
+import os
+import json
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from ingestao import (
+    ARQUIVOS_DATASET, CACHE_PATH, CLASSES, COLUNA_DATA, DATA_PATH, TIPOS_TEXTO, VERSAO_CACHE,
+    PARQUET_DISPONIVEL, anexar_linhas, arquivos_completos, cache_valido,
+    carregar_tabela, ler_em_blocos, usar_streaming
+)
+
+POLARIDADES = {"NEG": "Negativo", "NEU": "Neutro", "POS": "Positivo"}
+
+# Medidas agregadas junto com as contagens: cada linha pesa 1 (Quantidade),
+# seus upvotes, log(1 + upvotes) ou, nas postagens, o número de comentários
+MEDIDAS = ["Quantidade", "Upvotes", "Log Upvotes", "Comentarios"]
+
+
+def codigos_sentimento(serie):
+    """Códigos inteiros de uma coluna de sentimento: 0=NEG, 1=NEU, 2=POS, -1=outros"""
+    if isinstance(serie.dtype, pd.CategoricalDtype) and list(serie.cat.categories[:len(CLASSES)]) == CLASSES:
+        codigos = serie.cat.codes.to_numpy()
+    else:
+        codigos = pd.Categorical(serie, categories=CLASSES).codes
+    # Categorias extras (rótulos fora de NEG/NEU/POS) ficam fora da contagem
+    return np.where(codigos < len(CLASSES), codigos, -1).astype(np.int8)
+
+
+def pesos_engajamento(df):
+    """Peso de cada linha em cada medida de MEDIDAS, como um array (len(MEDIDAS), linhas)
+
+    Upvotes negativos contam como 0. Sem a coluna correspondente (ex.:
+    'Comentarios' nos arquivos de comentários) a linha pesa 1, como na contagem.
+    """
+    uns = np.ones(len(df))
+    upvotes = np.maximum(df["Upvotes"].to_numpy(dtype=float), 0) if "Upvotes" in df.columns else None
+    comentarios = np.maximum(df["Comentarios"].to_numpy(dtype=float), 0) if "Comentarios" in df.columns else None
+    return np.vstack([
+        uns,
+        uns if upvotes is None else upvotes,
+        uns if upvotes is None else np.log1p(upvotes),
+        uns if comentarios is None else comentarios
+    ])
+
+
+def contar_sentimentos(tabelas, coluna="Classe Sentimento", medida="Quantidade"):
+    """Conta todas as combinações tema × tipo × classe em um único bincount
+
+    tabelas: dict {(tema, tipo): DataFrame}; o valor também pode ser um array
+    com as contagens NEG/NEU/POS já prontas (arquivos agregados em blocos), de
+    uma medida só ou uma linha por medida de MEDIDAS. Com `medida` diferente de
+    "Quantidade", cada linha pesa o valor da medida (ver pesos_engajamento).
+    Retorna um DataFrame longo com as colunas Tema, Tipo, Classe, Polaridade
+    e Quantidade.
+    """
+    chaves = list(tabelas)
+    n = len(CLASSES)
+    m = MEDIDAS.index(medida)
+
+    # Cada grupo desloca seus códigos em n posições: um só bincount cobre tudo
+    blocos, pesos = [], []
+    prontas = np.zeros(len(chaves) * n)
+    for g, chave in enumerate(chaves):
+        df = tabelas[chave]
+        if isinstance(df, np.ndarray):
+            prontas[g * n:(g + 1) * n] = df[m] if df.ndim == 2 else df
+            continue
+        if coluna not in df.columns:
+            continue
+        codigos = codigos_sentimento(df[coluna])
+        validos = codigos >= 0
+        blocos.append(codigos[validos].astype(np.int64) + g * n)
+        if m:
+            pesos.append(pesos_engajamento(df)[m][validos])
+
+    todos = np.concatenate(blocos) if blocos else np.empty(0, dtype=np.int64)
+    contagem = np.bincount(todos, weights=np.concatenate(pesos) if m and pesos else None,
+                           minlength=len(chaves) * n) + prontas
+    if medida == "Quantidade":
+        contagem = contagem.astype(np.int64)
+
+    return pd.DataFrame({
+        'Tema': np.repeat([tema for tema, _ in chaves], n),
+        'Tipo': np.repeat([tipo for _, tipo in chaves], n),
+        'Classe': np.tile(CLASSES, len(chaves)),
+        'Polaridade': np.tile([POLARIDADES[c] for c in CLASSES], len(chaves)),
+        'Quantidade': contagem
+    })
+
+
+# ==================== CUBO MENSAL ====================
+ARQUIVO_CUBO = os.path.join(CACHE_PATH, "cubo_mensal.parquet")
+MANIFESTO_CUBO = os.path.join(CACHE_PATH, "cubo_mensal.json")
+
+
+def contar_por_mes(df, coluna="Classe Sentimento"):
+    """Contagem mês × classe de um DataFrame, via bincount em (mês, código)
+
+    Além de Quantidade, soma cada medida ponderada de MEDIDAS na mesma célula.
+    A coluna 'Data' já chega como datetime64 da ingestão (ver ingestao.ESQUEMAS).
+    """
+    if COLUNA_DATA not in df.columns or coluna not in df.columns:
+        return pd.DataFrame(columns=['Mes', 'Classe'] + MEDIDAS)
+
+    datas = df[COLUNA_DATA]
+    codigos = codigos_sentimento(df[coluna])
+    validos = datas.notna().to_numpy() & (codigos >= 0)
+    if not validos.any():
+        return pd.DataFrame(columns=['Mes', 'Classe'] + MEDIDAS)
+
+    # Meses como inteiros (ano * 12 + mês) relativos ao primeiro mês
+    meses = (datas.dt.year.to_numpy() * 12 + datas.dt.month.to_numpy() - 1)[validos].astype(np.int64)
+    primeiro = meses.min()
+    n = len(CLASSES)
+    celula = (meses - primeiro) * n + codigos[validos]
+    tamanho = (meses.max() - primeiro + 1) * n
+    contagem = np.bincount(celula, minlength=tamanho)
+    pesos = pesos_engajamento(df)[:, validos]
+
+    celulas = np.flatnonzero(contagem)
+    mes_abs = primeiro + celulas // n
+    resultado = pd.DataFrame({
+        'Mes': pd.to_datetime({'year': mes_abs // 12, 'month': mes_abs % 12 + 1, 'day': 1}),
+        'Classe': np.asarray(CLASSES)[celulas % n],
+        'Quantidade': contagem[celulas]
+    })
+    for i, medida in enumerate(MEDIDAS[1:], start=1):
+        resultado[medida] = np.bincount(celula, weights=pesos[i], minlength=tamanho)[celulas]
+    return resultado
+
+
+# ==================== AGREGAÇÃO EM BLOCOS ====================
+@lru_cache(maxsize=16)
+def _agregar_em_blocos(arquivo, mtime_ns, tamanho, coluna):
+    contagem = np.zeros((len(MEDIDAS), len(CLASSES)))
+    partes = []
+    for bloco in ler_em_blocos(arquivo, "completo"):
+        contagem += _contar_fonte(bloco, coluna)
+        partes.append(contar_por_mes(bloco, coluna))
+
+    mensal = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=['Mes', 'Classe'] + MEDIDAS)
+    mensal = mensal.groupby(['Mes', 'Classe'], as_index=False, sort=True)[MEDIDAS].sum()
+    return contagem, mensal
+
+
+def agregar_em_blocos(arquivo, coluna="Classe Sentimento"):
+    """Contagens por classe e por mês × classe de um CSV lido em blocos
+
+    Só os agregados ficam em memória, então o pico não depende do tamanho do
+    arquivo. O resultado é memorizado enquanto o arquivo não mudar.
+    """
+    stat = os.stat(os.path.join(DATA_PATH, arquivo))
+    return _agregar_em_blocos(arquivo, stat.st_mtime_ns, stat.st_size, coluna)
+
+
+def fontes_completas():
+    """{(tema, tipo): DataFrame} dos arquivos completos; os grandes vêm já agregados em blocos"""
+    return {(tema, tipo): agregar_em_blocos(arquivo) if usar_streaming(arquivo) else carregar_tabela(arquivo, "completo")
+            for tema, tipo, arquivo in arquivos_completos()}
+
+
+def construir_cubo_mensal(tabelas, coluna="Classe Sentimento"):
+    """Cubo (tema, tipo, mês, classe) -> quantidade para um dict {(tema, tipo): DataFrame}
+
+    O valor também pode ser o par (contagens, mensal) de agregar_em_blocos.
+    """
+    partes = []
+    for (tema, tipo), df in tabelas.items():
+        parte = df[1].copy() if isinstance(df, tuple) else contar_por_mes(df, coluna)
+        parte.insert(0, 'Tipo', tipo)
+        parte.insert(0, 'Tema', tema)
+        partes.append(parte)
+
+    cubo = pd.concat(partes, ignore_index=True)
+    cubo['Tema'] = pd.Categorical(cubo['Tema'], categories=list(dict.fromkeys(t for t, _ in tabelas)))
+    cubo['Tipo'] = pd.Categorical(cubo['Tipo'], categories=list(dict.fromkeys(t for _, t in tabelas)))
+    cubo['Classe'] = pd.Categorical(cubo['Classe'], categories=CLASSES)
+    cubo['Quantidade'] = cubo['Quantidade'].astype(np.int64)
+    cubo[MEDIDAS[1:]] = cubo[MEDIDAS[1:]].astype(float)
+    return cubo
+
+
+def chave_fontes():
+    """Chave dos agregados persistidos: versão do cache + hash (do manifesto) de cada arquivo completo"""
+    partes = []
+    for _, _, arquivo in arquivos_completos():
+        if usar_streaming(arquivo):
+            stat = os.stat(os.path.join(DATA_PATH, arquivo))
+            partes.append(f"{arquivo}:{stat.st_mtime_ns}:{stat.st_size}")
+            continue
+        manifesto = cache_valido(arquivo, "completo")
+        if manifesto is None:
+            return None
+        partes.append(f"{arquivo}:{manifesto['sha256'][:16]}")
+    return f"v{VERSAO_CACHE}:" + "|".join(partes)
+
+
+def _contar_fonte(fonte, coluna="Classe Sentimento"):
+    """Array (len(MEDIDAS), 3): NEG/NEU/POS de cada medida, de um DataFrame ou do par de agregar_em_blocos"""
+    if isinstance(fonte, tuple):
+        return fonte[0]
+    n = len(CLASSES)
+    if coluna not in fonte.columns:
+        return np.zeros((len(MEDIDAS), n))
+    codigos = codigos_sentimento(fonte[coluna])
+    validos = codigos >= 0
+    pesos = pesos_engajamento(fonte)[:, validos]
+    return np.vstack([np.bincount(codigos[validos], weights=peso, minlength=n) for peso in pesos])
+
+
+def _gravar_resumo(cubo, contagens):
+    os.makedirs(CACHE_PATH, exist_ok=True)
+    cubo.to_parquet(ARQUIVO_CUBO + ".tmp", index=False)
+    os.replace(ARQUIVO_CUBO + ".tmp", ARQUIVO_CUBO)
+    with open(MANIFESTO_CUBO + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({
+            "chave": chave_fontes(),
+            "medidas": MEDIDAS,
+            "contagens": {f"{tema}|{tipo}": np.asarray(valores, dtype=float).tolist()
+                          for (tema, tipo), valores in contagens.items()}
+        }, f)
+    os.replace(MANIFESTO_CUBO + ".tmp", MANIFESTO_CUBO)
+
+
+def _ler_resumo():
+    """(cubo, contagens) persistidos, ou None se ausentes ou desatualizados"""
+    chave = chave_fontes() if PARQUET_DISPONIVEL else None
+    if chave is None or not os.path.isfile(ARQUIVO_CUBO):
+        return None
+    try:
+        with open(MANIFESTO_CUBO, encoding="utf-8") as f:
+            manifesto = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifesto.get("chave") != chave or manifesto.get("medidas") != MEDIDAS:
+        return None
+
+    contagens = {}
+    for rotulo, valores in manifesto.get("contagens", {}).items():
+        tema, tipo = rotulo.split("|")
+        contagens[(tema, tipo)] = np.asarray(valores, dtype=float)
+    return pd.read_parquet(ARQUIVO_CUBO), contagens
+
+
+def carregar_resumo():
+    """Cubo mensal e contagens por classe de cada (tema, tipo), persistidos juntos
+
+    São reconstruídos a partir dos arquivos completos quando algum deles muda.
+    """
+    resumo = _ler_resumo()
+    if resumo is not None:
+        return resumo
+
+    fontes = fontes_completas()
+    cubo = construir_cubo_mensal(fontes)
+    contagens = {chave: _contar_fonte(fonte) for chave, fonte in fontes.items()}
+    if PARQUET_DISPONIVEL:
+        _gravar_resumo(cubo, contagens)
+    return cubo, contagens
+
+
+def carregar_cubo_mensal():
+    """Carrega o cubo mensal persistido, reconstruindo-o se algum arquivo mudou"""
+    return carregar_resumo()[0]
+
+
+def carregar_contagens():
+    """{(tema, tipo): array (len(MEDIDAS), 3)} dos arquivos completos, persistido com o cubo
+
+    Cada linha é uma medida de MEDIDAS; contar_sentimentos escolhe a linha.
+    """
+    return carregar_resumo()[1]
+
+
+def ingerir_incremental(tema, chave, caminho_novos, sep=None):
+    """Anexa novas linhas a um arquivo completo e atualiza cubo e contagens por delta
+
+    chave: "posts" ou "comentarios". Retorna o número de linhas inéditas.
+    """
+    cubo, contagens = carregar_resumo()
+    tipo = TIPOS_TEXTO[chave]
+    novos = anexar_linhas(ARQUIVOS_DATASET[tema][chave], caminho_novos, sep)
+    if novos.empty:
+        return 0
+
+    # Delta do cubo: soma as células mês × classe das linhas novas
+    delta = construir_cubo_mensal({(tema, tipo): novos})
+    cubo = (
+        pd.concat([cubo.astype({'Tema': str, 'Tipo': str, 'Classe': str}),
+                   delta.astype({'Tema': str, 'Tipo': str, 'Classe': str})], ignore_index=True)
+          .groupby(['Tema', 'Tipo', 'Mes', 'Classe'], as_index=False, sort=False)[MEDIDAS].sum()
+    )
+    cubo['Tema'] = pd.Categorical(cubo['Tema'], categories=list(ARQUIVOS_DATASET))
+    cubo['Tipo'] = pd.Categorical(cubo['Tipo'], categories=list(TIPOS_TEXTO.values()))
+    cubo['Classe'] = pd.Categorical(cubo['Classe'], categories=CLASSES)
+    cubo = cubo.sort_values(['Tema', 'Tipo', 'Mes', 'Classe'], ignore_index=True)
+
+    contagens[(tema, tipo)] = contagens.get((tema, tipo), 0) + _contar_fonte(novos)
+    _gravar_resumo(cubo, contagens)
+    return len(novos)
+
+
+def fatiar_cubo(cubo, tema=None, tipo=None):
+    """Seleciona um (tema, tipo) do cubo; None mantém todas as opções"""
+    mascara = np.ones(len(cubo), dtype=bool)
+    if tema is not None:
+        mascara &= (cubo['Tema'] == tema).to_numpy()
+    if tipo is not None:
+        mascara &= (cubo['Tipo'] == tipo).to_numpy()
+    return cubo[mascara]
+
+
+# ==================== PERÍODOS ====================
+# O cubo fica ordenado por tema, tipo e mês; cada período é resolvido com
+# searchsorted em uma fatia contígua, e as somas saem da diferença entre duas
+# somas acumuladas, sem máscara sobre as linhas.
+def proximo_mes(mes):
+    return pd.Timestamp(mes) + pd.offsets.MonthBegin(1)
+
+
+def fatia_periodo(datas, inicio=None, fim=None):
+    """slice das posições de `datas` (ordenadas) entre o mês `inicio` e o fim do mês `fim`
+
+    Datas ausentes (NaT) ficam no fim da ordenação e fora de qualquer período
+    com `fim`; None deixa o lado correspondente aberto.
+    """
+    primeiro = 0 if inicio is None else int(np.searchsorted(datas, np.datetime64(pd.Timestamp(inicio)), side="left"))
+    ultimo = len(datas) if fim is None else int(np.searchsorted(datas, np.datetime64(proximo_mes(fim)), side="left"))
+    return slice(primeiro, max(primeiro, ultimo))
+
+
+def indice_periodos(cubo):
+    """{(tema, tipo): {"meses", "acumulado"}} com as somas acumuladas do cubo
+
+    meses: meses com publicações, ordenados; acumulado: array (meses + 1,
+    len(MEDIDAS), 3) em que acumulado[j] - acumulado[i] soma os meses i..j-1.
+    """
+    n = len(CLASSES)
+    grupos = dict(list(cubo.groupby(['Tema', 'Tipo'], observed=True, sort=False)))
+    indice = {}
+    for tema, tipo, _ in arquivos_completos():
+        grupo = grupos.get((tema, tipo), cubo.iloc[:0])
+        meses, posicao = np.unique(grupo['Mes'].to_numpy(), return_inverse=True)
+        valores = np.zeros((len(meses), len(MEDIDAS), n))
+        np.add.at(valores, (posicao, slice(None), codigos_sentimento(grupo['Classe'])),
+                  grupo[MEDIDAS].to_numpy(dtype=float))
+        acumulado = np.zeros((len(meses) + 1, len(MEDIDAS), n))
+        np.cumsum(valores, axis=0, out=acumulado[1:])
+        indice[(tema, tipo)] = {"meses": meses, "acumulado": acumulado}
+    return indice
+
+
+def contagens_periodo(indice, inicio=None, fim=None):
+    """{(tema, tipo): array (len(MEDIDAS), 3)} do período, no formato de carregar_contagens"""
+    contagens = {}
+    for chave, item in indice.items():
+        fatia = fatia_periodo(item["meses"], inicio, fim)
+        contagens[chave] = item["acumulado"][fatia.stop] - item["acumulado"][fatia.start]
+    return contagens
+
+
+def totais_periodo(indice, inicio=None, fim=None, medida="Quantidade"):
+    """Como totais_mensais, restrito aos meses do período"""
+    m = MEDIDAS.index(medida)
+    partes = []
+    for (tema, tipo), item in indice.items():
+        fatia = fatia_periodo(item["meses"], inicio, fim)
+        mensal = np.diff(item["acumulado"][fatia.start:fatia.stop + 1], axis=0).sum(axis=2)
+        partes.append(pd.DataFrame({
+            'Tema': tema,
+            'Tipo': tipo,
+            'Mes': item["meses"][fatia],
+            'Quantidade': np.rint(mensal[:, 0]).astype(np.int64) if m == 0 else mensal[:, m]
+        }))
+    return pd.concat(partes, ignore_index=True)
+
+
+def recortar_cubo(cubo_tema, inicio=None, fim=None):
+    """Meses do período em uma fatia do cubo (um tema e tipo, ordenada por mês)"""
+    return cubo_tema.iloc[fatia_periodo(cubo_tema['Mes'].to_numpy(), inicio, fim)]
+
+
+def totais_mensais(cubo, medida="Quantidade"):
+    """Publicações por tema, tipo e mês (todas as classes somadas)
+
+    Com outra medida de MEDIDAS, a coluna Quantidade traz a soma ponderada.
+    """
+    totais = (
+        cubo.groupby(['Tema', 'Tipo', 'Mes'], observed=True, sort=True)[medida]
+            .sum()
+            .rename('Quantidade')
+            .reset_index()
+    )
+    return totais[cubo.groupby(['Tema', 'Tipo', 'Mes'], observed=True, sort=True)['Quantidade'].sum().to_numpy() > 0]
+
+
+def _somar_por_classe(parte, medida="Quantidade"):
+    return parte.groupby('Classe', observed=False)[medida].sum().reindex(CLASSES, fill_value=0)
+
+
+def comparar_semestres(cubo_tema, medida="Quantidade"):
+    """Soma da medida por classe nos últimos 6 meses e nos 6 meses anteriores
+
+    Os períodos são meses de calendário contados a partir do mês mais recente;
+    cubo_tema vem ordenado por mês, então cada um é uma fatia por searchsorted.
+    """
+    if cubo_tema.empty:
+        vazio = pd.Series(0, index=CLASSES)
+        return vazio, vazio
+    meses = cubo_tema['Mes'].to_numpy()
+    ultimo = pd.Timestamp(meses[-1])
+    recente = cubo_tema.iloc[fatia_periodo(meses, ultimo - pd.DateOffset(months=5), ultimo)]
+    anterior = cubo_tema.iloc[fatia_periodo(meses, ultimo - pd.DateOffset(months=11),
+                                            ultimo - pd.DateOffset(months=6))]
+    return _somar_por_classe(recente, medida), _somar_por_classe(anterior, medida)
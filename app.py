@@ -1,14 +1,32 @@
+import os
+import re
+import time
+import functools
+
 import streamlit as st
 import pandas as pd
-import numpy as np
-import altair as alt
+import numpy as np  # já carregado pelo pandas
 from datetime import datetime
-from sklearn.metrics import (
-    accuracy_score, classification_report, confusion_matrix,
-    roc_curve, roc_auc_score
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from ingestao import (
+    ARQUIVOS_DATASET, CLASSES, DATA_PATH, PASTA_QUARENTENA, arquivos_completos, carregar_tabela,
+    preparar_caches, relatorio_quarentena
+)
+from agregacao import (
+    contar_sentimentos, carregar_contagens, carregar_cubo_mensal, fatiar_cubo,
+    totais_mensais, comparar_semestres, indice_periodos, contagens_periodo, totais_periodo,
+    recortar_cubo, fatia_periodo, proximo_mes
+)
+from metricas import COLUNAS_PROB, calcular_kernel, calcular_curvas_roc, bootstrap_kernel
+from conversas import somar_arquivos, linhas_periodo, tabela_conversas, concordancia_conversas, textos_postagens
+from calibracao import METODOS, FAIXAS, DOBRAS, avaliar_calibracao
+from tendencias import MEIA_VIDA, JANELA_MOVEL, calcular_tendencias, serie_tendencia, teste_mudanca
+from busca import carregar_indice, buscar
+from instrumentacao import (
+    debug_ativo, iniciar_execucao, instrumentar_cache, registros, resumo, secao,
+    tamanho_grafico, contar_linhas
 )
-from sklearn.preprocessing import label_binarize
-import os
 
 # ==================== CONFIGURAÇÃO DA PÁGINA ====================
 st.set_page_config(
@@ -17,9 +35,29 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# ==================== INSTRUMENTAÇÃO ====================
+# Painel de depuração: SENTIMENTLAB_DEBUG=1 ou ?debug=1 na URL
+DEBUG = debug_ativo() or st.query_params.get("debug") == "1"
+_contexto = get_script_run_ctx()
+iniciar_execucao(_contexto.session_id if _contexto else None)
+inicio_execucao = time.perf_counter()
+
 # ==================== CSS CUSTOMIZADO ====================
-st.markdown("""
-<style>
+@functools.lru_cache(maxsize=None)
+def minificar_css(css):
+    """Remove comentários e espaços do CSS (uma vez por processo e por bloco)"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+def aplicar_estilo(css):
+    # O Streamlit remove na próxima execução os elementos que não forem emitidos
+    # de novo, então o estilo vai em toda execução, mas minificado e em cache
+    st.markdown(f"<style>{minificar_css(css)}</style>", unsafe_allow_html=True)
+
+aplicar_estilo("""
     /* Tema escuro moderno */
     .main {
         background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
@@ -126,182 +164,270 @@ st.markdown("""
         padding-top: 2rem;
         padding-bottom: 2rem;
     }
+""")
+
+# ==================== FUNÇÕES DE CARREGAMENTO ====================
+# Copy-on-Write: cópias rasas compartilham os buffers, mas qualquer escrita
+# gera uma cópia privada e nunca altera o objeto compartilhado
+pd.set_option("mode.copy_on_write", True)
+
+def compartilhado(funcao):
+    """Cache único por processo (st.cache_resource), sem pickle por chamada
     
-    /* Tabs customizadas */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 2rem;
-        background-color: transparent;
-    }
+    Todas as sessões recebem uma cópia rasa do mesmo DataFrame: os dados não
+    são copiados e, com Copy-on-Write, alterações ficam restritas à cópia.
+    """
+    recurso = instrumentar_cache(st.cache_resource(show_spinner=False, max_entries=64))(funcao)
     
-    .stTabs [data-baseweb="tab"] {
-        background-color: rgba(255, 255, 255, 0.05);
-        border-radius: 10px 10px 0 0;
-        padding: 1rem 2rem;
-        color: #a0a0a0;
-    }
+    @functools.wraps(funcao)
+    def visao(*args, **kwargs):
+        resultado = recurso(*args, **kwargs)
+        return resultado.copy(deep=False) if isinstance(resultado, pd.DataFrame) else resultado
     
-    .stTabs [aria-selected="true"] {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-    }
-</style>
-""", unsafe_allow_html=True)
+    visao.clear = recurso.clear
+    return visao
 
-# ==================== FUNÇÕES DE CARREGAMENTO ====================
-DATA_PATH = "data/"
-
-ARQUIVOS_DATASET = {
-    "STF": {
-        "posts": "stf_posts_sentimentoDeVerdade.csv",
-        "comentarios": "stf_comentarios_sentimento.csv",
-        "posts_amostra": "amostraCompletaSTFPosts.csv",
-        "comentarios_amostra": "amostraCompletaSTFComentarios.csv"
-    },
-    "Auxílio Brasil": {
-        "posts": "dfpostsAB.csv",
-        "comentarios": "dfcomentariosAB.csv",
-        "posts_amostra": "amostraCompletaABPosts.csv",
-        "comentarios_amostra": "amostraCompletaABComentarios.csv"
-    },
-    "Vacinação": {
-        "posts": "PostsVacinacaoSaude_final.csv",
-        "comentarios": "ComentariosVacinacaoSaude_final.csv",
-        "posts_amostra": "amostraCompletoVSPosts1.csv",
-        "comentarios_amostra": "amostraCompletoVSComentarios1.csv"
-    }
-}
+@compartilhado
+def _tabela_compartilhada(arquivo, tipo, assinatura):
+    return carregar_tabela(arquivo, tipo)
 
-@st.cache_data
 def load_data(arquivo, tipo="completo"):
-    caminho = os.path.join(DATA_PATH, arquivo)
-    
-    # Definir separador baseado no arquivo
-    if arquivo in ["stf_comentarios_sentimento.csv", "dfpostsAB.csv", "dfcomentariosAB.csv"]:
-        sep = ','
-    else:
-        sep = ';'
-    
-    try:
-        df = pd.read_csv(caminho, sep=sep, on_bad_lines='skip', engine='python')
-        df.columns = df.columns.str.strip()
-        
-        # Padronizar nome da coluna
-        if "Classe Sentimeto" in df.columns:
-            df = df.rename(columns={"Classe Sentimeto": "Classe Sentimento"})
-        
-        # Remover colunas desnecessárias
-        df = df.drop(columns=["Unnamed: 0.1", "Unnamed: 0", 'Idioma', 'Subreddit', 'Link'], errors="ignore")
-        
-        # Padronizar valores de sentimento
-        if tipo == "amostra" and "rotulo" in df.columns:
-            replace_map = {'neu': 'NEU', 'NEY': 'NEU', 'UNKNOWN': 'NEU', 'MEI': 'NEU', 
-                          'NaN': 'NEU', 'BEG': 'NEG', 'BEY': 'NEU'}
-            df["rotulo"] = df["rotulo"].fillna("NEU").astype(str).replace(replace_map)
-            if "Classe Sentimento" in df.columns:
-                df["Classe Sentimento"] = df["Classe Sentimento"].fillna("NEU").astype(str).replace(replace_map)
-        
-        return df
-    except Exception as e:
-        st.error(f"Erro ao carregar {arquivo}: {e}")
-        return pd.DataFrame()
+    with secao("load_data", arquivo=arquivo):
+        try:
+            # mtime e tamanho na chave: um CSV alterado gera uma nova entrada
+            stat = os.stat(os.path.join(DATA_PATH, arquivo))
+            return _tabela_compartilhada(arquivo, tipo, (stat.st_mtime_ns, stat.st_size))
+        except Exception as e:
+            st.error(f"Erro ao carregar {arquivo}: {e}")
+            return pd.DataFrame()
+
+def exibir_grafico(grafico, nome, **kwargs):
+    """st.altair_chart medido; no modo debug registra também os bytes da especificação"""
+    with secao(f"grafico: {nome}") as registro:
+        registro["linhas"] = contar_linhas(getattr(grafico, "data", None))
+        if DEBUG:
+            registro["bytes"] = tamanho_grafico(grafico)
+        st.altair_chart(grafico, **kwargs)
+
+def assinatura_dados():
+    """mtime e tamanho dos arquivos completos: muda quando uma coleta é anexada"""
+    assinatura = []
+    for _, _, arquivo in arquivos_completos():
+        stat = os.stat(os.path.join(DATA_PATH, arquivo))
+        assinatura.append((arquivo, stat.st_mtime_ns, stat.st_size))
+    return tuple(assinatura)
 
-@st.cache_data
-def carregar_todos_dados():
+@compartilhado
+def carregar_todos_dados(assinatura, medida="Quantidade", inicio=None, fim=None):
     """Carrega todos os dados e agrega estatísticas"""
-    dados_agregados = {
-        'temas': [],
-        'posts_total': [],
-        'posts_neg': [],
-        'posts_neu': [],
-        'posts_pos': [],
-        'comentarios_total': [],
-        'comentarios_neg': [],
-        'comentarios_neu': [],
-        'comentarios_pos': []
-    }
-    
-    for tema, arquivos in ARQUIVOS_DATASET.items():
-        # Posts
-        df_posts = load_data(arquivos['posts'], tipo="completo")
-        # Comentários
-        df_comentarios = load_data(arquivos['comentarios'], tipo="completo")
-        
-        dados_agregados['temas'].append(tema)
-        dados_agregados['posts_total'].append(len(df_posts))
-        dados_agregados['posts_neg'].append(len(df_posts[df_posts['Classe Sentimento'] == 'NEG']))
-        dados_agregados['posts_neu'].append(len(df_posts[df_posts['Classe Sentimento'] == 'NEU']))
-        dados_agregados['posts_pos'].append(len(df_posts[df_posts['Classe Sentimento'] == 'POS']))
-        
-        dados_agregados['comentarios_total'].append(len(df_comentarios))
-        dados_agregados['comentarios_neg'].append(len(df_comentarios[df_comentarios['Classe Sentimento'] == 'NEG']))
-        dados_agregados['comentarios_neu'].append(len(df_comentarios[df_comentarios['Classe Sentimento'] == 'NEU']))
-        dados_agregados['comentarios_pos'].append(len(df_comentarios[df_comentarios['Classe Sentimento'] == 'POS']))
-    
-    return pd.DataFrame(dados_agregados)
+    # Contagens persistidas com o cubo (atualizadas por delta na ingestão incremental),
+    # já com todas as medidas: trocar a ponderação não relê os CSVs
+    if inicio is None and fim is None:
+        return contar_sentimentos(carregar_contagens(), medida=medida)
+    # Um período qualquer é a diferença de duas somas acumuladas do cubo
+    return contar_sentimentos(contagens_periodo(periodos_cubo(assinatura), inicio, fim), medida=medida)
+
+@compartilhado
+def carregar_cubo(assinatura):
+    """Cubo mensal tema × tipo × mês × sentimento, persistido na ingestão"""
+    return carregar_cubo_mensal()
+
+@compartilhado
+def periodos_cubo(assinatura):
+    """Meses e somas acumuladas do cubo por (tema, tipo), para o filtro de período"""
+    return indice_periodos(carregar_cubo(assinatura))
+
+@compartilhado
+def tendencias_cubo(assinatura):
+    """Proporções suavizadas e pontos de mudança de todas as séries, uma vez por versão dos dados"""
+    return calcular_tendencias(carregar_cubo(assinatura))
+
+@compartilhado
+def meses_disponiveis(assinatura):
+    """Todos os meses entre a primeira e a última publicação (opções do filtro)"""
+    cubo = carregar_cubo(assinatura)
+    if cubo.empty:
+        return []
+    return list(pd.date_range(cubo['Mes'].min(), cubo['Mes'].max(), freq="MS"))
+
+@instrumentar_cache(st.cache_data)
+def metricas_amostra(tema, tipo):
+    """Kernel de métricas (matriz de confusão e derivadas) de uma amostra rotulada"""
+    arquivo_key = "posts_amostra" if tipo == "Postagens" else "comentarios_amostra"
+    df = load_data(ARQUIVOS_DATASET[tema][arquivo_key], tipo="amostra")
+    
+    if df.empty or not {"rotulo", "Classe Sentimento"}.issubset(df.columns):
+        return None
+    return calcular_kernel(df)
+
+@instrumentar_cache(st.cache_data)
+def curvas_roc(tema, tipo):
+    """Curvas ROC simplificadas (FPR/TPR por classe) de uma amostra; None sem probabilidades"""
+    arquivo_key = "posts_amostra" if tipo == "Postagens" else "comentarios_amostra"
+    df = load_data(ARQUIVOS_DATASET[tema][arquivo_key], tipo="amostra")
+    
+    if not all(col in df.columns for col in COLUNAS_PROB) or "rotulo" not in df.columns:
+        return None
+    return calcular_curvas_roc(df)
+
+@instrumentar_cache(st.cache_data)
+def intervalos_amostra(tema, tipo, reamostras=2000):
+    """Intervalos de confiança de 95% (bootstrap) das métricas de uma amostra"""
+    arquivo_key = "posts_amostra" if tipo == "Postagens" else "comentarios_amostra"
+    df = load_data(ARQUIVOS_DATASET[tema][arquivo_key], tipo="amostra")
+    
+    if df.empty or not {"rotulo", "Classe Sentimento"}.issubset(df.columns):
+        return None
+    return bootstrap_kernel(df, reamostras)
+
+@instrumentar_cache(st.cache_data)
+def calibracao_amostra(tema, tipo, metodo="temperatura"):
+    """Confiabilidade, ECE e Brier de uma amostra, antes e depois da recalibração; None sem prob_*"""
+    arquivo_key = "posts_amostra" if tipo == "Postagens" else "comentarios_amostra"
+    return avaliar_calibracao(load_data(ARQUIVOS_DATASET[tema][arquivo_key], tipo="amostra"), metodo)
+
+# Coluna exibida -> chave do kernel de métricas
+METRICAS_KERNEL = {
+    'Precision': 'precision',
+    'Recall': 'recall',
+    'F1-Score': 'f1',
+    'Especificidade': 'especificidade',
+    'AUC': 'auc',
+    'Acurácia': 'acuracia'
+}
 
+@instrumentar_cache(st.cache_data)
 def calcular_metricas_completas(tema):
-    """Calcula todas as métricas de desempenho para um tema"""
-    arquivos = ARQUIVOS_DATASET[tema]
+    """Calcula todas as métricas de desempenho para um tema
     
+    Cada métrica vem com os limites do intervalo de confiança em
+    '<Métrica>_inf' e '<Métrica>_sup'.
+    """
     metricas = []
     
-    for tipo, arquivo_key in [("Postagens", "posts_amostra"), ("Comentários", "comentarios_amostra")]:
-        df = load_data(arquivos[arquivo_key], tipo="amostra")
-        
-        if df.empty or "rotulo" not in df.columns:
+    for tipo in ["Postagens", "Comentários"]:
+        kernel = metricas_amostra(tema, tipo)
+        if kernel is None:
             continue
-        
-        y_true = df["rotulo"]
-        y_pred = df["Classe Sentimento"]
-        
-        # Acurácia
-        acuracia = accuracy_score(y_true, y_pred)
-        
-        # Métricas por classe
-        report = classification_report(y_true, y_pred, output_dict=True, zero_division=0)
-        
-        # Matriz de confusão e especificidade
-        matriz = confusion_matrix(y_true, y_pred, labels=["NEG", "NEU", "POS"])
+        intervalos = intervalos_amostra(tema, tipo)
         
         for i, classe in enumerate(["NEG", "NEU", "POS"]):
-            VN = matriz.sum() - (matriz[i, :].sum() + matriz[:, i].sum() - matriz[i, i])
-            FP = matriz[:, i].sum() - matriz[i, i]
-            especificidade = VN / (VN + FP) if (VN + FP) > 0 else 0
-            
-            # AUC se houver probabilidades
-            auc = 0
-            if all(col in df.columns for col in ["prob_NEG", "prob_NEU", "prob_POS"]):
-                try:
-                    y_bin = label_binarize(y_true, classes=["NEG", "NEU", "POS"])
-                    y_score = df[["prob_NEG", "prob_NEU", "prob_POS"]]
-                    auc = roc_auc_score(y_bin[:, i], y_score.iloc[:, i])
-                except:
-                    auc = 0
-            
-            metricas.append({
-                'Tema': tema,
-                'Tipo': tipo,
-                'Classe': classe,
-                'Precision': report.get(classe, {}).get('precision', 0),
-                'Recall': report.get(classe, {}).get('recall', 0),
-                'F1-Score': report.get(classe, {}).get('f1-score', 0),
-                'Especificidade': especificidade,
-                'AUC': auc,
-                'Acurácia': acuracia
-            })
+            linha = {'Tema': tema, 'Tipo': tipo, 'Classe': classe}
+            for coluna, chave in METRICAS_KERNEL.items():
+                por_classe = chave != 'acuracia'
+                inferior, superior = intervalos[chave]
+                linha[coluna] = kernel[chave][i] if por_classe else kernel[chave]
+                linha[f'{coluna}_inf'] = inferior[i] if por_classe else inferior
+                linha[f'{coluna}_sup'] = superior[i] if por_classe else superior
+            metricas.append(linha)
     
     return pd.DataFrame(metricas)
 
+@compartilhado
+def gerar_evolucao_unificada(assinatura, medida="Quantidade", inicio=None, fim=None):
+    """Gera evolução temporal de todos os temas (postagens + comentários) em um único gráfico"""
+    if inicio is None and fim is None:
+        evolucao = totais_mensais(carregar_cubo(assinatura), medida)
+    else:
+        evolucao = totais_periodo(periodos_cubo(assinatura), inicio, fim, medida)
+    if evolucao.empty:
+        return pd.DataFrame()
+    
+    return pd.DataFrame({
+        "Mes": evolucao["Mes"].dt.strftime("%Y-%m"),
+        "Quantidade": evolucao["Quantidade"].to_numpy(),
+        "Tema": evolucao["Tema"].astype(str),
+        "Tipo": evolucao["Tipo"].astype(str)
+    })
+
+# Rótulo exibido -> medida do cubo (ver agregacao.MEDIDAS)
+PONDERACOES = {
+    'Publicações': 'Quantidade',
+    'Upvotes': 'Upvotes',
+    'Log(1 + upvotes)': 'Log Upvotes',
+    'Comentários (postagens)': 'Comentarios'
+}
+
+def seletor_ponderacao(key):
+    """Selectbox da ponderação; retorna (medida, rótulo)"""
+    rotulo = st.selectbox(
+        "Ponderar por:",
+        list(PONDERACOES),
+        key=key,
+        help="Upvotes negativos contam como 0. Comentários só existem nas postagens: "
+             "nos comentários cada linha pesa 1."
+    )
+    return PONDERACOES[rotulo], rotulo
+
+def formatar_inteiro(valor):
+    """Inteiro com o separador de milhar do português (1.975)"""
+    return f"{valor:,}".replace(",", ".")
+
+def formatar_medida(valor, medida):
+    """Contagens e upvotes como inteiros; log-upvotes com uma casa"""
+    return f"{valor:,.1f}" if medida == 'Log Upvotes' else f"{valor:,.0f}"
+
+# ==================== DADOS POR ABA ====================
+# Cada aba pede só o que usa, na primeira vez que precisa; os resultados
+# ficam nos caches acima, então as outras abas e sessões os reaproveitam.
+def dados_agregados(medida="Quantidade"):
+    """Contagens por tema, tipo e polaridade no período selecionado (aba Polaridades)"""
+    return carregar_todos_dados(assinatura_dados(), medida, *PERIODO)
+
+def metricas_todos_temas():
+    """Métricas de desempenho dos três temas (aba Desempenho do Modelo)"""
+    return pd.concat([calcular_metricas_completas(tema) for tema in ARQUIVOS_DATASET], ignore_index=True)
+
+@compartilhado
+def somas_conversas(tema, assinatura):
+    """Somas por postagem dos comentários do tema; no modo streaming, lidos em blocos"""
+    return somar_arquivos(ARQUIVOS_DATASET[tema]["posts"], ARQUIVOS_DATASET[tema]["comentarios"])
+
+@compartilhado
+def conversas_tema(tema, assinatura, inicio=None, fim=None):
+    """Agregados por conversa (aba Análise Detalhada)
+    
+    Com um período, só entram as postagens publicadas nele (e os seus comentários).
+    Órfãos são os comentários sem postagem na base inteira, não só no período.
+    """
+    somas = somas_conversas(tema, assinatura)
+    if somas is None or not somas["comentarios"]:
+        return None
+    
+    linhas = slice(None)
+    if inicio is not None or fim is not None:
+        linhas = linhas_periodo(somas, inicio, fim)
+    
+    return {
+        "agregados": tabela_conversas(somas, linhas),
+        "concordancia": concordancia_conversas(somas, linhas),
+        "orfaos": somas["orfaos"],
+        "comentarios": somas["comentarios"]
+    }
+
+@compartilhado
+def textos_conversas(tema, assinatura, ids):
+    """Texto das postagens exibidas na tabela de conversas (só esses ids são guardados)"""
+    return textos_postagens(ARQUIVOS_DATASET[tema]["posts"], list(ids))
+
+@compartilhado
+def indice_busca(assinatura):
+    """Índice invertido dos textos, gerado na ingestão (aba Análise Detalhada)"""
+    return carregar_indice()
+
 # ==================== CARREGAR DADOS ====================
 with st.spinner('Carregando dados... Isso pode levar alguns segundos.'):
-    df_agregado = carregar_todos_dados()
-    
-    # Calcular métricas de todos os temas
-    metricas_completas = pd.concat([
-        calcular_metricas_completas("STF"),
-        calcular_metricas_completas("Auxílio Brasil"),
-        calcular_metricas_completas("Vacinação")
-    ], ignore_index=True)
+    # Converte em paralelo os CSVs sem cache válido (uma vez por sessão)
+    if "caches_prontos" not in st.session_state:
+        barra = st.empty()
+        
+        def progresso(feitos, total, arquivo, linhas):
+            barra.progress(feitos / total, text=f"Preparando {arquivo} ({feitos}/{total})")
+        
+        preparar_caches(ao_concluir=progresso)
+        barra.empty()
+        st.session_state["caches_prontos"] = True
+
 # ==================== PÁGINA PRINCIPAL ====================
 st.markdown('<h1 class="big-title">O Retrato Digital da Opinião Pública Brasileira</h1>', unsafe_allow_html=True)
 st.markdown('<p class="subtitle">Uma analise sobre temas sociopolíticos brasileiros • 2015-2025</p>', unsafe_allow_html=True)
@@ -349,28 +475,45 @@ with col4:
 
 st.markdown("<br>", unsafe_allow_html=True)
 
-# ==================== NAVEGAÇÃO POR TABS ==================== 
-tab1, tab4, tab2, tab3, tab5 = st.tabs([
-    "📖 Visão Geral", # tab1 / 5
-    "📅 Evolução Temporal", # tab5 / 1
-    "📈 Polaridades",  # tab2 / 2 
-    "🎯 Desempenho do Modelo", #tab3 / 4
-    "🔬 Análise Detalhada", #tab4 / 5
-    
-])
+# ==================== FILTRO DE PERÍODO ====================
+# Vale para todas as abas. Os períodos são resolvidos por searchsorted nos
+# meses ordenados do cubo e somas acumuladas, então arrastar não relê dados.
+MESES = meses_disponiveis(assinatura_dados())
+if len(MESES) > 1:
+    periodo_sel = st.select_slider(
+        "📆 Período analisado",
+        options=MESES,
+        value=(MESES[0], MESES[-1]),
+        format_func=lambda mes: mes.strftime("%m/%Y"),
+        key="periodo"
+    )
+else:
+    periodo_sel = (MESES[0], MESES[-1]) if MESES else (None, None)
 
-# ==================== TAB 1: PRINCIPAIS CONCLUSÕES ====================
-with tab1:
+# (None, None) = base inteira: as abas usam os agregados já persistidos
+PERIODO = (None, None) if not MESES or tuple(periodo_sel) == (MESES[0], MESES[-1]) else tuple(periodo_sel)
 
-    import streamlit as st
+def legenda_periodo():
+    """Legenda com o período ativo, exibida nos gráficos que o respeitam"""
+    if PERIODO != (None, None):
+        st.caption(f"📆 Período: {PERIODO[0]:%m/%Y} a {PERIODO[1]:%m/%Y}")
 
-    # Configuração da página
-    st.set_page_config(page_title="Análise de Sentimentos", layout="wide")
+# ==================== NAVEGAÇÃO POR TABS ==================== 
+# st.tabs executaria o conteúdo de todas as abas a cada interação; com a
+# navegação por rádio só a aba selecionada é calculada e renderizada
+ABAS = [
+    "📖 Visão Geral",
+    "📅 Evolução Temporal",
+    "📈 Polaridades",
+    "🎯 Desempenho do Modelo",
+    "🔬 Análise Detalhada",
+]
+aba_selecionada = st.radio("Navegação", ABAS, horizontal=True, key="aba", label_visibility="collapsed")
 
-    # --- ESTILO APRIMORADO ---
-# --- ESTILO ADAPTATIVO - TEMA CLARO E ESCURO ---
-    st.markdown("""
-    <style>
+# ==================== TAB 1: PRINCIPAIS CONCLUSÕES ====================
+def aba_visao_geral():
+    # --- ESTILO ADAPTATIVO - TEMA CLARO E ESCURO ---
+    aplicar_estilo("""
         /* Importar fonte mais moderna */
         @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
         
@@ -583,8 +726,7 @@ with tab1:
         [data-testid="column"] {
             padding: 0 15px;
         }
-    </style>
-    """, unsafe_allow_html=True)
+    """)
 
     # ---------------- HEADER COM CONTEXTO ----------------
     st.markdown('<div class="story-title">Panorama Geral dos Resultados (2015–2025)</div>', unsafe_allow_html=True)
@@ -731,105 +873,90 @@ with tab1:
     """, unsafe_allow_html=True)
 
 
-
-
 # ==================== TAB 2: POLARIDADES ====================
-with tab2:
+def aba_polaridades():
+    import altair as alt  # ~1 s de importação: só nas abas com gráficos
+    
     st.markdown("### 📊 Distribuição de Sentimentos por Tema")
     
+    medida, rotulo_medida = seletor_ponderacao("ponderacao_polaridades")
+    df_agregado = dados_agregados(medida)
+    legenda_periodo()
+    
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("#### 📝 Postagens")
-        posts_data = pd.DataFrame({
-            'Tema': df_agregado['temas'].tolist() * 3,
-            'Polaridade': ['Negativo'] * 3 + ['Neutro'] * 3 + ['Positivo'] * 3,
-            'Quantidade': (df_agregado['posts_neg'].tolist() + 
-                          df_agregado['posts_neu'].tolist() + 
-                          df_agregado['posts_pos'].tolist())
-        })
+        posts_data = df_agregado[df_agregado['Tipo'] == 'Postagens']
         
         chart_posts = alt.Chart(posts_data).mark_bar().encode(
             x=alt.X('Tema:N', title='Tema'),
-            y=alt.Y('Quantidade:Q', title='Quantidade'),
+            y=alt.Y('Quantidade:Q', title=rotulo_medida),
             color=alt.Color('Polaridade:N', 
                           scale=alt.Scale(domain=['Negativo', 'Neutro', 'Positivo'],
                                         range=['#ff006e', '#00d4ff', '#00f5a0'])),
             xOffset='Polaridade:N',
-            tooltip=['Tema', 'Polaridade', 'Quantidade']
+            tooltip=['Tema', 'Polaridade', alt.Tooltip('Quantidade:Q', title=rotulo_medida, format=',.2~f')]
         ).properties(height=400)
         
-        st.altair_chart(chart_posts, use_container_width=True)
+        exibir_grafico(chart_posts, "polaridades_postagens", use_container_width=True)
     
     with col2:
         st.markdown("#### 💬 Comentários")
-        comments_data = pd.DataFrame({
-            'Tema': df_agregado['temas'].tolist() * 3,
-            'Polaridade': ['Negativo'] * 3 + ['Neutro'] * 3 + ['Positivo'] * 3,
-            'Quantidade': (df_agregado['comentarios_neg'].tolist() + 
-                          df_agregado['comentarios_neu'].tolist() + 
-                          df_agregado['comentarios_pos'].tolist())
-        })
+        comments_data = df_agregado[df_agregado['Tipo'] == 'Comentários']
         
         chart_comments = alt.Chart(comments_data).mark_bar().encode(
             x=alt.X('Tema:N', title='Tema'),
-            y=alt.Y('Quantidade:Q', title='Quantidade'),
+            y=alt.Y('Quantidade:Q', title=rotulo_medida),
             color=alt.Color('Polaridade:N',
                           scale=alt.Scale(domain=['Negativo', 'Neutro', 'Positivo'],
                                         range=['#ff006e', '#00d4ff', '#00f5a0'])),
             xOffset='Polaridade:N',
-            tooltip=['Tema', 'Polaridade', 'Quantidade']
+            tooltip=['Tema', 'Polaridade', alt.Tooltip('Quantidade:Q', title=rotulo_medida, format=',.2~f')]
         ).properties(height=400)
         
-        st.altair_chart(chart_comments, use_container_width=True)
+        exibir_grafico(chart_comments, "polaridades_comentarios", use_container_width=True)
     
     # Proporções por tema
     st.markdown("### 🎯 Análise Proporcional por Tema")
-    tema_sel = st.selectbox("Selecione o tema:", df_agregado['temas'].tolist())
+    tema_sel = st.selectbox("Selecione o tema:", list(ARQUIVOS_DATASET.keys()))
     
-    idx = df_agregado[df_agregado['temas'] == tema_sel].index[0]
+    contagens_tema = df_agregado[df_agregado['Tema'] == tema_sel]
     
     col1, col2 = st.columns(2)
     
     with col1:
-        post_data = pd.DataFrame({
-            'Polaridade': ['Negativo', 'Neutro', 'Positivo'],
-            'Quantidade': [df_agregado.iloc[idx]['posts_neg'],
-                          df_agregado.iloc[idx]['posts_neu'],
-                          df_agregado.iloc[idx]['posts_pos']]
-        })
+        post_data = contagens_tema[contagens_tema['Tipo'] == 'Postagens']
         
         pie_posts = alt.Chart(post_data).mark_arc(innerRadius=50).encode(
             theta=alt.Theta('Quantidade:Q'),
             color=alt.Color('Polaridade:N',
                           scale=alt.Scale(domain=['Negativo', 'Neutro', 'Positivo'],
                                         range=['#ff006e', '#00d4ff', '#00f5a0'])),
-            tooltip=['Polaridade', 'Quantidade']
+            tooltip=['Polaridade', alt.Tooltip('Quantidade:Q', title=rotulo_medida, format=',.2~f')]
         ).properties(height=350, title='Postagens')
         
-        st.altair_chart(pie_posts, use_container_width=True)
+        exibir_grafico(pie_posts, "proporcao_postagens", use_container_width=True)
     
     with col2:
-        comment_data = pd.DataFrame({
-            'Polaridade': ['Negativo', 'Neutro', 'Positivo'],
-            'Quantidade': [df_agregado.iloc[idx]['comentarios_neg'],
-                          df_agregado.iloc[idx]['comentarios_neu'],
-                          df_agregado.iloc[idx]['comentarios_pos']]
-        })
+        comment_data = contagens_tema[contagens_tema['Tipo'] == 'Comentários']
         
         pie_comments = alt.Chart(comment_data).mark_arc(innerRadius=50).encode(
             theta=alt.Theta('Quantidade:Q'),
             color=alt.Color('Polaridade:N',
                           scale=alt.Scale(domain=['Negativo', 'Neutro', 'Positivo'],
                                         range=['#ff006e', '#00d4ff', '#00f5a0'])),
-            tooltip=['Polaridade', 'Quantidade']
+            tooltip=['Polaridade', alt.Tooltip('Quantidade:Q', title=rotulo_medida, format=',.2~f')]
         ).properties(height=350, title='Comentários')
         
-        st.altair_chart(pie_comments, use_container_width=True)
+        exibir_grafico(pie_comments, "proporcao_comentarios", use_container_width=True)
         
+
 # ==================== TAB 3: DESEMPENHO DO MODELO ====================
-# ==================== TAB 3: DESEMPENHO DO MODELO ====================
-with tab3:
+def aba_desempenho():
+    import altair as alt
+    metricas_completas = metricas_todos_temas()
+    
     st.markdown("### 🎯 Avaliação de Desempenho do Modelo BERTweet.br")
     
     st.markdown("""
@@ -850,13 +977,15 @@ with tab3:
     
     # ==================== 1. SELEÇÃO E TABELA DE MÉTRICAS ====================
     st.markdown("#### 📊 Métricas de Desempenho por Tema")
+    if PERIODO != (None, None):
+        st.caption("📆 As amostras rotuladas não têm data: as métricas abaixo valem para a amostra inteira.")
     
     col1, col2 = st.columns(2)
     
     with col1:
         tema_sel_desempenho = st.selectbox(
             "Selecione o tema para análise:", 
-            df_agregado['temas'].tolist(), 
+            list(ARQUIVOS_DATASET.keys()), 
             key='tema_desempenho'
         )
     
@@ -910,41 +1039,52 @@ with tab3:
     # ==================== 2. GRÁFICO DE BARRAS - COMPARATIVO ====================
     st.markdown("#### 📊 Comparativo Visual das Métricas")
     
-    # Preparar dados para gráfico
+    # Preparar dados para gráfico (score e limites do intervalo de confiança)
+    metricas_exibidas = ['Precision', 'Recall', 'F1-Score']
     metricas_long = metricas_filtradas.melt(
         id_vars=['Classe', 'Tipo'],
-        value_vars=['Precision', 'Recall', 'F1-Score'],
+        value_vars=metricas_exibidas,
         var_name='Métrica',
         value_name='Score'
     )
+    for limite, coluna in [('_inf', 'IC inferior'), ('_sup', 'IC superior')]:
+        metricas_long[coluna] = metricas_filtradas[[m + limite for m in metricas_exibidas]].to_numpy().ravel(order='F')
+    
+    base_metricas = alt.Chart(metricas_long)
+    barras_metricas = base_metricas.mark_bar().encode(
+        x=alt.X('Classe:N', title='Classe'),
+        y=alt.Y('Score:Q', title='Score', scale=alt.Scale(domain=[0, 1])),
+        color=alt.Color('Métrica:N', scale=alt.Scale(scheme='category10'), legend=alt.Legend(title='Métrica')),
+        xOffset='Métrica:N',
+        tooltip=['Classe', 'Tipo', 'Métrica', alt.Tooltip('Score:Q', format='.3f'),
+                 alt.Tooltip('IC inferior:Q', format='.3f'), alt.Tooltip('IC superior:Q', format='.3f')]
+    )
+    # Barras de erro: intervalo de confiança de 95% (bootstrap)
+    erros_metricas = base_metricas.mark_rule(strokeWidth=2, color='#7f7f7f').encode(
+        x='Classe:N',
+        xOffset='Métrica:N',
+        y='IC inferior:Q',
+        y2='IC superior:Q'
+    )
     
     # Criar gráfico com ou sem facetas
     if tipo_sel_desempenho == "Todos":
-        chart_metricas = alt.Chart(metricas_long).mark_bar().encode(
-            x=alt.X('Classe:N', title='Classe'),
-            y=alt.Y('Score:Q', title='Score', scale=alt.Scale(domain=[0, 1])),
-            color=alt.Color('Métrica:N', scale=alt.Scale(scheme='category10'), legend=alt.Legend(title='Métrica')),
-            xOffset='Métrica:N',
-            column=alt.Column('Tipo:N', title='Tipo de Texto'),
-            tooltip=['Classe', 'Tipo', 'Métrica', alt.Tooltip('Score:Q', format='.3f')]
+        chart_metricas = alt.layer(barras_metricas, erros_metricas).properties(
+            height=350
+        ).facet(
+            column=alt.Column('Tipo:N', title='Tipo de Texto')
         ).properties(
-            height=350,
             title=f'Comparativo de Métricas - {tema_sel_desempenho}'
         )
     else:
-        chart_metricas = alt.Chart(metricas_long).mark_bar().encode(
-            x=alt.X('Classe:N', title='Classe'),
-            y=alt.Y('Score:Q', title='Score', scale=alt.Scale(domain=[0, 1])),
-            color=alt.Color('Métrica:N', scale=alt.Scale(scheme='category10'), legend=alt.Legend(title='Métrica')),
-            xOffset='Métrica:N',
-            tooltip=['Classe', 'Tipo', 'Métrica', alt.Tooltip('Score:Q', format='.3f')]
-        ).properties(
+        chart_metricas = (barras_metricas + erros_metricas).properties(
             width=600,
             height=350,
             title=f'Comparativo de Métricas - {tema_sel_desempenho} ({tipo_sel_desempenho})'
         )
     
-    st.altair_chart(chart_metricas, use_container_width=True)
+    st.caption("Barras de erro: intervalo de confiança de 95% (bootstrap com 2.000 reamostras).")
+    exibir_grafico(chart_metricas, "comparativo_metricas", use_container_width=True)
     
     # ==================== 3. MATRIZ DE CONFUSÃO ====================
     st.markdown("#### 🔲 Matriz de Confusão")
@@ -965,17 +1105,12 @@ with tab3:
             key='tipo_confusao'
         )
     
-    # Carregar dados
-    arquivos = ARQUIVOS_DATASET[tema_conf]
-    arquivo_key = "posts_amostra" if tipo_conf == "Postagens" else "comentarios_amostra"
-    df_conf = load_data(arquivos[arquivo_key], tipo="amostra")
+    # Matriz já calculada pelo kernel de métricas
+    kernel_conf = metricas_amostra(tema_conf, tipo_conf)
     
-    if not df_conf.empty and {"rotulo", "Classe Sentimento"}.issubset(df_conf.columns):
-        
-        y_true = df_conf["rotulo"]
-        y_pred = df_conf["Classe Sentimento"]
+    if kernel_conf is not None:
         
-        matriz = confusion_matrix(y_true, y_pred, labels=["NEG", "NEU", "POS"])
+        matriz = kernel_conf["matriz"]
         
         # Preparar dados para Altair
         matriz_df = (
@@ -1008,7 +1143,7 @@ with tab3:
             text='Quantidade:Q'
         )
         
-        st.altair_chart(conf_chart + texto, use_container_width=False)
+        exibir_grafico(conf_chart + texto, "matriz_confusao", use_container_width=False)
         
         # Análise da matriz
         col1, col2, col3 = st.columns(3)
@@ -1061,39 +1196,29 @@ with tab3:
         )
     
     # Função para plotar ROC com Altair
-    def plot_roc_altair(df, titulo):
-        classes = ["NEG", "NEU", "POS"]
+    def plot_roc_altair(tema, tipo, titulo):
+        curvas = curvas_roc(tema, tipo)
+        kernel = metricas_amostra(tema, tipo)
         
         # Verificar se existem colunas de probabilidade
-        if not all(col in df.columns for col in ["prob_NEG", "prob_NEU", "prob_POS"]):
+        if curvas is None:
             st.warning("⚠️ Probabilidades não disponíveis para este conjunto de dados.")
             return
         
-        y_true = df["rotulo"]
-        y_score = df[["prob_NEG", "prob_NEU", "prob_POS"]]
-        y_bin = label_binarize(y_true, classes=classes)
-        
-        # Construir dataframe para Altair
-        roc_list = []
-        for i, cls in enumerate(classes):
-            try:
-                fpr, tpr, _ = roc_curve(y_bin[:, i], y_score.iloc[:, i])
-                auc_cls = roc_auc_score(y_bin[:, i], y_score.iloc[:, i])
-                for x, y in zip(fpr, tpr):
-                    roc_list.append({
-                        "FPR": x, 
-                        "TPR": y, 
-                        "Classe": f"{cls} (AUC = {auc_cls:.3f})"
-                    })
-            except Exception as e:
-                st.warning(f"Erro ao calcular ROC para classe {cls}: {e}")
-                continue
-        
-        if not roc_list:
+        if not curvas:
             st.error("Não foi possível gerar curvas ROC.")
             return
         
-        df_roc = pd.DataFrame(roc_list)
+        # Construir dataframe para Altair a partir dos arrays simplificados
+        rotulos = [
+            f"{cls} (AUC = {kernel['auc'][CLASSES.index(cls)]:.3f})"
+            for cls in curvas
+        ]
+        df_roc = pd.DataFrame({
+            "FPR": np.concatenate([fpr for fpr, _ in curvas.values()]),
+            "TPR": np.concatenate([tpr for _, tpr in curvas.values()]),
+            "Classe": np.repeat(rotulos, [len(fpr) for fpr, _ in curvas.values()])
+        })
         
         # Gráfico principal ROC
         chart = alt.Chart(df_roc).mark_line(strokeWidth=3).encode(
@@ -1119,15 +1244,11 @@ with tab3:
             height=500
         )
         
-        st.altair_chart(final_chart, use_container_width=True)
-    
-    # Carregar dados para ROC
-    arquivos_roc = ARQUIVOS_DATASET[tema_roc]
-    arquivo_key_roc = "posts_amostra" if tipo_roc == "Postagens" else "comentarios_amostra"
-    df_roc = load_data(arquivos_roc[arquivo_key_roc], tipo="amostra")
+        exibir_grafico(final_chart, "curvas_roc", use_container_width=True)
     
-    if not df_roc.empty and "rotulo" in df_roc.columns:
-        plot_roc_altair(df_roc, f"{tema_roc} - {tipo_roc}")
+    # Curvas ROC vêm do cache por (tema, tipo)
+    if metricas_amostra(tema_roc, tipo_roc) is not None:
+        plot_roc_altair(tema_roc, tipo_roc, f"{tema_roc} - {tipo_roc}")
         
         # Interpretação da curva ROC
         st.markdown("##### 💡 Interpretação dos Resultados")
@@ -1156,26 +1277,132 @@ with tab3:
     
     st.markdown("---")
     
-    # ==================== 5. ANÁLISE COMPARATIVA ENTRE TEMAS ====================
+    # ==================== 5. CALIBRAÇÃO DAS PROBABILIDADES ====================
+    st.markdown("#### 📐 Calibração das Probabilidades")
+    
+    st.markdown("""
+    <div class="story-section">
+        <div class="story-text">
+        Um modelo <strong>calibrado</strong> que atribui 70% de chance a uma classe acerta cerca de 70% dessas vezes.
+        O <strong>diagrama de confiabilidade</strong> compara a probabilidade média de cada faixa com a frequência
+        observada da classe; o <strong>ECE</strong> resume essa distância e o <strong>Brier</strong> mede o erro
+        quadrático das probabilidades. Com probabilidades recalibradas, a soma delas estima quantas publicações
+        há de cada classe, sem depender só do rótulo mais provável.
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        tema_cal = st.selectbox("Tema:", list(ARQUIVOS_DATASET.keys()), key="tema_calibracao")
+    with col2:
+        tipo_cal = st.selectbox("Tipo de dado:", ["Postagens", "Comentários"], key="tipo_calibracao")
+    with col3:
+        metodo_cal = st.selectbox("Recalibração:", METODOS, key="metodo_calibracao",
+                                  format_func=lambda m: {"temperatura": "Temperatura", "dirichlet": "Dirichlet"}[m])
+    
+    calibracao = calibracao_amostra(tema_cal, tipo_cal, metodo_cal)
+    if calibracao is None:
+        st.warning("⚠️ Probabilidades não disponíveis para este conjunto de dados.")
+    else:
+        antes, depois = calibracao["antes"], calibracao["depois"]
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("ECE", f"{depois['ece']:.3f}", delta=f"{depois['ece'] - antes['ece']:+.3f} (original {antes['ece']:.3f})",
+                      delta_color="inverse")
+        with col2:
+            st.metric("Brier", f"{depois['brier']:.3f}",
+                      delta=f"{depois['brier'] - antes['brier']:+.3f} (original {antes['brier']:.3f})",
+                      delta_color="inverse")
+        with col3:
+            if metodo_cal == "temperatura":
+                st.metric("Temperatura", f"{calibracao['parametros']['temperatura']:.2f}",
+                          help="T > 1 suaviza probabilidades confiantes demais; T < 1 as acentua")
+            else:
+                st.metric("Log-loss", f"{depois['log_perda']:.3f}",
+                          delta=f"{depois['log_perda'] - antes['log_perda']:+.3f}", delta_color="inverse")
+        
+        # Diagrama de confiabilidade: uma linha por classe, originais × calibradas
+        partes = []
+        for rotulo, medidas in [("Originais", antes), ("Calibradas", depois)]:
+            curvas = medidas["curvas"]
+            partes.append(pd.DataFrame({
+                "Probabilidades": rotulo,
+                "Classe": np.repeat(CLASSES, FAIXAS),
+                "Confiança": curvas["confianca"].ravel(),
+                "Frequência": curvas["frequencia"].ravel(),
+                "Publicações": curvas["contagem"].ravel()
+            }))
+        confiabilidade = pd.concat(partes, ignore_index=True).dropna()
+        
+        linhas_conf = alt.Chart(confiabilidade).mark_line(point=True, strokeWidth=2).encode(
+            x=alt.X("Confiança:Q", title="Probabilidade prevista", scale=alt.Scale(domain=[0, 1])),
+            y=alt.Y("Frequência:Q", title="Frequência observada", scale=alt.Scale(domain=[0, 1])),
+            color=alt.Color("Classe:N", scale=alt.Scale(domain=['NEG', 'NEU', 'POS'],
+                                                        range=['#ff006e', '#00d4ff', '#00f5a0'])),
+            tooltip=["Classe", alt.Tooltip("Confiança:Q", format=".2f"), alt.Tooltip("Frequência:Q", format=".2f"),
+                     "Publicações"]
+        )
+        diagonal = alt.Chart(pd.DataFrame({"Confiança": [0, 1], "Frequência": [0, 1]})).mark_line(
+            color="gray", strokeDash=[5, 5]
+        ).encode(x="Confiança:Q", y="Frequência:Q")
+        
+        exibir_grafico(
+            (linhas_conf + diagonal).properties(height=320, width=320).facet(
+                column=alt.Column("Probabilidades:N", title=None, sort=["Originais", "Calibradas"]),
+                data=confiabilidade
+            ).properties(title=f"Diagrama de Confiabilidade – {tema_cal} - {tipo_cal}"),
+            "confiabilidade"
+        )
+        
+        st.markdown("##### 🧮 Publicações por classe na amostra")
+        st.dataframe(
+            calibracao["contagens"].rename(columns={
+                "Rótulo": "Rótulo humano", "Argmax": "Classe prevista (argmax)",
+                "Esperada": "Soma das probabilidades", "Esperada Calibrada": "Soma das calibradas"
+            }).style.format({"Soma das probabilidades": "{:.1f}", "Soma das calibradas": "{:.1f}"}),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.caption(f"Valores calibrados por validação cruzada em {DOBRAS} dobras ({calibracao['linhas']} textos "
+                   "rotulados). Para aplicar o ajuste em lote a um CSV com prob_*, use "
+                   "`python calibracao.py --aplicar entrada.csv saida.csv --tema ...`.")
+    
+    st.markdown("---")
+    
+    # ==================== 6. ANÁLISE COMPARATIVA ENTRE TEMAS ====================
     st.markdown("#### 🔬 Análise Comparativa entre Temas")
     
     # Gráfico comparativo de F1-Score por classe
     f1_comparison = metricas_completas.copy()
     
-    chart_comparison = alt.Chart(f1_comparison).mark_bar().encode(
+    base_comparison = alt.Chart(f1_comparison)
+    barras_comparison = base_comparison.mark_bar().encode(
         x=alt.X('Tema:N', title='Tema'),
         y=alt.Y('F1-Score:Q', title='F1-Score', scale=alt.Scale(domain=[0, 1])),
         color=alt.Color('Classe:N', scale=alt.Scale(domain=['NEG', 'NEU', 'POS'], 
                                                      range=['#ff006e', '#00d4ff', '#00f5a0'])),
         xOffset='Classe:N',
-        column=alt.Column('Tipo:N', title='Tipo de Texto'),
-        tooltip=['Tema', 'Tipo', 'Classe', alt.Tooltip('F1-Score:Q', format='.3f')]
+        tooltip=['Tema', 'Tipo', 'Classe', alt.Tooltip('F1-Score:Q', format='.3f'),
+                 alt.Tooltip('F1-Score_inf:Q', format='.3f', title='IC inferior'),
+                 alt.Tooltip('F1-Score_sup:Q', format='.3f', title='IC superior')]
+    )
+    erros_comparison = base_comparison.mark_rule(strokeWidth=2, color='#7f7f7f').encode(
+        x='Tema:N',
+        xOffset='Classe:N',
+        y='F1-Score_inf:Q',
+        y2='F1-Score_sup:Q'
+    )
+    
+    chart_comparison = alt.layer(barras_comparison, erros_comparison).properties(
+        height=350
+    ).facet(
+        column=alt.Column('Tipo:N', title='Tipo de Texto')
     ).properties(
-        height=350,
-        title='Comparação de F1-Score entre Todos os Temas'
+        title='Comparação de F1-Score entre Todos os Temas (com IC de 95%)'
     )
     
-    st.altair_chart(chart_comparison, use_container_width=True)
+    exibir_grafico(chart_comparison, "comparativo_temas", use_container_width=True)
     
     # Insights finais
     st.markdown("#### 🎯 Principais Conclusões")
@@ -1206,74 +1433,16 @@ with tab3:
         </div>
         """, unsafe_allow_html=True)
 #================================tab 4: EVOLUÇÃO TEMPORAL ====================
-with tab4:
+def aba_evolucao_temporal():
+    import altair as alt
     st.markdown("### Evolução Temporal das Opiniões Por Tema")
     
     # ==================== 1. EVOLUÇÃO HISTÓRICA TOTAL - TODOS OS TEMAS ====================
     st.markdown("#### Evolução Histórica das Postagens e Comentários - Todos os Temas")
     
-    @st.cache_data
-    def gerar_evolucao_unificada():
-        """Gera evolução temporal de todos os temas (postagens + comentários) em um único gráfico"""
-        evolucao_dados = []
-        
-        for tema, arquivos in ARQUIVOS_DATASET.items():
-            # POSTAGENS
-            df_posts = load_data(arquivos['posts'], tipo="completo")
-            
-            coluna_data = None
-            for col in df_posts.columns:
-                if any(keyword in col.lower() for keyword in ['date', 'data', 'created', 'timestamp']):
-                    coluna_data = col
-                    break
-            
-            if coluna_data and coluna_data in df_posts.columns:
-                try:
-                    df_posts[coluna_data] = pd.to_datetime(df_posts[coluna_data], errors='coerce')
-                    df_posts = df_posts.dropna(subset=[coluna_data])
-                    
-                    if len(df_posts) > 0:
-                        temp = df_posts.groupby(df_posts[coluna_data].dt.to_period("M")).size().reset_index()
-                        temp.columns = ["Mes", "Quantidade"]
-                        temp["Mes"] = temp["Mes"].astype(str)
-                        temp["Tema"] = tema
-                        temp["Tipo"] = "Postagens"
-                        evolucao_dados.append(temp)
-                except Exception as e:
-                    st.warning(f"Erro ao processar postagens de {tema}: {e}")
-                    continue
-            
-            # COMENTÁRIOS
-            df_comments = load_data(arquivos['comentarios'], tipo="completo")
-            
-            coluna_data_comm = None
-            for col in df_comments.columns:
-                if any(keyword in col.lower() for keyword in ['date', 'data', 'created', 'timestamp']):
-                    coluna_data_comm = col
-                    break
-            
-            if coluna_data_comm and coluna_data_comm in df_comments.columns:
-                try:
-                    df_comments[coluna_data_comm] = pd.to_datetime(df_comments[coluna_data_comm], errors='coerce')
-                    df_comments = df_comments.dropna(subset=[coluna_data_comm])
-                    
-                    if len(df_comments) > 0:
-                        temp = df_comments.groupby(df_comments[coluna_data_comm].dt.to_period("M")).size().reset_index()
-                        temp.columns = ["Mes", "Quantidade"]
-                        temp["Mes"] = temp["Mes"].astype(str)
-                        temp["Tema"] = tema
-                        temp["Tipo"] = "Comentários"
-                        evolucao_dados.append(temp)
-                except Exception as e:
-                    st.warning(f"Erro ao processar comentários de {tema}: {e}")
-                    continue
-        
-        if evolucao_dados:
-            return pd.concat(evolucao_dados, ignore_index=True)
-        else:
-            return pd.DataFrame()
-    
-    df_evo = gerar_evolucao_unificada()
+    medida, rotulo_medida = seletor_ponderacao("ponderacao_evolucao")
+    df_evo = gerar_evolucao_unificada(assinatura_dados(), medida, *PERIODO)
+    legenda_periodo()
     
     if not df_evo.empty:
         # ==================== FILTROS INTERATIVOS ====================    
@@ -1341,7 +1510,7 @@ with tab4:
                        title='Mês', 
                        axis=alt.Axis(labelAngle=-45, labelFontSize=10)),
                 y=alt.Y('Quantidade:Q', 
-                       title='Número de Publicações',
+                       title='Número de Publicações' if medida == 'Quantidade' else rotulo_medida,
                        axis=alt.Axis(labelFontSize=11)),
                 color=alt.Color('Legenda:N', 
                               scale=alt.Scale(scheme='category10'),
@@ -1351,7 +1520,7 @@ with tab4:
                                   labelFontSize=10,
                                   symbolSize=150
                               )),
-                tooltip=['Mes:N', 'Tema:N', 'Tipo:N', alt.Tooltip('Quantidade:Q', format=',')]
+                tooltip=['Mes:N', 'Tema:N', 'Tipo:N', alt.Tooltip('Quantidade:Q', title=rotulo_medida, format=',.2~f')]
             )
             
             # Adicionar strokeDash apenas se estiver mostrando ambos
@@ -1380,7 +1549,7 @@ with tab4:
                 }
             ).interactive()
             
-            st.altair_chart(chart, use_container_width=True)
+            exibir_grafico(chart, "evolucao_unificada", use_container_width=True)
             
             # ==================== ESTATÍSTICAS DINÂMICAS ====================
             st.markdown("---")
@@ -1404,12 +1573,12 @@ with tab4:
                             st.markdown(f"""
                             <div class="metric-card" style="background: linear-gradient(135deg, #1e3a5f 0%, #2d1b4e 100%);">
                                 <div class="metric-label">{tema}</div>
-                                <div class="metric-value">{total:,}</div>
-                                <div class="metric-label">Posts no período</div>
+                                <div class="metric-value">{formatar_medida(total, medida)}</div>
+                                <div class="metric-label">{"Posts" if medida == "Quantidade" else rotulo_medida} no período</div>
                                 <hr style="border-color: rgba(255,255,255,0.1); margin: 0.5rem 0;">
                                 <small style="color: #a0a0a0;">
                                 📊 Média: {media:.1f}/mês<br>
-                                🔝 Pico: {pico} em {mes_pico}
+                                🔝 Pico: {formatar_medida(pico, medida)} em {mes_pico}
                                 </small>
                             </div>
                             """, unsafe_allow_html=True)
@@ -1433,12 +1602,12 @@ with tab4:
                             st.markdown(f"""
                             <div class="metric-card" style="background: linear-gradient(135deg, #4a2c2a 0%, #3d2a1f 100%); border: 1px solid rgba(255, 140, 0, 0.3);">
                                 <div class="metric-label" style="color: #ffb366;">{tema}</div>
-                                <div class="metric-value" style="color: #ff8c42;">{total:,}</div>
-                                <div class="metric-label" style="color: #cc9966;">Comentários no período</div>
+                                <div class="metric-value" style="color: #ff8c42;">{formatar_medida(total, medida)}</div>
+                                <div class="metric-label" style="color: #cc9966;">{"Comentários" if medida == "Quantidade" else rotulo_medida} no período</div>
                                 <hr style="border-color: rgba(255,140,0,0.2); margin: 0.5rem 0;">
                                 <small style="color: #cc9966;">
                                 📊 Média: {media:.1f}/mês<br>
-                                🔝 Pico: {pico} em {mes_pico}
+                                🔝 Pico: {formatar_medida(pico, medida)} em {mes_pico}
                                 </small>
                             </div>
                             """, unsafe_allow_html=True)
@@ -1462,85 +1631,313 @@ with tab4:
             key='tipo_evolucao'
         )
     
-    # Carregar dados do tema selecionado
-    arquivos = ARQUIVOS_DATASET[tema_sel]
-    arquivo_key = "posts" if tipo_sel == "Postagens" else "comentarios"
-    df = load_data(arquivos[arquivo_key], tipo="completo")
+    # Fatia do cubo mensal para o tema e tipo selecionados, recortada no período
+    cubo_tema = recortar_cubo(fatiar_cubo(carregar_cubo(assinatura_dados()), tema_sel, tipo_sel), *PERIODO)
     
-    # Procurar coluna de data
-    coluna_data = None
-    for col in df.columns:
-        if any(keyword in col.lower() for keyword in ['date', 'data', 'created', 'timestamp']):
-            coluna_data = col
-            break
-    
-    if coluna_data and coluna_data in df.columns and 'Classe Sentimento' in df.columns:
-        try:
-            df[coluna_data] = pd.to_datetime(df[coluna_data], errors='coerce')
-            df = df.dropna(subset=[coluna_data])
+    if not cubo_tema.empty:
+        evolucao_sent = pd.DataFrame({
+            'Ano-Mês': cubo_tema['Mes'],
+            'Classe Sentimento': cubo_tema['Classe'].astype(str),
+            'Quantidade': cubo_tema[medida]
+        })
+        
+        # Gráfico de linhas por sentimento
+        linha_sent = alt.Chart(evolucao_sent).mark_line(point=True, strokeWidth=2).encode(
+            x=alt.X('Ano-Mês:T', title='Data', axis=alt.Axis(format='%b %Y')),
+            y=alt.Y('Quantidade:Q', title=rotulo_medida),
+            color=alt.Color('Classe Sentimento:N',
+                          scale=alt.Scale(domain=['NEG', 'NEU', 'POS'],
+                                        range=['#ff006e', '#00d4ff', '#00f5a0']),
+                          legend=alt.Legend(title='Sentimento')),
+            tooltip=[
+                alt.Tooltip('Ano-Mês:T', format='%B %Y', title='Mês'),
+                alt.Tooltip('Classe Sentimento:N', title='Sentimento'),
+                alt.Tooltip('Quantidade:Q', title=rotulo_medida, format=',.2~f')
+            ]
+        ).properties(
+            height=450,
+            title=f'Evolução dos Sentimentos - {tema_sel} ({tipo_sel})'
+        )
+        
+        # Pontos de mudança (pré-calculados para todas as séries) dentro do período exibido
+        tendencias = tendencias_cubo(assinatura_dados())
+        pontos = tendencias["pontos"]
+        pontos = pontos[((pontos["Tema"] == tema_sel) & (pontos["Tipo"] == tipo_sel)).to_numpy()]
+        pontos = pontos.iloc[fatia_periodo(pontos["Mes"].to_numpy(), *PERIODO)]
+        marcas = alt.Chart(pontos.assign(Classe=pontos["Classe"].astype(str))).mark_rule(
+            strokeDash=[6, 4], strokeWidth=2, color='#ffbe0b'
+        ).encode(
+            x='Mes:T',
+            tooltip=[
+                alt.Tooltip('Mes:T', format='%B %Y', title='Mudança a partir de'),
+                alt.Tooltip('Classe:N', title='Classe que mais mudou'),
+                alt.Tooltip('Antes:Q', format='.0%'),
+                alt.Tooltip('Depois:Q', format='.0%'),
+                alt.Tooltip('P Ajustado:Q', format='.1e', title='p-valor (Bonferroni)')
+            ]
+        )
+        
+        exibir_grafico(linha_sent + marcas, "evolucao_sentimentos", use_container_width=True)
+        
+        # Proporção de cada sentimento, suavizada
+        suavizacoes = {
+            f"EWMA (meia-vida de {MEIA_VIDA} meses)": "ewma",
+            f"Média móvel de {JANELA_MOVEL} meses": "moveis",
+            "Sem suavização": "proporcoes"
+        }
+        suavizacao = st.selectbox("Suavização das proporções:", list(suavizacoes), key="suavizacao_tendencias")
+        proporcoes_sent = serie_tendencia(tendencias, tema_sel, tipo_sel, suavizacoes[suavizacao])
+        proporcoes_sent = proporcoes_sent.iloc[fatia_periodo(proporcoes_sent["Mes"].to_numpy(), *PERIODO)]
+        
+        linha_prop = alt.Chart(proporcoes_sent).mark_line(strokeWidth=2).encode(
+            x=alt.X('Mes:T', title='Data', axis=alt.Axis(format='%b %Y')),
+            y=alt.Y('Proporcao:Q', title='Proporção das publicações', axis=alt.Axis(format='%')),
+            color=alt.Color('Classe:N',
+                          scale=alt.Scale(domain=['NEG', 'NEU', 'POS'],
+                                        range=['#ff006e', '#00d4ff', '#00f5a0']),
+                          legend=alt.Legend(title='Sentimento')),
+            tooltip=[
+                alt.Tooltip('Mes:T', format='%B %Y', title='Mês'),
+                alt.Tooltip('Classe:N', title='Sentimento'),
+                alt.Tooltip('Proporcao:Q', format='.1%', title='Proporção')
+            ]
+        ).properties(
+            height=350,
+            title=f'Proporção dos Sentimentos - {tema_sel} ({tipo_sel})'
+        )
+        exibir_grafico(linha_prop + marcas, "proporcoes_sentimentos", use_container_width=True)
+        st.caption("Linhas tracejadas: mudanças na proporção dos sentimentos detectadas por segmentação binária "
+                   "(p < 0,01 com correção de Bonferroni pelos cortes testados e variação de pelo menos "
+                   "10 pontos percentuais em alguma classe).")
+        
+        # Análise de tendências
+        st.markdown("#### 💡 Análise de Tendências")
+        
+        # Últimos 6 meses vs os 6 meses anteriores, direto do cubo
+        periodo_recente, periodo_anterior = comparar_semestres(cubo_tema, medida)
+        
+        col1, col2, col3 = st.columns(3)
+        
+        for idx, sent in enumerate(['NEG', 'NEU', 'POS']):
+            recente = float(periodo_recente[sent])
+            anterior = float(periodo_anterior[sent])
             
-            if len(df) > 0:
-                df['Ano-Mês'] = df[coluna_data].dt.to_period('M').dt.to_timestamp()
-                
-                evolucao_sent = (
-                    df.groupby(['Ano-Mês', 'Classe Sentimento'])
-                      .size()
-                      .reset_index(name='Quantidade')
-                )
-                
-                # Gráfico de linhas por sentimento
-                linha_sent = alt.Chart(evolucao_sent).mark_line(point=True, strokeWidth=2).encode(
-                    x=alt.X('Ano-Mês:T', title='Data', axis=alt.Axis(format='%b %Y')),
-                    y=alt.Y('Quantidade:Q', title='Quantidade'),
-                    color=alt.Color('Classe Sentimento:N',
-                                  scale=alt.Scale(domain=['NEG', 'NEU', 'POS'],
-                                                range=['#ff006e', '#00d4ff', '#00f5a0']),
-                                  legend=alt.Legend(title='Sentimento')),
-                    tooltip=[
-                        alt.Tooltip('Ano-Mês:T', format='%B %Y', title='Mês'),
-                        alt.Tooltip('Classe Sentimento:N', title='Sentimento'),
-                        alt.Tooltip('Quantidade:Q', title='Quantidade')
-                    ]
-                ).properties(
-                    height=450,
-                    title=f'Evolução dos Sentimentos - {tema_sel} ({tipo_sel})'
+            variacao = ((recente - anterior) / anterior * 100) if anterior > 0 else 0
+            
+            sentimento_label = {'NEG': '🔴 Negativo', 'NEU': '⚪ Neutro', 'POS': '🟢 Positivo'}[sent]
+            
+            with [col1, col2, col3][idx]:
+                st.metric(
+                    label=sentimento_label,
+                    value=formatar_medida(recente, medida),
+                    delta=f"{variacao:+.1f}% vs 6 meses atrás"
                 )
-                
-                st.altair_chart(linha_sent, use_container_width=True)
-                
-                # Análise de tendências
-                st.markdown("#### 💡 Análise de Tendências")
-                
-                # Calcular percentuais atuais vs anteriores
-                periodo_recente = df[df[coluna_data] >= df[coluna_data].max() - pd.DateOffset(months=6)]
-                periodo_anterior = df[(df[coluna_data] < df[coluna_data].max() - pd.DateOffset(months=6)) & 
-                                     (df[coluna_data] >= df[coluna_data].max() - pd.DateOffset(months=12))]
-                
-                col1, col2, col3 = st.columns(3)
-                
-                for idx, sent in enumerate(['NEG', 'NEU', 'POS']):
-                    recente = len(periodo_recente[periodo_recente['Classe Sentimento'] == sent])
-                    anterior = len(periodo_anterior[periodo_anterior['Classe Sentimento'] == sent])
-                    
-                    variacao = ((recente - anterior) / anterior * 100) if anterior > 0 else 0
-                    
-                    sentimento_label = {'NEG': '🔴 Negativo', 'NEU': '⚪ Neutro', 'POS': '🟢 Positivo'}[sent]
-                    
-                    with [col1, col2, col3][idx]:
-                        st.metric(
-                            label=sentimento_label,
-                            value=f"{recente}",
-                            delta=f"{variacao:+.1f}% vs 6 meses atrás"
-                        )
-            else:
-                st.warning("Não há dados suficientes para análise temporal.")
-        except Exception as e:
-            st.error(f"Erro ao processar dados temporais: {e}")
+        
+        # O teste usa as contagens de publicações, qualquer que seja a ponderação
+        contagens_recente, contagens_anterior = (
+            (periodo_recente, periodo_anterior) if medida == 'Quantidade'
+            else comparar_semestres(cubo_tema, 'Quantidade')
+        )
+        estatistica, p_valor = teste_mudanca(contagens_anterior.to_numpy(), contagens_recente.to_numpy())
+        if contagens_anterior.sum() > 0 and contagens_recente.sum() > 0:
+            conclusao = "mudou" if p_valor < 0.05 else "não mudou de forma significativa"
+            st.caption(f"A proporção entre os sentimentos {conclusao} entre os dois semestres "
+                       f"(qui-quadrado = {estatistica:.1f}, p = {p_valor:.2g}).")
+        
+        with st.expander("📍 Pontos de mudança detectados em todos os temas"):
+            todos = tendencias["pontos"]
+            todos = todos.iloc[fatia_periodo(todos["Mes"].to_numpy(), *PERIODO)]
+            st.dataframe(
+                todos.assign(Mes=todos["Mes"].dt.strftime("%m/%Y"), Classe=todos["Classe"].astype(str))
+                     .style.format({"Antes": "{:.0%}", "Depois": "{:.0%}", "Variacao": "{:+.0%}",
+                                    "P Ajustado": "{:.1e}"}),
+                use_container_width=True,
+                hide_index=True
+            )
     else:
         st.warning(f"⚠️ Coluna de data ou 'Classe Sentimento' não encontrada para {tema_sel} ({tipo_sel}).")
-        st.info("💡 Colunas esperadas: 'date', 'data', 'Data', 'created_at' ou similar")
+        st.info("💡 A coluna de data é a 'Data' declarada em ESQUEMAS (ingestao.py)")
     
 
+# ==================== TAB 5: ANÁLISE DETALHADA ====================
+def aba_analise_detalhada():
+    import altair as alt
+    
+    st.markdown("### 🔬 Análise Detalhada")
+    
+    # ==================== 1. CONVERSAS: POSTAGEM ↔ COMENTÁRIOS ====================
+    st.markdown("#### 🧵 Conversas: Postagens e Seus Comentários")
+    
+    st.markdown("""
+    <div class="story-section">
+        <div class="story-text">
+        Cada comentário é ligado à sua postagem pelo <strong>id Post</strong>. Assim é possível ver se a
+        conversa acompanha o tom da postagem (<strong>concordância</strong>) e qual é a polaridade média dos
+        comentários, simples e <strong>ponderada pelos upvotes</strong> (-1 = negativa, +1 = positiva).
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    tema_conv = st.selectbox("Selecione o tema:", list(ARQUIVOS_DATASET.keys()), key="tema_conversas")
+    conversas = conversas_tema(tema_conv, assinatura_dados(), *PERIODO)
+    legenda_periodo()
+    
+    if conversas is None or conversas["agregados"].empty:
+        st.warning("⚠️ Não foi possível relacionar postagens e comentários para este tema.")
+        return
+    
+    agregados = conversas["agregados"]
+    matriz = conversas["concordancia"]
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Postagens com comentários", formatar_inteiro(len(agregados)))
+    with col2:
+        st.metric("Comentários por postagem", f"{agregados['Comentarios'].mean():.1f}")
+    with col3:
+        total = matriz.sum()
+        st.metric("Concordância geral", f"{np.trace(matriz) / total:.1%}" if total else "-")
+    with col4:
+        st.metric("Comentários sem postagem", formatar_inteiro(conversas['orfaos']),
+                  help=f"De {formatar_inteiro(conversas['comentarios'])} comentários, estes não têm a postagem na base")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Distribuição dos comentários condicionada à classe da postagem
+        linhas = matriz.sum(axis=1, keepdims=True)
+        proporcoes = np.divide(matriz, linhas, out=np.zeros(matriz.shape), where=linhas > 0)
+        concordancia_df = pd.DataFrame({
+            "Postagem": np.repeat(CLASSES, len(CLASSES)),
+            "Comentário": np.tile(CLASSES, len(CLASSES)),
+            "Proporção": proporcoes.ravel(),
+            "Quantidade": matriz.ravel()
+        })
+        
+        heatmap = alt.Chart(concordancia_df).mark_rect().encode(
+            x=alt.X("Comentário:N", title="Sentimento dos comentários"),
+            y=alt.Y("Postagem:N", title="Sentimento da postagem"),
+            color=alt.Color("Proporção:Q", scale=alt.Scale(scheme="purples"), legend=alt.Legend(format=".0%")),
+            tooltip=["Postagem", "Comentário", alt.Tooltip("Proporção:Q", format=".1%"), "Quantidade"]
+        )
+        rotulos = alt.Chart(concordancia_df).mark_text(fontSize=16, color="white", fontWeight="bold").encode(
+            x="Comentário:N", y="Postagem:N", text=alt.Text("Proporção:Q", format=".0%")
+        )
+        exibir_grafico((heatmap + rotulos).properties(height=350, title="Tom da conversa por tom da postagem"),
+                       "concordancia_conversas", use_container_width=True)
+    
+    with col2:
+        # Polaridade média ponderada por classe da postagem
+        polaridade = (
+            agregados.groupby("Classe Postagem", observed=True)
+            .agg(Simples=("Polaridade", "mean"), Ponderada=("Polaridade Ponderada", "mean"))
+            .reset_index()
+            .melt(id_vars="Classe Postagem", var_name="Média", value_name="Polaridade")
+        )
+        polaridade["Classe Postagem"] = polaridade["Classe Postagem"].astype(str)
+        
+        barras = alt.Chart(polaridade).mark_bar().encode(
+            x=alt.X("Classe Postagem:N", title="Sentimento da postagem"),
+            y=alt.Y("Polaridade:Q", title="Polaridade dos comentários", scale=alt.Scale(domain=[-1, 1])),
+            color=alt.Color("Média:N", scale=alt.Scale(range=["#00d4ff", "#7c3aed"])),
+            xOffset="Média:N",
+            tooltip=["Classe Postagem", "Média", alt.Tooltip("Polaridade:Q", format=".3f")]
+        ).properties(height=350, title="Polaridade média dos comentários (simples × upvotes)")
+        exibir_grafico(barras, "polaridade_conversas", use_container_width=True)
+    
+    # Conversas mais movimentadas
+    st.markdown("##### 🔥 Conversas com mais comentários")
+    maiores = agregados.nlargest(20, "Comentarios")
+    textos = textos_conversas(tema_conv, assinatura_dados(), tuple(maiores["id Post"]))
+    if textos is not None:
+        maiores = maiores.assign(Postagem=textos.fillna("").astype(str).str.slice(0, 90).to_numpy())
+    colunas = [c for c in ["Postagem", "Classe Postagem", "Upvotes Postagem", "Comentarios", "% NEG", "% NEU", "% POS",
+                           "Concordancia", "Polaridade Ponderada"] if c in maiores]
+    st.dataframe(
+        maiores[colunas].style.format({
+            "% NEG": "{:.0%}", "% NEU": "{:.0%}", "% POS": "{:.0%}",
+            "Concordancia": "{:.0%}", "Polaridade Ponderada": "{:+.2f}"
+        }, na_rep="-"),
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    st.markdown("---")
+    
+    # ==================== 2. BUSCA NOS TEXTOS ====================
+    st.markdown("#### 🔎 Busca nos Textos")
+    
+    indice = indice_busca(assinatura_dados())
+    documentos = indice["documentos"]
+    if documentos.empty:
+        st.warning("⚠️ Nenhum texto disponível para busca.")
+        return
+    
+    consulta = st.text_input(
+        "Palavras-chave (todas devem aparecer; acentos e maiúsculas são ignorados):",
+        placeholder="ex.: vacina obrigatória",
+        key="busca_consulta"
+    )
+    
+    col1, col2, col3 = st.columns([2, 1, 2])
+    with col1:
+        temas_busca = st.multiselect("Temas:", list(ARQUIVOS_DATASET.keys()),
+                                     default=list(ARQUIVOS_DATASET.keys()), key="busca_temas")
+    with col2:
+        tipo_busca = st.selectbox("Tipo:", ["Todos", "Postagens", "Comentários"], key="busca_tipo")
+    with col3:
+        classes_busca = st.multiselect("Sentimento:", CLASSES, default=CLASSES, key="busca_classes")
+    
+    POR_PAGINA = 20
+    filtros = dict(
+        # Filtro intocado (tudo marcado) vai como None; seleção vazia não encontra nada
+        temas=None if set(temas_busca) == set(ARQUIVOS_DATASET) else temas_busca,
+        tipo=None if tipo_busca == "Todos" else tipo_busca,
+        classes=None if set(classes_busca) == set(CLASSES) else classes_busca,
+        # O filtro de período é mensal; buscar inclui o dia final
+        inicio=PERIODO[0],
+        fim=proximo_mes(PERIODO[1]) - pd.Timedelta(days=1) if PERIODO[1] is not None else None,
+        por_pagina=POR_PAGINA
+    )
+    
+    with secao("busca", consulta=consulta) as registro:
+        pagina = st.session_state.get("busca_pagina", 1)
+        total, resultados = buscar(indice, consulta, pagina=pagina, **filtros)
+        paginas = max(1, -(-total // POR_PAGINA))
+        if pagina > paginas:
+            # Nova consulta com menos resultados: volta para a primeira página
+            pagina = st.session_state["busca_pagina"] = 1
+            total, resultados = buscar(indice, consulta, pagina=pagina, **filtros)
+        registro["linhas"] = total
+    
+    st.caption(f"{formatar_inteiro(total)} resultado(s) • página {pagina} de {paginas} • mais recentes primeiro")
+    
+    if total:
+        st.dataframe(
+            resultados.assign(
+                Data=resultados["Data"].dt.strftime("%d/%m/%Y"),
+                Classe=resultados["Classe"].astype(str)
+            )[["Data", "Tema", "Tipo", "Classe", "Upvotes", "Texto"]],
+            use_container_width=True,
+            hide_index=True,
+            column_config={"Texto": st.column_config.TextColumn("Texto", width="large")}
+        )
+        st.number_input("Página", min_value=1, max_value=paginas, step=1, key="busca_pagina")
+    else:
+        st.info("Nenhum texto encontrado com esses filtros.")
+
+# ==================== RENDERIZAÇÃO DA ABA SELECIONADA ====================
+RENDERIZAR_ABA = {
+    "📖 Visão Geral": aba_visao_geral,
+    "📅 Evolução Temporal": aba_evolucao_temporal,
+    "📈 Polaridades": aba_polaridades,
+    "🎯 Desempenho do Modelo": aba_desempenho,
+    "🔬 Análise Detalhada": aba_analise_detalhada,
+}
+
+with secao(f"tab: {aba_selecionada}"):
+    RENDERIZAR_ABA[aba_selecionada]()
+
 # ==================== RODAPÉ ====================
 st.markdown("---")
 st.markdown("""
@@ -1554,4 +1951,19 @@ st.markdown("""
 <div style='text-align: center; color: #FFFFFF; font-size: 0.9rem; background-color: #000000; padding: 1rem; border-radius: 8px;'> 
     <footer> Desenvolvido Por Sávio Sousa • © 2025 </footer>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+# ==================== PAINEL DE DEPURAÇÃO ====================
+if DEBUG:
+    with st.sidebar:
+        st.markdown("### ⏱️ Tempo por seção")
+        sessao = _contexto.session_id[:8] if _contexto else "-"
+        st.caption(f"Execução: {time.perf_counter() - inicio_execucao:.3f} s • sessão {sessao}")
+        st.dataframe(resumo(), use_container_width=True, hide_index=True)
+        with st.expander("Registros desta execução"):
+            st.json(registros(), expanded=False)
+        with st.expander("Linhas rejeitadas na leitura dos CSVs"):
+            quarentena = relatorio_quarentena()
+            st.caption(f"Detalhes em {PASTA_QUARENTENA}")
+            st.dataframe(quarentena.groupby("Tema", sort=False)[["Linhas", "Rejeitadas"]].sum().reset_index(),
+                         use_container_width=True, hide_index=True)
+            st.dataframe(quarentena, use_container_width=True, hide_index=True)
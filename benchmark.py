@@ -0,0 +1,388 @@
+"""Benchmark reprodutível das etapas do dashboard com dados sintéticos.
+
+Gera, para cada tamanho pedido, um diretório data/ com os 12 arquivos de
+ARQUIVOS_DATASET no mesmo formato dos originais (separadores ';' e ',',
+coluna 'Classe Sentimeto', BOM, prob_*, textos com quebras de linha e
+datas) e mede tempo e pico de memória de cada etapa. O relatório JSON pode
+ser comparado entre commits com --comparar.
+
+Uso:
+    python benchmark.py                          # 10k e 100k linhas
+    python benchmark.py --linhas 1000000 --saida bench.json
+    python benchmark.py --comparar bench_anterior.json
+"""
+import os
+import gc
+import ast
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import ingestao
+from ingestao import ARQUIVOS_DATASET, CLASSES, esquema, tipo_do_arquivo
+
+PASTA_BENCHMARK = ".benchmark"
+LINHAS_POR_ESCRITA = 200_000
+
+MODULOS_SOB_DEMANDA = ["altair", "sklearn"]
+ORCAMENTO_IMPORTACAO = 1.5  # segundos
+
+# Cabeçalhos dos arquivos originais ('' é a coluna de índice sem nome)
+CABECALHOS = {
+    "stf_posts_sentimentoDeVerdade.csv": ["", "Unnamed: 0", "id Post", "Subreddit", "Autor", "Link", "Upvotes",
+                                          "Comentarios", "Data", "Idioma", "Contexto", "Classe Sentimento"],
+    "stf_comentarios_sentimento.csv": ["", "Unnamed: 0", "id Post", "Subreddit", "Comentario", "Autor", "Upvotes",
+                                       "Data", "Link", "Idioma", "Classe Sentimento"],
+    "amostraCompletaSTFPosts.csv": ["", "Unnamed: 0", "id Post", "contexto", "Classe Sentimento", "rotulo",
+                                    "prob_NEG", "prob_NEU", "prob_POS"],
+    "amostraCompletaSTFComentarios.csv": ["", "Unnamed: 0.1", "Unnamed: 0", "id Post", "Comentario",
+                                          "Classe Sentimento", "rotulo", "prob_NEG", "prob_NEU", "prob_POS"],
+    "dfpostsAB.csv": ["", "id Post", "Subreddit", "Autor", "Link", "Upvotes", "Comentarios", "Data", "Contexto",
+                      "Classe Sentimento"],
+    "dfcomentariosAB.csv": ["", "id Post", "Subreddit", "Comentario", "Autor", "Upvotes", "Data", "Link",
+                            "Classe Sentimento"],
+    "amostraCompletaABPosts.csv": ["", "Unnamed: 0.1", "Unnamed: 0", "id Post", "Link", "Contexto",
+                                   "Classe Sentimento", "rotulo", "prob_NEG", "prob_NEU", "prob_POS"],
+    "amostraCompletaABComentarios.csv": ["", "Unnamed: 0.1", "Unnamed: 0", "id Post", "Link", "Comentario",
+                                         "Classe Sentimento", "rotulo", "prob_NEG", "prob_NEU", "prob_POS"],
+    "PostsVacinacaoSaude_final.csv": ["", "id Post", "Subreddit", "Autor", "Link", "Upvotes", "Comentarios", "Data",
+                                      "Contexto", "Classe Sentimento"],
+    "ComentariosVacinacaoSaude_final.csv": ["", "id Post", "Subreddit", "Comentario", "Autor", "Upvotes", "Data",
+                                            "Link", "Idioma", "Classe Sentimeto"],
+    "amostraCompletoVSPosts1.csv": ["", "Unnamed: 0", "id Post", "Contexto", "Classe Sentimento", "rotulo",
+                                    "prob_NEG", "prob_NEU", "prob_POS"],
+    "amostraCompletoVSComentarios1.csv": ["", "Unnamed: 0", "id Post", "Comentario", "Link", "Classe Sentimento",
+                                          "rotulo", "prob_NEG", "prob_NEU", "prob_POS"],
+}
+
+PALAVRAS = (
+    "o a de que não é um uma para com por mais governo stf auxílio vacina brasil ministro "
+    "decisão pessoas ninguém sempre dinheiro povo lei país direito saúde covid política "
+    "crítica apoio absurdo vergonha excelente bom ruim melhor pior justiça dose programa "
+    "valor pagamento caixa bolsonaro lula moraes congresso eleição ciência atraso gestão"
+).split()
+SUBREDDITS = ["brasil", "portugal", "opiniaoimpopular", "brasilivre", "desabafos"]
+
+
+# ==================== GERADOR SINTÉTICO ====================
+def _textos(rng, quantidade=5000):
+    """Pool de textos com tamanhos variados; ~10% com quebras de linha e aspas"""
+    textos = []
+    for _ in range(quantidade):
+        palavras = rng.choice(PALAVRAS, size=rng.integers(3, 80))
+        texto = " ".join(palavras)
+        if rng.random() < 0.1:
+            meio = len(texto) // 2
+            texto = texto[:meio] + '\n\n> "citação" ' + texto[meio:]
+        textos.append(texto)
+    return np.array(textos, dtype=object)
+
+
+def _coluna(nome, n, inicio, rng, pool):
+    """Valores sintéticos para uma coluna, pelo nome"""
+    if nome == "" or nome.startswith("Unnamed"):
+        return np.arange(inicio, inicio + n)
+    if nome == "id Post":
+        # Vários comentários por postagem: ids repetidos
+        return np.char.add("p", np.char.mod("%x", rng.integers(0, max(n // 4, 1) + inicio, size=n)))
+    if nome == "Subreddit":
+        return rng.choice(SUBREDDITS, size=n)
+    if nome in ("Comentario", "Contexto", "contexto"):
+        return rng.choice(pool, size=n)
+    if nome == "Autor":
+        return np.char.add("user_", rng.integers(0, max(n // 3, 1), size=n).astype(str))
+    if nome == "Link":
+        return np.char.add(np.char.add("https://i.redd.it/", np.char.mod("%x", rng.integers(0, 2**40, size=n))), ".jpg")
+    if nome in ("Upvotes", "Comentarios"):
+        return rng.zipf(1.8, size=n).clip(max=100_000)
+    if nome == "Data":
+        segundos = rng.integers(pd.Timestamp("2015-01-01").value // 10**9,
+                                pd.Timestamp("2025-10-01").value // 10**9, size=n)
+        return pd.to_datetime(segundos, unit="s").strftime("%Y-%m-%d %H:%M:%S")
+    if nome == "Idioma":
+        return np.full(n, "pt")
+    raise KeyError(nome)
+
+
+def _bloco(arquivo, n, inicio, rng, pool):
+    colunas = CABECALHOS[arquivo]
+    dados = {}
+    classe = rng.choice(CLASSES, size=n, p=[0.3, 0.6, 0.1])
+    for nome in colunas:
+        if nome in ("Classe Sentimento", "Classe Sentimeto"):
+            dados[nome] = classe
+        elif nome == "rotulo":
+            # ~78% de concordância com o modelo, mais alguns rótulos sujos
+            rotulo = np.where(rng.random(n) < 0.75, classe, rng.choice(CLASSES, size=n)).astype(object)
+            sujos = rng.random(n) < 0.005
+            rotulo[sujos] = rng.choice(["neu", "MEI", None], size=int(sujos.sum()))
+            dados[nome] = rotulo
+        elif nome.startswith("prob_"):
+            continue
+        else:
+            dados[nome] = _coluna(nome, n, inicio, rng, pool)
+
+    if "prob_NEG" in colunas:
+        logits = rng.normal(size=(n, len(CLASSES)))
+        logits[np.arange(n), pd.Categorical(classe, categories=CLASSES).codes] += 2.5
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        for i, c in enumerate(CLASSES):
+            dados[f"prob_{c}"] = probs[:, i]
+
+    return pd.DataFrame(dados, columns=colunas)
+
+
+def gerar_dataset(raiz, linhas, semente=42):
+    """Escreve em raiz/data/ os 12 arquivos de ARQUIVOS_DATASET com `linhas` linhas cada"""
+    pasta = os.path.join(raiz, "data")
+    os.makedirs(pasta, exist_ok=True)
+    pool = _textos(np.random.default_rng(semente))
+
+    for indice, (_, arquivo, _) in enumerate(ingestao.todos_arquivos()):
+        rng = np.random.default_rng([semente, indice])
+        sep, encoding = esquema(arquivo)["sep"], esquema(arquivo)["encoding"]
+        caminho = os.path.join(pasta, arquivo)
+        with open(caminho, "w", encoding=encoding, newline="") as f:
+            for inicio in range(0, linhas, LINHAS_POR_ESCRITA):
+                n = min(LINHAS_POR_ESCRITA, linhas - inicio)
+                _bloco(arquivo, n, inicio, rng, pool).to_csv(f, sep=sep, index=False, header=inicio == 0)
+
+
+def preparar_dataset(linhas, semente=42):
+    """Diretório com o dataset sintético de `linhas` linhas (reaproveitado se já existir)"""
+    raiz = os.path.abspath(os.path.join(PASTA_BENCHMARK, f"{linhas}_{semente}"))
+    marcador = os.path.join(raiz, "pronto")
+    if not os.path.isfile(marcador):
+        gerar_dataset(raiz, linhas, semente)
+        open(marcador, "w").close()
+    return raiz
+
+
+# ==================== ETAPAS ====================
+def medir(funcao, *args, preparar=None):
+    """Executa funcao(*args) e devolve (resultado, segundos, pico de memória em MB)
+
+    O tempo vem de uma execução sem tracemalloc (o rastreamento deixa a etapa
+    várias vezes mais lenta) e o pico de uma segunda execução rastreada.
+    preparar() roda antes de cada execução, para etapas que dependem de estado.
+    """
+    if preparar:
+        preparar()
+    gc.collect()
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    segundos = time.perf_counter() - inicio
+
+    if preparar:
+        preparar()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        funcao(*args)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return resultado, segundos, pico / 2**20
+
+
+def _limpar_cache():
+    import shutil
+    shutil.rmtree(ingestao.CACHE_PATH, ignore_errors=True)
+
+
+def _limpar_resumo():
+    """Remove o cubo persistido e a memorização da agregação em blocos"""
+    from agregacao import ARQUIVO_CUBO, MANIFESTO_CUBO, _agregar_em_blocos
+    for caminho in (ARQUIVO_CUBO, MANIFESTO_CUBO):
+        if os.path.isfile(caminho):
+            os.remove(caminho)
+    _agregar_em_blocos.cache_clear()
+
+
+def executar_etapas(raiz):
+    """Mede cada etapa do dashboard sobre o dataset em raiz/data
+
+    Arquivos acima de LIMITE_STREAMING seguem o caminho do app: leitura em
+    blocos, agregados de carregar_resumo e conversas de somar_arquivos, sem
+    carregar as tabelas completas.
+    """
+    from agregacao import carregar_resumo, contar_sentimentos, construir_cubo_mensal, totais_mensais
+    from conversas import somar_arquivos
+    from metricas import calcular_kernel, calcular_curvas_roc
+
+    anterior = os.getcwd()
+    os.chdir(raiz)  # DATA_PATH é relativo ao diretório atual
+    etapas = {}
+    try:
+        _limpar_cache()
+        completos = ingestao.arquivos_completos()
+        amostras = [(tema, tipo, ARQUIVOS_DATASET[tema][chave])
+                    for tema in ARQUIVOS_DATASET
+                    for chave, tipo in [("posts_amostra", "Postagens"), ("comentarios_amostra", "Comentários")]]
+        streaming = any(ingestao.usar_streaming(arquivo) for _, _, arquivo in completos)
+        print(f"  modo: {'streaming (leitura em blocos)' if streaming else 'tabelas completas em memória'}")
+
+        def registrar(nome, funcao, *args, preparar=None):
+            resultado, segundos, pico = medir(funcao, *args, preparar=preparar)
+            etapas[nome] = {"segundos": round(segundos, 4), "pico_mb": round(pico, 2)}
+            print(f"  {nome:<32} {segundos:>9.3f} s {pico:>10.1f} MB", flush=True)
+            return resultado
+
+        if streaming:
+            registrar("ler_em_blocos", lambda: sum(len(bloco) for _, _, arquivo in completos
+                                                   for bloco in ingestao.ler_em_blocos(arquivo)))
+        else:
+            registrar("load_data_csv", lambda: [ingestao.ler_csv(a, tipo_do_arquivo(c))
+                                                for t in ARQUIVOS_DATASET for c, a in ARQUIVOS_DATASET[t].items()])
+        registrar("load_data_cache_frio", lambda: ingestao.preparar_caches(), preparar=_limpar_cache)
+        amostras_df = {(tema, tipo): ingestao.carregar_tabela(arquivo, "amostra") for tema, tipo, arquivo in amostras}
+
+        if streaming:
+            cubo, _ = registrar("carregar_resumo", carregar_resumo, preparar=_limpar_resumo)
+            registrar("somar_arquivos", lambda: [somar_arquivos(ARQUIVOS_DATASET[tema]["posts"],
+                                                                ARQUIVOS_DATASET[tema]["comentarios"])
+                                                 for tema in ARQUIVOS_DATASET])
+        else:
+            tabelas = registrar("load_data_cache_quente",
+                                lambda: {(tema, tipo): ingestao.carregar_tabela(arquivo)
+                                         for tema, tipo, arquivo in completos})
+            registrar("carregar_todos_dados", contar_sentimentos, tabelas)
+        registrar("calcular_metricas_completas", lambda: [calcular_kernel(df) for df in amostras_df.values()])
+        registrar("plot_roc_altair", lambda: [_quadro_roc(calcular_curvas_roc(df)) for df in amostras_df.values()])
+        if streaming:
+            registrar("gerar_evolucao_unificada", totais_mensais, cubo)
+        else:
+            registrar("gerar_evolucao_unificada", lambda: totais_mensais(construir_cubo_mensal(tabelas)))
+    finally:
+        os.chdir(anterior)
+    return etapas
+
+
+def _quadro_roc(curvas):
+    """Mesma construção de DataFrame usada por plot_roc_altair"""
+    if not curvas:
+        return pd.DataFrame()
+    return pd.DataFrame({
+        "FPR": np.concatenate([fpr for fpr, _ in curvas.values()]),
+        "TPR": np.concatenate([tpr for _, tpr in curvas.values()]),
+        "Classe": np.repeat(list(curvas), [len(fpr) for fpr, _ in curvas.values()])
+    })
+
+
+# ==================== IMPORTAÇÃO ====================
+def modulos_iniciais(arquivo="app.py"):
+    """Módulos importados no topo de app.py, lidos da própria fonte
+
+    É o custo que toda sessão nova paga antes da primeira renderização; imports
+    dentro de funções (altair, sklearn) ficam de fora.
+    """
+    caminho = os.path.join(os.path.dirname(os.path.abspath(__file__)), arquivo)
+    with open(caminho, encoding="utf-8") as f:
+        arvore = ast.parse(f.read())
+    modulos = []
+    for no in arvore.body:
+        if isinstance(no, ast.Import):
+            modulos += [alias.name for alias in no.names]
+        elif isinstance(no, ast.ImportFrom) and not no.level:
+            modulos.append(no.module)
+    return list(dict.fromkeys(modulos))
+
+
+def medir_importacao(repeticoes=3):
+    """Menor tempo de importação dos módulos iniciais em um interpretador novo"""
+    codigo = (
+        "import sys, time, json\n"
+        "inicio = time.perf_counter()\n"
+        f"import {', '.join(modulos_iniciais())}\n"
+        "segundos = time.perf_counter() - inicio\n"
+        f"carregados = [m for m in {MODULOS_SOB_DEMANDA!r} if m in sys.modules]\n"
+        "print(json.dumps({'segundos': segundos, 'carregados': carregados}))\n"
+    )
+    medicoes = []
+    for _ in range(repeticoes):
+        saida = subprocess.check_output([sys.executable, "-c", codigo], text=True,
+                                        cwd=os.path.dirname(os.path.abspath(__file__)))
+        medicoes.append(json.loads(saida.strip().splitlines()[-1]))
+    melhor = min(medicoes, key=lambda m: m["segundos"])
+    return {"segundos": round(melhor["segundos"], 4), "sob_demanda_carregados": melhor["carregados"]}
+
+
+# ==================== RELATÓRIO ====================
+def _commit_atual():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(relatorio, anterior):
+    """Imprime a variação de tempo e memória de cada etapa em relação a outro relatório"""
+    print(f"\nComparação com {anterior.get('commit') or 'relatório anterior'}:")
+    if "importacao" in relatorio and "importacao" in anterior and anterior["importacao"]["segundos"]:
+        di = (relatorio["importacao"]["segundos"] / anterior["importacao"]["segundos"] - 1) * 100
+        print(f"  {'':>9} {'importação inicial':<32} tempo {di:+7.1f}%")
+    for tamanho, etapas in relatorio["resultados"].items():
+        base = anterior.get("resultados", {}).get(tamanho, {})
+        for nome, atual in etapas.items():
+            if nome not in base:
+                continue
+            dt = (atual["segundos"] / base[nome]["segundos"] - 1) * 100 if base[nome]["segundos"] else 0
+            dm = (atual["pico_mb"] / base[nome]["pico_mb"] - 1) * 100 if base[nome]["pico_mb"] else 0
+            print(f"  {tamanho:>9} {nome:<32} tempo {dt:+7.1f}%  memória {dm:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das etapas do dashboard com dados sintéticos")
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10_000, 100_000],
+                        help="linhas por arquivo (ex.: 10000 100000 1000000 10000000)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", default="benchmark.json")
+    parser.add_argument("--comparar", default=None, help="relatório JSON anterior")
+    parser.add_argument("--orcamento-importacao", type=float, default=ORCAMENTO_IMPORTACAO,
+                        help="tempo máximo (s) para importar os módulos iniciais do app")
+    args = parser.parse_args()
+
+    relatorio = {
+        "commit": _commit_atual(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "cpus": os.cpu_count(),
+        "resultados": {}
+    }
+
+    importacao = medir_importacao()
+    importacao["orcamento"] = args.orcamento_importacao
+    relatorio["importacao"] = importacao
+    print(f"importação inicial do app: {importacao['segundos']:.3f} s (orçamento {args.orcamento_importacao:.2f} s)")
+    if importacao["sob_demanda_carregados"]:
+        print(f"  atenção: {', '.join(importacao['sob_demanda_carregados'])} carregado(s) na importação inicial")
+    for linhas in args.linhas:
+        print(f"{linhas} linhas por arquivo", flush=True)
+        raiz = preparar_dataset(linhas, args.semente)
+        relatorio["resultados"][str(linhas)] = executar_etapas(raiz)
+
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, indent=2)
+    print(f"\nRelatório gravado em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(relatorio, json.load(f))
+
+    # Código de saída 1 quando o orçamento de importação é estourado
+    if importacao["segundos"] > args.orcamento_importacao or importacao["sob_demanda_carregados"]:
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""Busca textual nos comentários e postagens com um índice invertido.
+
+O índice é construído na ingestão a partir de 'Comentario' e 'Contexto' dos
+arquivos completos: os textos são normalizados (minúsculas, sem acentos),
+quebrados em palavras e as stopwords do português são descartadas. Cada
+termo aponta para a lista ordenada dos documentos em que aparece (formato
+CSR: termos ordenados, início de cada lista e documentos), então uma
+consulta é uma busca binária por termo e uma interseção de listas.
+"""
+import os
+import re
+import json
+
+import numpy as np
+import pandas as pd
+
+from ingestao import (
+    ARQUIVOS_DATASET, CACHE_PATH, CLASSES, COLUNA_DATA, TIPOS_TEXTO, PARQUET_DISPONIVEL,
+    arquivos_completos, carregar_tabela, esquema, ler_em_blocos, usar_streaming
+)
+from agregacao import codigos_sentimento, chave_fontes
+
+ARQUIVO_INDICE = os.path.join(CACHE_PATH, "indice_busca.npz")
+ARQUIVO_DOCUMENTOS = os.path.join(CACHE_PATH, "indice_busca_documentos.parquet")
+MANIFESTO_INDICE = os.path.join(CACHE_PATH, "indice_busca.json")
+
+PADRAO_TOKEN = r"[a-z0-9]+"
+TAMANHO_MINIMO = 2
+
+STOPWORDS = set("""
+a ao aos as ate com como da das de dela dele deles do dos e ela elas ele eles em entre era essa esse
+esta este eu foi for ha isso isto ja la lhe mais mas me mesmo meu minha muito na nas nem no nos nossa
+nosso num numa o os ou para pela pelas pelo pelos por qual quando que quem se sem ser seu sua so tambem
+te tem ter teu tu tua um uma umas uns vai voce voces vos pra pro q vc
+""".split())
+
+
+# ==================== TOKENIZAÇÃO ====================
+def normalizar_textos(textos):
+    """Minúsculas e sem acentos (NFKD + ASCII), vetorizado com os métodos .str do pandas"""
+    return (
+        pd.Series(textos, dtype=object).fillna("").astype(str)
+          .str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+          .str.lower()
+    )
+
+
+def tokenizar(texto):
+    """Termos de um texto (ou de uma consulta) como o índice os guarda"""
+    tokens = normalizar_textos([texto]).str.findall(PADRAO_TOKEN).iloc[0]
+    return [t for t in tokens if len(t) >= TAMANHO_MINIMO and t not in STOPWORDS]
+
+
+def termo_em_digitacao(consulta):
+    """Último termo da consulta se ele ainda está sendo digitado, senão None
+
+    Vale só quando a consulta termina no meio de uma palavra e essa palavra é
+    um termo do índice: uma stopword ou um token curto no fim não transferem o
+    prefixo para a palavra anterior.
+    """
+    ultima = re.search(f"(?:{PADRAO_TOKEN})$", normalizar_textos([consulta]).iloc[0])
+    termos = tokenizar(ultima.group()) if ultima else []
+    return termos[0] if termos else None
+
+
+def _pares_termo_documento(textos, primeiro_documento):
+    """(documento, termo) distintos de um bloco de textos"""
+    tokens = normalizar_textos(textos).str.findall(PADRAO_TOKEN)
+    tokens.index = np.arange(primeiro_documento, primeiro_documento + len(tokens))
+    tokens = tokens.explode().dropna()
+
+    # Filtros e deduplicação sobre o vocabulário do bloco, não sobre cada ocorrência
+    codigos, vocabulario = pd.factorize(tokens.to_numpy())
+    vocabulario = pd.Series(vocabulario, dtype=object)
+    validos = ((vocabulario.str.len() >= TAMANHO_MINIMO) & ~vocabulario.isin(STOPWORDS)).to_numpy()
+    manter = validos[codigos]
+    chaves = np.unique(tokens.index.to_numpy(np.int64)[manter] * len(vocabulario) + codigos[manter])
+    documentos, codigos = np.divmod(chaves, max(len(vocabulario), 1))
+    return pd.DataFrame({"documento": documentos, "termo": vocabulario.to_numpy()[codigos]})
+
+
+# ==================== CONSTRUÇÃO ====================
+def _blocos(arquivo):
+    """O arquivo completo inteiro, ou em blocos no modo streaming"""
+    if usar_streaming(arquivo):
+        yield from ler_em_blocos(arquivo)
+    else:
+        yield carregar_tabela(arquivo, "completo")
+
+
+def _documentos_do_bloco(df, tema, tipo, coluna_texto):
+    classes = codigos_sentimento(df["Classe Sentimento"]) if "Classe Sentimento" in df.columns \
+        else np.full(len(df), -1, dtype=np.int8)
+    return pd.DataFrame({
+        "Tema": tema,
+        "Tipo": tipo,
+        "Classe": classes,
+        "Data": df[COLUNA_DATA].to_numpy() if COLUNA_DATA in df.columns
+                else np.full(len(df), np.datetime64("NaT"), dtype="datetime64[ns]"),
+        "Upvotes": df["Upvotes"].to_numpy() if "Upvotes" in df.columns else 0,
+        "Texto": df[coluna_texto].fillna("").astype(str).to_numpy()
+    })
+
+
+def construir_indice():
+    """Índice invertido sobre os textos de todos os arquivos completos
+
+    Retorna um dict com termos (ordenados), inicios (len(termos) + 1),
+    postings (documentos de cada termo, ordenados) e documentos (DataFrame
+    com Tema, Tipo, Classe, Data, Upvotes e Texto de cada documento).
+    """
+    documentos, pares = [], []
+    total = 0
+    for tema, tipo, arquivo in arquivos_completos():
+        coluna_texto = esquema(arquivo)["texto"]
+        if coluna_texto is None:
+            continue
+        for df in _blocos(arquivo):
+            if df.empty:
+                continue
+            documentos.append(_documentos_do_bloco(df, tema, tipo, coluna_texto))
+            pares.append(_pares_termo_documento(df[coluna_texto].to_numpy(), total))
+            total += len(df)
+
+    if not documentos:
+        return {"termos": np.array([], dtype=str), "inicios": np.zeros(1, dtype=np.int64),
+                "postings": np.empty(0, dtype=np.int32), "documentos": pd.DataFrame()}
+
+    docs = pd.concat(documentos, ignore_index=True)
+    docs["Tema"] = pd.Categorical(docs["Tema"], categories=list(ARQUIVOS_DATASET))
+    docs["Tipo"] = pd.Categorical(docs["Tipo"], categories=list(TIPOS_TEXTO.values()))
+    docs["Classe"] = docs["Classe"].astype(np.int8)
+
+    # Os blocos têm documentos disjuntos: os pares já são únicos
+    pares = pd.concat(pares, ignore_index=True)
+    codigos, termos = pd.factorize(pares["termo"], sort=True)
+    ordem = np.lexsort((pares["documento"].to_numpy(), codigos))
+    codigos = codigos[ordem]
+    return {
+        "termos": np.asarray(termos, dtype=str),
+        "inicios": np.searchsorted(codigos, np.arange(len(termos) + 1)).astype(np.int64),
+        "postings": pares["documento"].to_numpy()[ordem].astype(np.int32),
+        "documentos": docs
+    }
+
+
+# ==================== PERSISTÊNCIA ====================
+def _gravar_indice(indice, chave):
+    os.makedirs(CACHE_PATH, exist_ok=True)
+    with open(ARQUIVO_INDICE + ".tmp", "wb") as f:
+        np.savez(f, termos=indice["termos"], inicios=indice["inicios"], postings=indice["postings"])
+    os.replace(ARQUIVO_INDICE + ".tmp", ARQUIVO_INDICE)
+    indice["documentos"].to_parquet(ARQUIVO_DOCUMENTOS + ".tmp", index=False)
+    os.replace(ARQUIVO_DOCUMENTOS + ".tmp", ARQUIVO_DOCUMENTOS)
+    with open(MANIFESTO_INDICE + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"chave": chave, "documentos": len(indice["documentos"]), "termos": len(indice["termos"])}, f)
+    os.replace(MANIFESTO_INDICE + ".tmp", MANIFESTO_INDICE)
+
+
+def _ler_indice(chave):
+    if chave is None or not (os.path.isfile(ARQUIVO_INDICE) and os.path.isfile(ARQUIVO_DOCUMENTOS)):
+        return None
+    try:
+        with open(MANIFESTO_INDICE, encoding="utf-8") as f:
+            if json.load(f).get("chave") != chave:
+                return None
+    except (OSError, ValueError):
+        return None
+    with np.load(ARQUIVO_INDICE, allow_pickle=False) as dados:
+        indice = {nome: dados[nome] for nome in ("termos", "inicios", "postings")}
+    indice["documentos"] = pd.read_parquet(ARQUIVO_DOCUMENTOS)
+    return indice
+
+
+def carregar_indice():
+    """Índice persistido em data/.cache, reconstruído quando algum arquivo completo muda"""
+    chave = chave_fontes() if PARQUET_DISPONIVEL else None
+    indice = _ler_indice(chave)
+    if indice is None:
+        indice = construir_indice()
+        if chave is not None:
+            _gravar_indice(indice, chave)
+    return indice
+
+
+# ==================== CONSULTA ====================
+def _postings(indice, termo, prefixo=False):
+    """Documentos que contêm o termo (ou qualquer termo com esse prefixo)"""
+    termos, inicios, postings = indice["termos"], indice["inicios"], indice["postings"]
+    primeiro = np.searchsorted(termos, termo, side="left")
+    ultimo = np.searchsorted(termos, termo + "\uffff", side="left") if prefixo \
+        else primeiro + int(primeiro < len(termos) and termos[primeiro] == termo)
+    if ultimo <= primeiro:
+        return np.empty(0, dtype=np.int32)
+    if ultimo - primeiro == 1:
+        return postings[inicios[primeiro]:inicios[primeiro + 1]]
+    return np.unique(postings[inicios[primeiro]:inicios[ultimo]])
+
+
+def buscar(indice, consulta, temas=None, tipo=None, classes=None, inicio=None, fim=None,
+           pagina=1, por_pagina=20):
+    """Documentos com todos os termos da consulta, filtrados e paginados
+
+    O último termo vale como prefixo enquanto é digitado (termo_em_digitacao).
+    temas e classes são listas (None = todos, lista vazia = nenhum);
+    inicio/fim limitam a data. Retorna (total de resultados, DataFrame da
+    página) com os mais recentes primeiro.
+    """
+    documentos = indice["documentos"]
+    termos = tokenizar(consulta)
+    if termos:
+        prefixo = termo_em_digitacao(consulta) is not None
+        listas = [_postings(indice, t, prefixo and i == len(termos) - 1) for i, t in enumerate(termos)]
+        listas.sort(key=len)
+        encontrados = listas[0]
+        for lista in listas[1:]:
+            if not len(encontrados):
+                break
+            encontrados = np.intersect1d(encontrados, lista, assume_unique=True)
+    else:
+        encontrados = np.arange(len(documentos))
+
+    # Filtros só sobre os documentos encontrados
+    mascara = np.ones(len(encontrados), dtype=bool)
+    if temas is not None:
+        mascara &= np.isin(documentos["Tema"].cat.codes.to_numpy()[encontrados],
+                           documentos["Tema"].cat.categories.get_indexer(temas))
+    if tipo:
+        mascara &= documentos["Tipo"].cat.codes.to_numpy()[encontrados] == documentos["Tipo"].cat.categories.get_loc(tipo)
+    if classes is not None:
+        codigos = [CLASSES.index(c) for c in classes]
+        mascara &= np.isin(documentos["Classe"].to_numpy()[encontrados], codigos)
+    datas = documentos["Data"].to_numpy()[encontrados]
+    if inicio is not None:
+        mascara &= datas >= np.datetime64(pd.Timestamp(inicio))
+    if fim is not None:
+        mascara &= datas < np.datetime64(pd.Timestamp(fim) + pd.Timedelta(days=1))
+    encontrados, datas = encontrados[mascara], datas[mascara]
+
+    # Mais recentes primeiro (datas ausentes no fim); só a página é materializada
+    ordem = np.argsort(np.where(np.isnat(datas), np.datetime64("1970-01-01"), datas).view(np.int64) * -1,
+                       kind="stable")
+    inicio_pagina = (max(pagina, 1) - 1) * por_pagina
+    pagina_ids = encontrados[ordem[inicio_pagina:inicio_pagina + por_pagina]]
+
+    resultado = documentos.iloc[pagina_ids].copy()
+    resultado["Classe"] = pd.Categorical.from_codes(resultado["Classe"].to_numpy(), categories=CLASSES)
+    return len(encontrados), resultado.reset_index(drop=True)
@@ -0,0 +1,340 @@
+"""Calibração das probabilidades do modelo (prob_NEG/prob_NEU/prob_POS).
+
+Diagramas de confiabilidade, ECE e Brier saem de bincounts sobre a faixa de
+cada probabilidade (um histograma ponderado, todas as classes de uma vez).
+A recalibração por temperatura (ou Dirichlet) é ajustada nas amostras
+rotuladas e aplicada em blocos a CSVs com prob_*, como os gerados por
+inferencia.py. A soma das probabilidades calibradas estima quantas
+publicações há de cada classe sem depender do argmax.
+
+Uso:
+    python calibracao.py
+    python calibracao.py --metodo dirichlet
+    python calibracao.py --aplicar data/novo_sentimento.csv data/novo_calibrado.csv --tema STF --tipo Comentários
+"""
+import os
+import json
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from ingestao import (
+    ARQUIVOS_DATASET, CACHE_PATH, CLASSES, COLUNAS_PROBABILIDADE, TIPOS_TEXTO, carregar_tabela
+)
+from agregacao import codigos_sentimento
+
+FAIXAS = 10
+DOBRAS = 5
+EPSILON = 1e-7
+METODOS = ["temperatura", "dirichlet"]
+COLUNAS_CALIBRADAS = [f"prob_cal_{c}" for c in CLASSES]
+ARQUIVO_CALIBRACAO = os.path.join(CACHE_PATH, "calibracao.json")
+
+
+# ==================== MEDIDAS DE CALIBRAÇÃO ====================
+def dados_calibracao(df):
+    """(probabilidades n × 3, códigos 0..2 do rótulo) das linhas com rótulo e prob_* válidos"""
+    if df.empty or "rotulo" not in df.columns or not all(c in df.columns for c in COLUNAS_PROBABILIDADE):
+        return np.empty((0, len(CLASSES))), np.empty(0, dtype=np.int64)
+    probs = df[COLUNAS_PROBABILIDADE].to_numpy(dtype=float)
+    codigos = codigos_sentimento(df["rotulo"]).astype(np.int64)
+    validos = (codigos >= 0) & np.isfinite(probs).all(axis=1)
+    return probs[validos], codigos[validos]
+
+
+def _histograma(valores, acertos, faixas, grupos=1):
+    """Contagem, soma dos valores e soma dos acertos por faixa de [0, 1]
+
+    valores/acertos: (linhas, grupos); cada grupo (classe) tem suas faixas.
+    Equivale a np.histogram com pesos, para todos os grupos num só bincount.
+    """
+    faixa = np.clip((valores * faixas).astype(np.int64), 0, faixas - 1) + np.arange(grupos) * faixas
+    faixa = faixa.ravel()
+    tamanho = grupos * faixas
+    contagem = np.bincount(faixa, minlength=tamanho).reshape(grupos, faixas)
+    soma = np.bincount(faixa, weights=valores.ravel(), minlength=tamanho).reshape(grupos, faixas)
+    certos = np.bincount(faixa, weights=acertos.ravel().astype(float), minlength=tamanho).reshape(grupos, faixas)
+    return contagem, soma, certos
+
+
+def curvas_confiabilidade(probs, codigos, faixas=FAIXAS):
+    """Diagrama de confiabilidade um-contra-todos de cada classe
+
+    Retorna um dict de arrays (3, faixas): contagem, confianca (probabilidade
+    média da faixa) e frequencia (fração observada da classe); faixas vazias
+    ficam NaN.
+    """
+    n = len(CLASSES)
+    contagem, soma, certos = _histograma(probs, codigos[:, None] == np.arange(n), faixas, n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {"contagem": contagem, "confianca": soma / contagem, "frequencia": certos / contagem}
+
+
+def erro_calibracao(probs, codigos, faixas=FAIXAS):
+    """ECE do rótulo previsto (confiança = maior probabilidade) e ECE de cada classe"""
+    if not len(codigos):
+        return 0.0, np.zeros(len(CLASSES))
+    confianca = probs.max(axis=1)
+    acerto = probs.argmax(axis=1) == codigos
+    contagem, soma, certos = _histograma(confianca[:, None], acerto[:, None], faixas)
+    ece = np.abs(certos - soma).sum() / len(codigos)
+
+    # Por classe: |frequência - confiança| ponderado pelo tamanho de cada faixa
+    n = len(CLASSES)
+    contagem, soma, certos = _histograma(probs, codigos[:, None] == np.arange(n), faixas, n)
+    return float(ece), np.abs(certos - soma).sum(axis=1) / len(codigos)
+
+
+def brier(probs, codigos):
+    """Escore de Brier multiclasse: média de Σ (p - one-hot)²"""
+    if not len(codigos):
+        return 0.0
+    alvo = codigos[:, None] == np.arange(probs.shape[1])
+    return float(((probs - alvo) ** 2).sum(axis=1).mean())
+
+
+def log_perda(probs, codigos):
+    """Log-loss (entropia cruzada média) das probabilidades"""
+    if not len(codigos):
+        return 0.0
+    return float(-np.log(np.clip(probs[np.arange(len(codigos)), codigos], EPSILON, 1)).mean())
+
+
+# ==================== RECALIBRAÇÃO ====================
+def _softmax(logits):
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def _log_probs(probs):
+    return np.log(np.clip(probs, EPSILON, 1))
+
+
+def ajustar_temperatura(probs, codigos, pontos=81, refinamentos=3):
+    """Temperatura T que minimiza a log-loss de softmax(log p / T)
+
+    Avalia uma grade de temperaturas de uma vez (grade × linhas × classes) e
+    refina a grade em volta do melhor ponto.
+    """
+    if not len(codigos):
+        return 1.0
+    logits = _log_probs(probs)
+    linhas = np.arange(len(codigos))
+    inferior, superior = np.log(0.05), np.log(20.0)
+    for _ in range(refinamentos):
+        grade = np.exp(np.linspace(inferior, superior, pontos))
+        escalados = logits[None] / grade[:, None, None]
+        maximo = escalados.max(axis=-1, keepdims=True)
+        log_normalizador = np.log(np.exp(escalados - maximo).sum(axis=-1)) + maximo[..., 0]
+        perdas = (log_normalizador - escalados[:, linhas, codigos]).mean(axis=1)
+        melhor = int(perdas.argmin())
+        passo = (superior - inferior) / (pontos - 1)
+        centro = np.log(grade[melhor])
+        inferior, superior = centro - passo, centro + passo
+    return float(grade[melhor])
+
+
+def ajustar_dirichlet(probs, codigos, regularizacao=1.0):
+    """Calibração Dirichlet: regressão logística multinomial sobre log(p)
+
+    Retorna (pesos 3 × 3, viés 3). Classes ausentes no ajuste ficam com
+    probabilidade ~0.
+    """
+    from sklearn.linear_model import LogisticRegression  # só quando o método é usado
+
+    n = len(CLASSES)
+    pesos, vies = np.zeros((n, n)), np.full(n, -30.0)
+    presentes = np.unique(codigos)
+    if len(presentes) < 2:
+        vies[presentes] = 0.0
+        return pesos, vies
+    modelo = LogisticRegression(C=regularizacao, max_iter=1000).fit(_log_probs(probs), codigos)
+    if len(presentes) == 2:
+        # Binário: o sklearn guarda só o logit da segunda classe
+        pesos[presentes[1]], vies[presentes[1]] = modelo.coef_[0], modelo.intercept_[0]
+        vies[presentes[0]] = 0.0
+    else:
+        pesos[modelo.classes_], vies[modelo.classes_] = modelo.coef_, modelo.intercept_
+    return pesos, vies
+
+
+def ajustar(probs, codigos, metodo="temperatura"):
+    """Parâmetros da recalibração, serializáveis em JSON"""
+    if metodo == "temperatura":
+        return {"metodo": metodo, "temperatura": ajustar_temperatura(probs, codigos)}
+    if metodo == "dirichlet":
+        pesos, vies = ajustar_dirichlet(probs, codigos)
+        return {"metodo": metodo, "pesos": pesos.tolist(), "vies": vies.tolist()}
+    raise ValueError(f"Método de calibração desconhecido: {metodo} (use {', '.join(METODOS)})")
+
+
+def aplicar(probs, parametros):
+    """Probabilidades recalibradas; só numpy, para aplicar em lote"""
+    if parametros["metodo"] == "temperatura":
+        return _softmax(_log_probs(probs) / parametros["temperatura"])
+    return _softmax(_log_probs(probs) @ np.asarray(parametros["pesos"]).T + np.asarray(parametros["vies"]))
+
+
+def fora_da_dobra(probs, codigos, metodo="temperatura", dobras=DOBRAS, semente=0):
+    """Probabilidades calibradas por ajustes que não viram a linha (validação cruzada)"""
+    dobra = np.random.default_rng(semente).permutation(len(codigos)) % dobras
+    calibradas = np.empty_like(probs)
+    for k in range(dobras):
+        teste = dobra == k
+        if teste.any():
+            calibradas[teste] = aplicar(probs[teste], ajustar(probs[~teste], codigos[~teste], metodo))
+    return calibradas
+
+
+# ==================== AVALIAÇÃO DAS AMOSTRAS ====================
+def _medidas(probs, codigos, faixas):
+    ece, ece_classes = erro_calibracao(probs, codigos, faixas)
+    return {
+        "ece": ece,
+        "ece_classes": ece_classes,
+        "brier": brier(probs, codigos),
+        "log_perda": log_perda(probs, codigos),
+        "curvas": curvas_confiabilidade(probs, codigos, faixas),
+    }
+
+
+def avaliar_calibracao(df, metodo="temperatura", faixas=FAIXAS, dobras=DOBRAS):
+    """Calibração de uma amostra rotulada, antes e depois da recalibração
+
+    Retorna um dict com parametros (ajustados na amostra inteira), antes e
+    depois (ece, ece_classes, brier, log_perda e curvas; "depois" usa as
+    probabilidades fora da dobra) e contagens por classe: rótulo humano,
+    argmax, soma das probabilidades e soma das calibradas. None sem prob_*.
+    """
+    probs, codigos = dados_calibracao(df)
+    if len(codigos) < dobras:
+        return None
+    calibradas = fora_da_dobra(probs, codigos, metodo, dobras)
+    n = len(CLASSES)
+    return {
+        "parametros": ajustar(probs, codigos, metodo),
+        "linhas": len(codigos),
+        "antes": _medidas(probs, codigos, faixas),
+        "depois": _medidas(calibradas, codigos, faixas),
+        "contagens": pd.DataFrame({
+            "Classe": CLASSES,
+            "Rótulo": np.bincount(codigos, minlength=n),
+            "Argmax": np.bincount(probs.argmax(axis=1), minlength=n),
+            "Esperada": probs.sum(axis=0),
+            "Esperada Calibrada": calibradas.sum(axis=0),
+        }),
+    }
+
+
+def amostras():
+    """(tema, tipo, arquivo) das amostras rotuladas, na ordem do dashboard"""
+    return [(tema, rotulo, arquivos[f"{chave}_amostra"])
+            for tema, arquivos in ARQUIVOS_DATASET.items()
+            for chave, rotulo in TIPOS_TEXTO.items()]
+
+
+def ajustar_amostras(metodo="temperatura", faixas=FAIXAS):
+    """Avalia e ajusta todas as amostras; grava os parâmetros em data/.cache
+
+    Retorna (DataFrame de resumo, {"tema|tipo": parâmetros}).
+    """
+    linhas, parametros = [], {}
+    for tema, tipo, arquivo in amostras():
+        avaliacao = avaliar_calibracao(carregar_tabela(arquivo, "amostra"), metodo, faixas)
+        if avaliacao is None:
+            continue
+        parametros[f"{tema}|{tipo}"] = avaliacao["parametros"]
+        antes, depois = avaliacao["antes"], avaliacao["depois"]
+        linhas.append({
+            "Tema": tema, "Tipo": tipo, "Linhas": avaliacao["linhas"],
+            "Temperatura": avaliacao["parametros"].get("temperatura", np.nan),
+            "ECE": antes["ece"], "ECE Calibrado": depois["ece"],
+            "Brier": antes["brier"], "Brier Calibrado": depois["brier"],
+        })
+
+    os.makedirs(CACHE_PATH, exist_ok=True)
+    with open(ARQUIVO_CALIBRACAO + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"metodo": metodo, "parametros": parametros}, f, ensure_ascii=False, indent=2)
+    os.replace(ARQUIVO_CALIBRACAO + ".tmp", ARQUIVO_CALIBRACAO)
+    return pd.DataFrame(linhas), parametros
+
+
+def carregar_parametros(tema, tipo, metodo="temperatura"):
+    """Parâmetros gravados para (tema, tipo); reajusta as amostras se faltarem"""
+    try:
+        with open(ARQUIVO_CALIBRACAO, encoding="utf-8") as f:
+            gravados = json.load(f)
+        if gravados.get("metodo") == metodo and f"{tema}|{tipo}" in gravados["parametros"]:
+            return gravados["parametros"][f"{tema}|{tipo}"]
+    except (OSError, ValueError):
+        pass
+    _, parametros = ajustar_amostras(metodo)
+    if f"{tema}|{tipo}" not in parametros:
+        raise ValueError(f"Sem amostra rotulada com prob_* para {tema} ({tipo})")
+    return parametros[f"{tema}|{tipo}"]
+
+
+# ==================== APLICAÇÃO EM LOTE ====================
+def calibrar_arquivo(entrada, saida, parametros, sep=";", linhas_por_bloco=100_000):
+    """Aplica a recalibração em blocos a um CSV com prob_* e grava as colunas prob_cal_*
+
+    Retorna um DataFrame por classe com a contagem pelo argmax e a contagem
+    esperada (soma das probabilidades calibradas) do arquivo inteiro.
+    """
+    n = len(CLASSES)
+    argmax, esperada = np.zeros(n, dtype=np.int64), np.zeros(n)
+    temporario = saida + ".tmp"
+    primeiro = True
+    for bloco in pd.read_csv(entrada, sep=sep, chunksize=linhas_por_bloco):
+        bloco.columns = bloco.columns.str.strip()
+        faltando = [c for c in COLUNAS_PROBABILIDADE if c not in bloco.columns]
+        if faltando:
+            raise ValueError(f"{entrada}: colunas ausentes: {', '.join(faltando)}")
+
+        probs = bloco[COLUNAS_PROBABILIDADE].to_numpy(dtype=float)
+        validos = np.isfinite(probs).all(axis=1)
+        calibradas = np.full_like(probs, np.nan)
+        calibradas[validos] = aplicar(probs[validos], parametros)
+        for i, coluna in enumerate(COLUNAS_CALIBRADAS):
+            bloco[coluna] = calibradas[:, i]
+
+        argmax += np.bincount(calibradas[validos].argmax(axis=1), minlength=n)
+        esperada += calibradas[validos].sum(axis=0)
+        bloco.to_csv(temporario, sep=sep, index=False, mode="w" if primeiro else "a", header=primeiro)
+        primeiro = False
+
+    if primeiro:
+        raise ValueError(f"{entrada}: arquivo vazio")
+    os.replace(temporario, saida)
+    return pd.DataFrame({"Classe": CLASSES, "Argmax": argmax, "Esperada": esperada})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibração das probabilidades do modelo de sentimento")
+    parser.add_argument("--metodo", choices=METODOS, default="temperatura")
+    parser.add_argument("--faixas", type=int, default=FAIXAS, help="faixas do diagrama de confiabilidade e do ECE")
+    parser.add_argument("--aplicar", nargs=2, metavar=("ENTRADA", "SAIDA"),
+                        help="CSV com prob_* (ex.: saída do inferencia.py) e CSV de saída com prob_cal_*")
+    parser.add_argument("--tema", choices=list(ARQUIVOS_DATASET), help="amostra cujo ajuste é aplicado")
+    parser.add_argument("--tipo", choices=list(TIPOS_TEXTO.values()), default="Comentários")
+    parser.add_argument("--sep", default=";", help="separador do CSV de entrada e de saída")
+    args = parser.parse_args()
+
+    if args.aplicar:
+        if args.tema is None:
+            parser.error("--aplicar exige --tema")
+        parametros = carregar_parametros(args.tema, args.tipo, args.metodo)
+        contagens = calibrar_arquivo(*args.aplicar, parametros, sep=args.sep)
+        print(f"{args.aplicar[1]}: {', '.join(COLUNAS_CALIBRADAS)} ({args.metodo})")
+        print(contagens.round(1).to_string(index=False))
+        return
+
+    resumo, _ = ajustar_amostras(args.metodo, args.faixas)
+    print(resumo.round(4).to_string(index=False))
+    print(f"\nParâmetros gravados em {ARQUIVO_CALIBRACAO} (ECE/Brier calibrados: validação cruzada em {DOBRAS} dobras)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Relação postagem ↔ comentários pelo 'id Post' e agregados por conversa.
+
+O índice ordena os comentários pela postagem a que pertencem e guarda, para
+cada postagem, a faixa [inicio, fim) desses comentários. Os agregados por
+conversa saem de bincounts sobre o código da postagem, sem laços por post;
+como são somas, os comentários podem chegar em blocos (modo streaming).
+"""
+import numpy as np
+import pandas as pd
+
+from ingestao import CLASSES, COLUNA_DATA, carregar_tabela, esquema, ler_em_blocos, usar_streaming
+from agregacao import codigos_sentimento, fatia_periodo
+
+# Colunas das postagens usadas nos agregados (o texto só é lido para exibição)
+COLUNAS_POSTAGEM = ["id Post", "Classe Sentimento", "Upvotes", COLUNA_DATA]
+
+# Peso de cada classe na polaridade: NEG=-1, NEU=0, POS=+1
+ESCORES_POLARIDADE = np.array([-1.0, 0.0, 1.0])
+
+
+# ==================== ÍNDICE ====================
+def _codigos_postagem(ids_posts, ids_comentarios):
+    """Posição (em ids_posts) da postagem de cada comentário; -1 se órfão"""
+    indice = pd.Index(ids_posts.astype(str))
+    if isinstance(ids_comentarios.dtype, pd.CategoricalDtype):
+        # Junção pelas categorias: uma busca por id distinto, não por linha
+        por_categoria = indice.get_indexer(ids_comentarios.cat.categories.astype(str))
+        codigos = ids_comentarios.cat.codes.to_numpy()
+        return np.where(codigos >= 0, por_categoria[codigos], -1)
+    return indice.get_indexer(ids_comentarios.astype(str))
+
+
+def indice_conversas(posts, comentarios, coluna="id Post"):
+    """Índice ordenado de 'id Post' para as faixas de comentários de cada postagem
+
+    Retorna um dict com:
+      postagem: posição da postagem de cada comentário (-1 = órfão)
+      ordem: permutação que agrupa os comentários por postagem
+      inicios/fins: faixa de `ordem` com os comentários da postagem i
+    Os comentários da postagem i são comentarios.iloc[ordem[inicios[i]:fins[i]]].
+    """
+    if posts[coluna].duplicated().any():
+        posts = posts.drop_duplicates(coluna)
+    postagem = _codigos_postagem(posts[coluna], comentarios[coluna])
+
+    ordem = np.argsort(postagem, kind="stable")
+    ordenados = postagem[ordem]
+    alvos = np.arange(len(posts))
+    return {
+        "ids": posts[coluna].astype(str).to_numpy(),
+        "postagem": postagem,
+        "ordem": ordem,
+        "inicios": np.searchsorted(ordenados, alvos, side="left"),
+        "fins": np.searchsorted(ordenados, alvos, side="right"),
+    }
+
+
+def comentarios_da_postagem(indice, comentarios, id_post):
+    """Comentários de uma postagem, pela faixa do índice (sem varrer a tabela)"""
+    posicao = np.flatnonzero(indice["ids"] == str(id_post))
+    if not len(posicao):
+        return comentarios.iloc[:0]
+    i = posicao[0]
+    return comentarios.iloc[indice["ordem"][indice["inicios"][i]:indice["fins"][i]]]
+
+
+# ==================== AGREGADOS POR CONVERSA ====================
+def _blocos(arquivo):
+    """O arquivo completo inteiro, ou em blocos no modo streaming"""
+    if usar_streaming(arquivo):
+        yield from ler_em_blocos(arquivo)
+    else:
+        yield carregar_tabela(arquivo, "completo")
+
+
+def ler_postagens(arquivo):
+    """Só as colunas de COLUNAS_POSTAGEM do arquivo de postagens, sem ids repetidos"""
+    partes = [bloco[[c for c in COLUNAS_POSTAGEM if c in bloco.columns]] for bloco in _blocos(arquivo)]
+    posts = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+    if "id Post" not in posts.columns:
+        return posts
+    return posts.drop_duplicates("id Post", ignore_index=True)
+
+
+def textos_postagens(arquivo, ids, coluna="Contexto"):
+    """Texto das postagens de `ids` (Series indexada pelo id), lido bloco a bloco"""
+    ids = pd.Index(pd.Series(ids, dtype=object).astype(str))
+    partes = []
+    for bloco in _blocos(arquivo):
+        if coluna not in bloco.columns or "id Post" not in bloco.columns:
+            return None
+        encontrados = bloco["id Post"].astype(str).isin(ids).to_numpy()
+        partes.append(pd.Series(bloco[coluna].to_numpy()[encontrados],
+                                index=bloco["id Post"].astype(str).to_numpy()[encontrados]))
+    textos = pd.concat(partes)
+    return textos[~textos.index.duplicated()].reindex(ids)
+
+
+def somar_conversas(posts, blocos_comentarios, coluna="Classe Sentimento", indice=None):
+    """Somas por postagem dos comentários de todos os blocos
+
+    posts: postagens sem ids repetidos. Retorna um dict com, por postagem,
+    ids, classe_post, upvotes_post, contagens (n_posts, 3), soma_pesos e
+    ponderada (polaridade × peso), além de orfaos e comentarios (totais).
+    `indice` (de indice_conversas) dispensa a junção quando há um só bloco.
+    """
+    n_posts, n = len(posts), len(CLASSES)
+    somas = {
+        "ids": posts["id Post"].astype(str).to_numpy(),
+        "classe_post": codigos_sentimento(posts[coluna]) if coluna in posts.columns else np.full(n_posts, -1),
+        "upvotes_post": posts["Upvotes"].to_numpy() if "Upvotes" in posts.columns else np.zeros(n_posts),
+        "contagens": np.zeros((n_posts, n), dtype=np.int64),
+        "soma_pesos": np.zeros(n_posts),
+        "ponderada": np.zeros(n_posts),
+        "orfaos": 0,
+        "comentarios": 0,
+    }
+    for comentarios in blocos_comentarios:
+        postagem = indice["postagem"] if indice is not None else _codigos_postagem(posts["id Post"], comentarios["id Post"])
+        classe = codigos_sentimento(comentarios[coluna]).astype(np.int64)
+        validos = (postagem >= 0) & (classe >= 0)
+
+        # Upvotes podem ser 0 ou negativos: todo comentário pesa pelo menos 1
+        if "Upvotes" in comentarios.columns:
+            pesos = np.maximum(comentarios["Upvotes"].to_numpy()[validos].astype(float), 0) + 1
+        else:
+            pesos = np.ones(int(validos.sum()))
+        escores = ESCORES_POLARIDADE[classe[validos]]
+        somas["contagens"] += np.bincount(postagem[validos] * n + classe[validos],
+                                          minlength=n_posts * n).reshape(n_posts, n)
+        somas["soma_pesos"] += np.bincount(postagem[validos], weights=pesos, minlength=n_posts)
+        somas["ponderada"] += np.bincount(postagem[validos], weights=pesos * escores, minlength=n_posts)
+        somas["orfaos"] += int((postagem < 0).sum())
+        somas["comentarios"] += len(comentarios)
+    return somas
+
+
+def somar_arquivos(arquivo_posts, arquivo_comentarios, coluna="Classe Sentimento"):
+    """somar_conversas sobre os arquivos completos, com os comentários lidos em blocos
+
+    Só as colunas de COLUNAS_POSTAGEM e as somas por postagem ficam em memória.
+    Inclui o índice temporal das postagens: datas (ordenadas) e ordem (posição
+    de cada data nas somas), para recortar um período com fatia_periodo.
+    None quando algum dos arquivos não tem 'id Post' no esquema.
+    """
+    if not all("id Post" in esquema(a)["colunas"] for a in (arquivo_posts, arquivo_comentarios)):
+        return None
+    posts = ler_postagens(arquivo_posts)
+    if posts.empty:
+        return None
+    somas = somar_conversas(posts, _blocos(arquivo_comentarios), coluna)
+    if COLUNA_DATA in posts.columns:
+        somas["ordem"] = np.argsort(posts[COLUNA_DATA].to_numpy(), kind="stable")
+        somas["datas"] = posts[COLUNA_DATA].to_numpy()[somas["ordem"]]
+    return somas
+
+
+def linhas_periodo(somas, inicio=None, fim=None):
+    """Posições (na ordem das somas) das postagens publicadas entre inicio e fim"""
+    if "datas" not in somas:
+        return np.arange(len(somas["ids"]))
+    return np.sort(somas["ordem"][fatia_periodo(somas["datas"], inicio, fim)])
+
+
+def tabela_conversas(somas, linhas=slice(None)):
+    """Distribuição de sentimento dos comentários das postagens em `linhas`
+
+    Retorna um DataFrame com uma linha por postagem com comentários: classe da
+    postagem, quantidade e proporção de NEG/NEU/POS nos comentários,
+    concordância (fração dos comentários com a mesma classe da postagem),
+    polaridade média (-1 a 1) e polaridade ponderada pelos upvotes.
+    """
+    contagens = somas["contagens"][linhas]
+    classe_post = somas["classe_post"][linhas]
+    total = contagens.sum(axis=1)
+
+    com_classe = classe_post >= 0
+    mesma_classe = np.zeros(len(contagens))
+    mesma_classe[com_classe] = contagens[np.flatnonzero(com_classe), classe_post[com_classe]]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        resultado = pd.DataFrame({
+            "id Post": somas["ids"][linhas],
+            "Classe Postagem": pd.Categorical.from_codes(np.where(com_classe, classe_post, -1), categories=CLASSES),
+            "Upvotes Postagem": somas["upvotes_post"][linhas],
+            "Comentarios": total,
+            **{c: contagens[:, i] for i, c in enumerate(CLASSES)},
+            **{f"% {c}": contagens[:, i] / total for i, c in enumerate(CLASSES)},
+            "Concordancia": np.where(com_classe, mesma_classe / total, np.nan),
+            "Polaridade": (contagens @ ESCORES_POLARIDADE) / total,
+            "Polaridade Ponderada": somas["ponderada"][linhas] / somas["soma_pesos"][linhas],
+        })
+    return resultado[total > 0].reset_index(drop=True)
+
+
+def concordancia_conversas(somas, linhas=slice(None)):
+    """Matriz 3×3: classe da postagem (linhas) × classe dos seus comentários (colunas)"""
+    n = len(CLASSES)
+    contagens = somas["contagens"][linhas]
+    classe_post = somas["classe_post"][linhas].astype(np.int64)
+    com_classe = classe_post >= 0
+    matriz = np.zeros((n, n), dtype=np.int64)
+    np.add.at(matriz, classe_post[com_classe], contagens[com_classe])
+    return matriz
+
+
+def agregar_conversas(posts, comentarios, indice=None, coluna="Classe Sentimento"):
+    """Agregados por conversa (ver tabela_conversas) de um único bloco de comentários"""
+    posts = posts.drop_duplicates("id Post")
+    return tabela_conversas(somar_conversas(posts, [comentarios], coluna, indice))
+
+
+def matriz_concordancia(posts, comentarios, indice=None, coluna="Classe Sentimento"):
+    """Matriz 3×3: classe da postagem (linhas) × classe dos seus comentários (colunas)"""
+    posts = posts.drop_duplicates("id Post")
+    return concordancia_conversas(somar_conversas(posts, [comentarios], coluna, indice))
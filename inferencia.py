@@ -0,0 +1,260 @@
+"""Inferência de sentimento em lote para novos CSVs de postagens/comentários.
+
+Gera as colunas 'Classe Sentimento' e prob_NEG/prob_NEU/prob_POS no mesmo
+formato que ingestao.py espera. O arquivo é lido em blocos (com o parser e a
+quarentena de ingestao.py) e cada bloco é uma parte processada por um pool de
+processos; dentro de cada parte, os textos são ordenados por tamanho e
+agrupados em lotes dinâmicos. Cada parte concluída é gravada em disco, então
+uma execução interrompida continua de onde parou.
+
+Uso:
+    python inferencia.py data/novo.csv data/novo_sentimento.csv
+    python inferencia.py entrada.csv saida.csv --modelo lexico --processos 4
+"""
+import os
+import re
+import json
+import argparse
+import unicodedata
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from ingestao import (
+    CLASSES, COLUNAS_PROBABILIDADE, PASTA_QUARENTENA, hash_arquivo, ler_blocos_avulsos, resumo_quarentena
+)
+
+COLUNAS_TEXTO = ["Comentario", "Contexto", "contexto"]
+
+
+# ==================== MODELOS ====================
+class ModeloPysentimiento:
+    """BERTweet.br via pysentimiento, em CPU (o modelo usado nos dados do projeto)"""
+
+    def __init__(self):
+        import torch
+        from pysentimiento import create_analyzer
+
+        # Um processo por núcleo: cada um usa uma única thread
+        torch.set_num_threads(1)
+        self.analisador = create_analyzer(task="sentiment", lang="pt")
+
+    def prever(self, textos):
+        saidas = self.analisador.predict(list(textos))
+        return np.array([[s.probas.get(c, 0.0) for c in CLASSES] for s in saidas], dtype=np.float32)
+
+
+class ModeloLexico:
+    """Modelo léxico leve, sem dependências, para testes e máquinas sem torch"""
+
+    POSITIVAS = {
+        "bom", "boa", "otimo", "otima", "excelente", "parabens", "obrigado", "obrigada",
+        "feliz", "melhor", "apoio", "aprovado", "sucesso", "gostei", "certo", "justo",
+        "importante", "avanco", "ajuda", "funciona", "maravilhoso", "confianca"
+    }
+    NEGATIVAS = {
+        "ruim", "pessimo", "pessima", "horrivel", "vergonha", "absurdo", "lixo", "pior",
+        "corrupto", "corrupcao", "mentira", "golpe", "culpa", "crime", "fraude", "odio",
+        "errado", "injusto", "atraso", "descaso", "roubo", "ridiculo", "medo", "triste"
+    }
+    PALAVRA = re.compile(r"\w+")
+
+    def prever(self, textos):
+        probs = np.empty((len(textos), len(CLASSES)), dtype=np.float32)
+        for i, texto in enumerate(textos):
+            normalizado = unicodedata.normalize("NFKD", str(texto).lower())
+            palavras = self.PALAVRA.findall(normalizado.encode("ascii", "ignore").decode())
+            neg = sum(p in self.NEGATIVAS for p in palavras)
+            pos = sum(p in self.POSITIVAS for p in palavras)
+            logits = np.array([1.5 * neg, 1.0, 1.5 * pos])
+            exp = np.exp(logits - logits.max())
+            probs[i] = exp / exp.sum()
+        return probs
+
+
+MODELOS = {
+    "pysentimiento": ModeloPysentimiento,
+    "lexico": ModeloLexico
+}
+
+
+# ==================== LOTES DINÂMICOS ====================
+def lotes_dinamicos(textos, max_lote=64, orcamento=16384):
+    """Índices dos textos agrupados em lotes de tamanho semelhante
+
+    Ordena por comprimento e fecha cada lote quando `max_lote` textos ou
+    `orcamento` caracteres (tamanho do maior × quantidade) seriam excedidos,
+    o que reduz o padding desperdiçado pelo modelo.
+    """
+    comprimentos = np.fromiter((len(str(t)) for t in textos), dtype=np.int64, count=len(textos))
+    ordem = np.argsort(comprimentos, kind="mergesort")
+
+    lote = []
+    for idx in ordem:
+        maior = comprimentos[idx]  # ordem crescente: o atual é o maior do lote
+        if lote and (len(lote) >= max_lote or maior * (len(lote) + 1) > orcamento):
+            yield lote
+            lote = []
+        lote.append(idx)
+    if lote:
+        yield lote
+
+
+# ==================== PROCESSAMENTO EM PARTES ====================
+_modelo = None
+
+
+def _iniciar_processo(nome_modelo):
+    global _modelo
+    _modelo = MODELOS[nome_modelo]()
+
+
+def _processar_parte(caminho_parte, textos, max_lote):
+    """Executado no processo filho: classifica uma parte e grava o checkpoint"""
+    probs = np.zeros((len(textos), len(CLASSES)), dtype=np.float32)
+    for lote in lotes_dinamicos(textos, max_lote):
+        probs[lote] = _modelo.prever([textos[i] for i in lote])
+
+    temporario = caminho_parte + ".tmp"
+    with open(temporario, "wb") as f:
+        np.save(f, probs)
+    os.replace(temporario, caminho_parte)
+    return caminho_parte
+
+
+def encontrar_coluna_texto(df):
+    """Primeira coluna de texto conhecida (Comentario, Contexto ou contexto)"""
+    for col in COLUNAS_TEXTO:
+        if col in df.columns:
+            return col
+    return None
+
+
+def classificar_arquivo(entrada, saida, modelo="pysentimiento", coluna_texto=None, sep=";",
+                        processos=None, linhas_por_parte=5000, max_lote=64, ao_concluir=None):
+    """Classifica todas as linhas de `entrada` e grava `saida` com as colunas do dashboard
+
+    A entrada é lida duas vezes em blocos de `linhas_por_parte` linhas, sem
+    ficar inteira em memória: na primeira, cada bloco sem checkpoint vai para
+    o pool; na segunda, os blocos são gravados com as probabilidades da sua
+    parte. Linhas malformadas vão para a quarentena de ingestao.py, com o nome
+    do arquivo + '.inferencia'. ao_concluir(feitas, lidas) é chamado a cada
+    parte concluída (inclusive as recuperadas de um checkpoint anterior).
+    Retorna (DataFrame com as linhas de cada classe, resumo da leitura: engine,
+    linhas e rejeitadas).
+    """
+    nome_quarentena = os.path.basename(entrada) + ".inferencia"
+
+    def blocos():
+        return ler_blocos_avulsos(entrada, sep, linhas_por_parte, nome_quarentena)
+
+    # Checkpoints valem só para a mesma entrada, modelo, coluna e particionamento
+    pasta = saida + ".partes"
+    os.makedirs(pasta, exist_ok=True)
+    meta = {"entrada": hash_arquivo(entrada), "modelo": modelo, "coluna": coluna_texto,
+            "linhas_por_parte": linhas_por_parte}
+    caminho_meta = os.path.join(pasta, "meta.json")
+    if os.path.isfile(caminho_meta):
+        with open(caminho_meta, encoding="utf-8") as f:
+            if json.load(f) != meta:
+                for nome in os.listdir(pasta):
+                    os.remove(os.path.join(pasta, nome))
+    with open(caminho_meta, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    def caminho_parte(i):
+        return os.path.join(pasta, f"parte_{i:05d}.npy")
+
+    # Primeira leitura: uma parte por bloco, com no máximo 2 partes por processo na fila
+    processos = processos or os.cpu_count() or 1
+    pool, em_andamento, feitas, lidas = None, set(), 0, 0
+
+    def concluir(futuros):
+        nonlocal feitas
+        for futuro in futuros:
+            futuro.result()
+            feitas += 1
+            if ao_concluir:
+                ao_concluir(feitas, lidas)
+
+    try:
+        for i, bloco in enumerate(blocos()):
+            bloco.columns = bloco.columns.str.strip()
+            coluna = coluna_texto or encontrar_coluna_texto(bloco)
+            if coluna is None or coluna not in bloco.columns:
+                raise ValueError(f"Coluna de texto não encontrada em {entrada}; use --coluna-texto")
+            lidas += 1
+            if os.path.isfile(caminho_parte(i)):
+                feitas += 1
+                if ao_concluir:
+                    ao_concluir(feitas, lidas)
+                continue
+
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn"),
+                                           initializer=_iniciar_processo, initargs=(modelo,))
+            if len(em_andamento) >= 2 * processos:
+                prontos, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+                concluir(prontos)
+            textos = bloco[coluna].fillna("").astype(str).tolist()
+            em_andamento.add(pool.submit(_processar_parte, caminho_parte(i), textos, max_lote))
+        concluir(wait(em_andamento).done)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    # Segunda leitura: cada bloco recebe as probabilidades da sua parte
+    contagem = np.zeros(len(CLASSES), dtype=np.int64)
+    temporario = saida + ".tmp"
+    for i, bloco in enumerate(blocos()):
+        bloco.columns = bloco.columns.str.strip()
+        probs = np.load(caminho_parte(i))
+        if len(probs) != len(bloco):
+            raise ValueError(f"{entrada}: a parte {i} tem {len(probs)} linhas e o bloco {len(bloco)}")
+        for j, col in enumerate(COLUNAS_PROBABILIDADE):
+            bloco[col] = probs[:, j]
+        codigos = probs.argmax(axis=1)
+        bloco["Classe Sentimento"] = np.asarray(CLASSES)[codigos]
+        contagem += np.bincount(codigos, minlength=len(CLASSES))
+        bloco.to_csv(temporario, sep=sep, index=False, mode="w" if i == 0 else "a", header=i == 0)
+
+    if not lidas:
+        raise ValueError(f"{entrada}: arquivo vazio")
+    os.replace(temporario, saida)
+
+    for i in range(lidas):
+        os.remove(caminho_parte(i))
+    os.remove(caminho_meta)
+    os.rmdir(pasta)
+
+    leitura = resumo_quarentena(nome_quarentena)
+    return pd.DataFrame({"Classe": CLASSES, "Linhas": contagem}), leitura
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inferência de sentimento em lote para CSVs do Reddit")
+    parser.add_argument("entrada", help="CSV bruto de postagens ou comentários")
+    parser.add_argument("saida", help="CSV de saída com Classe Sentimento e prob_*")
+    parser.add_argument("--modelo", choices=sorted(MODELOS), default="pysentimiento")
+    parser.add_argument("--coluna-texto", default=None, help="padrão: Comentario, Contexto ou contexto")
+    parser.add_argument("--sep", default=";", help="separador do CSV de entrada e de saída")
+    parser.add_argument("--processos", type=int, default=None, help="padrão: todos os núcleos")
+    parser.add_argument("--linhas-por-parte", type=int, default=5000)
+    parser.add_argument("--max-lote", type=int, default=64)
+    args = parser.parse_args()
+
+    def progresso(feitas, lidas):
+        print(f"{feitas}/{lidas} partes concluídas (lidas até agora)", flush=True)
+
+    contagem, leitura = classificar_arquivo(args.entrada, args.saida, args.modelo, args.coluna_texto, args.sep,
+                                            args.processos, args.linhas_por_parte, args.max_lote, progresso)
+    print(contagem.to_string(index=False))
+    if leitura.get("rejeitadas"):
+        print(f"{leitura['rejeitadas']} linha(s) malformada(s) não classificada(s): "
+              f"{os.path.join(PASTA_QUARENTENA, os.path.basename(args.entrada) + '.inferencia.jsonl')}")
+
+
+if __name__ == "__main__":
+    main()
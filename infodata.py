@@ -1,55 +1,283 @@
-import pandas as pd 
-DATA_PATH = "data/"
-
-amostracompletaSTFPosts = pd.read_csv(DATA_PATH + "amostracompletaSTFPosts.csv", sep=";")
-amostracompletaSTFComentarios = pd.read_csv(DATA_PATH + "amostraCompletaSTFComentarios.csv", sep=";")
-
-amostraCompletaABPosts = pd.read_csv(DATA_PATH + "amostraCompletaABPosts.csv", sep=";")
-amostraCompletaABComentarios = pd.read_csv(DATA_PATH + "amostraCompletaABComentarios.csv", sep=";")
-
-amostraCompletoVSPosts1 = pd.read_csv(DATA_PATH + "amostraCompletoVSPosts1.csv", sep=";")
-amostraCompletoVSComentarios1 = pd.read_csv(DATA_PATH + "amostraCompletoVSComentarios1.csv", sep=";")
-
-datasets = {
-    "amostra_completaSTFPosts": amostracompletaSTFPosts,
-    "amostra_completaSTFComentarios": amostracompletaSTFComentarios,
-    "amostraCompletaABPosts": amostraCompletaABPosts,
-    "amostraCompletaABComentarios": amostraCompletaABComentarios,
-    "amostraVSCompletoPosts": amostraCompletoVSPosts1,
-    "amostraVSCompletoComentarios": amostraCompletoVSComentarios1
-}
-
-# Padronização
-for name, df in datasets.items():
-    for col in ['Classe Sentimento', 'rotulo']:
-        if col in df.columns:
-
-            df[col] = (
-                df[col]
-                .fillna('NEU')
-                .astype(str)
-                .replace({
-                    'neu': 'NEU',
-                    'NEY': 'NEU',
-                    'UNKNOWN': 'NEU',
-                    'MEI': 'NEU',
-                    'NaN': 'NEU',
-                    'BEG': 'NEG',
-                    'BEY': 'NEU'
-                })
-            )
-
-    print(f"Standardization complete for {name}.")
-
-# Contagem dos rótulos — substituir o que estava errado
-for name, df in datasets.items():
-    print(f"\n{name} – contagem dos rótulos:")
-    if "rotulo" in df.columns:
-        print(df["rotulo"].value_counts())
-
-
-# Colunas de cada amostra 
-
-for nome, df in datasets.items():
-    print(f"\nColunas em {nome}:")
-    print(df.columns.tolist())
\ No newline at end of file
+"""Perfil dos arquivos de ARQUIVOS_DATASET: linhas, rótulos, nulos, datas e textos.
+
+Cada arquivo é lido uma única vez, em blocos (ingestao.ler_em_blocos), em um
+processo próprio do pool; as estatísticas de cada bloco são somadas às do
+arquivo. O perfil de cada arquivo fica em data/.cache/perfil, validado pelo
+mtime e pelo hash do CSV, então só os arquivos novos ou alterados são relidos.
+
+Uso:
+    python infodata.py                               # perfil.json e perfil.html
+    python infodata.py --processos 4 --html relatorio.html
+    python infodata.py --recalcular                  # ignora os perfis em cache
+"""
+import os
+import json
+import html
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from ingestao import (
+    CACHE_PATH, COLUNA_DATA, DATA_PATH, LINHAS_POR_BLOCO,
+    esquema, hash_arquivo, ler_em_blocos, resumo_quarentena, todos_arquivos
+)
+
+PASTA_PERFIL = os.path.join(CACHE_PATH, "perfil")
+
+# Incrementar sempre que as estatísticas mudarem, para invalidar os perfis antigos
+VERSAO_PERFIL = 1
+
+# Limites (em caracteres) das faixas do histograma de tamanho dos textos
+FAIXAS_TEXTO = [0, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, np.inf]
+COLUNAS_ROTULO = ["Classe Sentimento", "rotulo"]
+TOP_SUBREDDITS = 10
+
+
+# ==================== ESTATÍSTICAS POR BLOCO ====================
+def _perfil_vazio(colunas):
+    return {
+        "linhas": 0,
+        "colunas": colunas,
+        "nulos": {col: 0 for col in colunas},
+        "rotulos": {},
+        "datas": {"inicio": None, "fim": None, "invalidas": 0},
+        "texto": {"coluna": None, "histograma": [0] * (len(FAIXAS_TEXTO) - 1), "soma": 0, "maximo": 0},
+        "subreddits": {}
+    }
+
+
+def _somar_contagens(destino, serie):
+    for valor, quantidade in serie.items():
+        chave = "(ausente)" if pd.isna(valor) else str(valor)
+        destino[chave] = destino.get(chave, 0) + int(quantidade)
+
+
+def acumular_bloco(perfil, bloco, coluna_texto):
+    """Soma as estatísticas de um bloco normalizado ao perfil do arquivo"""
+    perfil["linhas"] += len(bloco)
+    for col, nulos in bloco.isna().sum().items():
+        perfil["nulos"][col] = perfil["nulos"].get(col, 0) + int(nulos)
+
+    # Rótulos: categorias extras e ausentes aparecem com o próprio nome
+    for col in COLUNAS_ROTULO:
+        if col in bloco.columns:
+            _somar_contagens(perfil["rotulos"].setdefault(col, {}),
+                             bloco[col].value_counts(dropna=False, sort=False))
+
+    if COLUNA_DATA in bloco.columns:
+        datas = bloco[COLUNA_DATA]
+        perfil["datas"]["invalidas"] += int(datas.isna().sum())
+        if datas.notna().any():
+            inicio, fim = datas.min(), datas.max()
+            atual = perfil["datas"]
+            atual["inicio"] = min(filter(None, [atual["inicio"], inicio.isoformat()]))
+            atual["fim"] = max(filter(None, [atual["fim"], fim.isoformat()]))
+
+    if coluna_texto in bloco.columns:
+        tamanhos = bloco[coluna_texto].dropna().astype(str).str.len().to_numpy()
+        contagem, _ = np.histogram(tamanhos, bins=FAIXAS_TEXTO)
+        texto = perfil["texto"]
+        texto["coluna"] = coluna_texto
+        texto["histograma"] = [a + int(b) for a, b in zip(texto["histograma"], contagem)]
+        texto["soma"] += int(tamanhos.sum())
+        texto["maximo"] = max(texto["maximo"], int(tamanhos.max()) if len(tamanhos) else 0)
+
+    if "Subreddit" in bloco.columns:
+        _somar_contagens(perfil["subreddits"], bloco["Subreddit"].value_counts(sort=False))
+
+
+def finalizar_perfil(perfil):
+    """Taxas, médias e top subreddits a partir das somas acumuladas"""
+    linhas = perfil["linhas"]
+    perfil["taxa_nulos"] = {col: (n / linhas if linhas else None) for col, n in perfil["nulos"].items()}
+    texto = perfil["texto"]
+    contados = sum(texto["histograma"])
+    texto["media"] = texto["soma"] / contados if contados else None
+    texto["faixas"] = [f"{int(a)}-{int(b) - 1}" if np.isfinite(b) else f"{int(a)}+"
+                       for a, b in zip(FAIXAS_TEXTO[:-1], FAIXAS_TEXTO[1:])]
+    mais_comuns = sorted(perfil["subreddits"].items(), key=lambda item: item[1], reverse=True)
+    perfil["subreddits"] = dict(mais_comuns[:TOP_SUBREDDITS])
+    return perfil
+
+
+# ==================== PERFIL DE UM ARQUIVO ====================
+def perfilar_arquivo(arquivo, tipo="completo", linhas=LINHAS_POR_BLOCO):
+    """Perfil de um CSV de data/ em uma única passada, em blocos de `linhas` linhas"""
+    coluna_texto = esquema(arquivo)["texto"]
+    perfil = None
+    for bloco in ler_em_blocos(arquivo, tipo, linhas, todas=True):
+        if perfil is None:
+            perfil = _perfil_vazio(list(bloco.columns))
+        acumular_bloco(perfil, bloco, coluna_texto)
+    perfil = finalizar_perfil(perfil or _perfil_vazio([]))
+
+    leitura = resumo_quarentena(arquivo)
+    perfil["rejeitadas"] = leitura.get("rejeitadas", 0)
+    perfil["engine"] = leitura.get("engine")
+    return perfil
+
+
+def _caminho_perfil(arquivo):
+    return os.path.join(PASTA_PERFIL, f"{arquivo}.json")
+
+
+def _perfil_em_cache(arquivo):
+    """Perfil gravado se corresponder ao CSV atual (mtime/tamanho ou, se tocado, hash)"""
+    try:
+        with open(_caminho_perfil(arquivo), encoding="utf-8") as f:
+            registro = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if registro.get("versao") != VERSAO_PERFIL:
+        return None
+
+    stat = os.stat(os.path.join(DATA_PATH, arquivo))
+    if registro.get("mtime_ns") == stat.st_mtime_ns and registro.get("tamanho") == stat.st_size:
+        return registro["perfil"]
+    if registro.get("sha256") == hash_arquivo(os.path.join(DATA_PATH, arquivo)):
+        registro.update(mtime_ns=stat.st_mtime_ns, tamanho=stat.st_size)
+        _gravar_registro(arquivo, registro)
+        return registro["perfil"]
+    return None
+
+
+def _gravar_registro(arquivo, registro):
+    os.makedirs(PASTA_PERFIL, exist_ok=True)
+    temporario = _caminho_perfil(arquivo) + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(registro, f, ensure_ascii=False)
+    os.replace(temporario, _caminho_perfil(arquivo))
+
+
+def _perfilar_e_gravar(arquivo, tipo, linhas):
+    # Executado no processo filho: o perfil é pequeno e volta inteiro para o pai
+    caminho = os.path.join(DATA_PATH, arquivo)
+    stat = os.stat(caminho)
+    sha = hash_arquivo(caminho)
+    perfil = perfilar_arquivo(arquivo, tipo, linhas)
+    _gravar_registro(arquivo, {"versao": VERSAO_PERFIL, "sha256": sha, "mtime_ns": stat.st_mtime_ns,
+                               "tamanho": stat.st_size, "perfil": perfil})
+    return perfil
+
+
+# ==================== TODOS OS ARQUIVOS ====================
+def perfilar_todos(processos=None, linhas=LINHAS_POR_BLOCO, recalcular=False, ao_concluir=None):
+    """Perfil de cada arquivo de ARQUIVOS_DATASET, em paralelo
+
+    Retorna {arquivo: perfil}, com tema e tipo em cada perfil.
+    ao_concluir(arquivo, perfil, do_cache) é chamado a cada arquivo pronto.
+    """
+    arquivos = todos_arquivos()
+    perfis, pendentes = {}, []
+    for tema, arquivo, tipo in arquivos:
+        perfil = None if recalcular else _perfil_em_cache(arquivo)
+        if perfil is None:
+            pendentes.append((tema, arquivo, tipo))
+            continue
+        perfis[arquivo] = {"tema": tema, "tipo": tipo, **perfil}
+        if ao_concluir:
+            ao_concluir(arquivo, perfis[arquivo], True)
+
+    def registrar(tema, arquivo, tipo, perfil):
+        perfis[arquivo] = {"tema": tema, "tipo": tipo, **perfil}
+        if ao_concluir:
+            ao_concluir(arquivo, perfis[arquivo], False)
+
+    if pendentes:
+        # spawn, como em ingestao.preparar_caches
+        contexto = multiprocessing.get_context("spawn")
+        processos = processos or min(len(pendentes), os.cpu_count() or 1)
+        try:
+            with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as pool:
+                futuros = {pool.submit(_perfilar_e_gravar, arquivo, tipo, linhas): (tema, arquivo, tipo)
+                           for tema, arquivo, tipo in pendentes}
+                for futuro in as_completed(futuros):
+                    perfil = futuro.result()
+                    pendentes.remove(futuros[futuro])
+                    registrar(*futuros[futuro], perfil)
+        except (BrokenProcessPool, OSError):
+            # Ambiente sem suporte a subprocessos: perfila o restante aqui mesmo
+            for tema, arquivo, tipo in list(pendentes):
+                registrar(tema, arquivo, tipo, _perfilar_e_gravar(arquivo, tipo, linhas))
+
+    # Ordem de ARQUIVOS_DATASET, independente da ordem de conclusão
+    return {arquivo: perfis[arquivo] for _, arquivo, _ in arquivos}
+
+
+# ==================== RELATÓRIOS ====================
+def tabela_resumo(perfis):
+    """Uma linha por arquivo: tema, tipo, linhas, rejeitadas, período e texto médio"""
+    return pd.DataFrame([{
+        "Tema": perfil["tema"],
+        "Arquivo": arquivo,
+        "Tipo": perfil["tipo"],
+        "Linhas": perfil["linhas"],
+        "Rejeitadas": perfil["rejeitadas"],
+        "Início": (perfil["datas"]["inicio"] or "")[:10],
+        "Fim": (perfil["datas"]["fim"] or "")[:10],
+        "Texto médio": round(perfil["texto"]["media"], 1) if perfil["texto"]["media"] else None,
+        "Engine": perfil["engine"]
+    } for arquivo, perfil in perfis.items()])
+
+
+def gerar_html(perfis):
+    """Relatório HTML autocontido: resumo geral e, por arquivo, rótulos, nulos, textos e subreddits"""
+    secoes = [
+        "<h1>Perfil dos dados</h1>",
+        tabela_resumo(perfis).to_html(index=False, border=0, na_rep="")
+    ]
+    for arquivo, perfil in perfis.items():
+        secoes.append(f"<h2>{html.escape(perfil['tema'])} — {html.escape(arquivo)}</h2>")
+        for col, contagens in perfil["rotulos"].items():
+            rotulos = pd.Series(contagens, name="Linhas").rename_axis(col).reset_index()
+            secoes.append(f"<h3>Rótulos: {html.escape(col)}</h3>" + rotulos.to_html(index=False, border=0))
+        nulos = pd.DataFrame({"Coluna": list(perfil["nulos"]), "Nulos": list(perfil["nulos"].values()),
+                              "Taxa": [f"{t:.1%}" if t is not None else "" for t in perfil["taxa_nulos"].values()]})
+        secoes.append("<h3>Nulos por coluna</h3>" + nulos.to_html(index=False, border=0))
+        texto = perfil["texto"]
+        if texto["coluna"]:
+            histograma = pd.DataFrame({"Caracteres": texto["faixas"], "Textos": texto["histograma"]})
+            secoes.append(f"<h3>Tamanho de '{html.escape(texto['coluna'])}'</h3>"
+                          + histograma.to_html(index=False, border=0))
+        if perfil["subreddits"]:
+            subreddits = pd.Series(perfil["subreddits"], name="Linhas").rename_axis("Subreddit").reset_index()
+            secoes.append("<h3>Subreddits mais frequentes</h3>" + subreddits.to_html(index=False, border=0))
+
+    estilo = ("body{font-family:sans-serif;margin:2rem;color:#222}table{border-collapse:collapse;margin-bottom:1rem}"
+              "th,td{padding:.25rem .75rem;border-bottom:1px solid #ddd;text-align:left}h2{margin-top:2.5rem}")
+    return (f"<!DOCTYPE html><html lang=\"pt-BR\"><head><meta charset=\"utf-8\"><title>Perfil dos dados</title>"
+            f"<style>{estilo}</style></head><body>{''.join(secoes)}</body></html>")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil dos arquivos de ARQUIVOS_DATASET")
+    parser.add_argument("--json", default="perfil.json", help="arquivo JSON de saída")
+    parser.add_argument("--html", default="perfil.html", help="arquivo HTML de saída")
+    parser.add_argument("--processos", type=int, default=None, help="processos do pool (padrão: CPUs)")
+    parser.add_argument("--linhas-por-bloco", type=int, default=LINHAS_POR_BLOCO)
+    parser.add_argument("--recalcular", action="store_true", help="ignora os perfis em cache")
+    args = parser.parse_args()
+
+    def relatar(arquivo, perfil, do_cache):
+        situacao = "[cache] " if do_cache else "[lido]  "
+        rejeitadas = f", {perfil['rejeitadas']} rejeitadas" if perfil["rejeitadas"] else ""
+        print(f"{situacao} {arquivo}: {perfil['linhas']} linhas{rejeitadas}")
+
+    perfis = perfilar_todos(args.processos, args.linhas_por_bloco, args.recalcular, relatar)
+
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump(perfis, f, ensure_ascii=False, indent=2)
+    with open(args.html, "w", encoding="utf-8") as f:
+        f.write(gerar_html(perfis))
+
+    print()
+    print(tabela_resumo(perfis).to_string(index=False))
+    print(f"\nPerfil gravado em {args.json} e {args.html}")
+
+
+if __name__ == "__main__":
+    main()
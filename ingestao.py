@@ -0,0 +1,812 @@
+"""Ingestão dos CSVs do projeto em um cache colunar (Parquet).
+
+Cada arquivo listado em ARQUIVOS_DATASET é lido uma única vez, normalizado
+(colunas, rótulos e tipos) e gravado em data/.cache. As leituras seguintes
+vêm do Parquet, validado pelo mtime e pelo hash do CSV de origem.
+
+Separador, encoding e colunas de cada arquivo vêm do registro ESQUEMAS: a
+leitura já descarta as colunas não usadas e entrega nomes canônicos ('Data'
+como datetime64, 'Classe Sentimento' categórica, texto em 'Comentario' ou
+'Contexto'), validados na ingestão.
+
+Os CSVs são lidos pelo parser do pyarrow (aspas explícitas, textos com
+quebras de linha); linhas malformadas vão para data/.cache/quarentena com a
+contagem por arquivo. Se o pyarrow falhar em um arquivo, só esse arquivo é
+relido com o engine python do pandas.
+
+Uso: python ingestao.py
+"""
+import os
+import json
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+    PARQUET_DISPONIVEL = True
+except ImportError:
+    PARQUET_DISPONIVEL = False
+
+# ==================== CONFIGURAÇÃO ====================
+DATA_PATH = "data/"
+CACHE_PATH = os.path.join(DATA_PATH, ".cache")
+
+# Incrementar sempre que a normalização mudar, para invalidar os caches antigos
+VERSAO_CACHE = 6
+
+# Modo streaming: arquivos acima do limite são agregados em blocos, sem
+# carregar o DataFrame inteiro. SENTIMENTLAB_STREAMING=1 força, =0 desativa.
+LIMITE_STREAMING = 256 * 1024 * 1024
+LINHAS_POR_BLOCO = 100_000
+
+ARQUIVOS_DATASET = {
+    "STF": {
+        "posts": "stf_posts_sentimentoDeVerdade.csv",
+        "comentarios": "stf_comentarios_sentimento.csv",
+        "posts_amostra": "amostraCompletaSTFPosts.csv",
+        "comentarios_amostra": "amostraCompletaSTFComentarios.csv"
+    },
+    "Auxílio Brasil": {
+        "posts": "dfpostsAB.csv",
+        "comentarios": "dfcomentariosAB.csv",
+        "posts_amostra": "amostraCompletaABPosts.csv",
+        "comentarios_amostra": "amostraCompletaABComentarios.csv"
+    },
+    "Vacinação": {
+        "posts": "PostsVacinacaoSaude_final.csv",
+        "comentarios": "ComentariosVacinacaoSaude_final.csv",
+        "posts_amostra": "amostraCompletoVSPosts1.csv",
+        "comentarios_amostra": "amostraCompletoVSComentarios1.csv"
+    }
+}
+
+# Chave do arquivo completo -> rótulo usado no dashboard
+TIPOS_TEXTO = {"posts": "Postagens", "comentarios": "Comentários"}
+
+CLASSES = ["NEG", "NEU", "POS"]
+COLUNAS_SENTIMENTO = ["Classe Sentimento", "rotulo"]
+COLUNAS_PROBABILIDADE = ["prob_NEG", "prob_NEU", "prob_POS"]
+COLUNAS_CONTAGEM = ["Upvotes", "Comentarios"]
+# Colunas repetitivas que viram categóricas quando há poucos valores distintos
+COLUNAS_CATEGORICAS = ["Subreddit", "Autor", "id Post"]
+
+REPLACE_MAP = {'neu': 'NEU', 'NEY': 'NEU', 'UNKNOWN': 'NEU', 'MEI': 'NEU',
+               'NaN': 'NEU', 'BEG': 'NEG', 'BEY': 'NEU'}
+
+# ==================== ESQUEMA DAS FONTES ====================
+COLUNA_DATA = "Data"
+COLUNA_SENTIMENTO = "Classe Sentimento"
+COLUNAS_TEXTO = ["Comentario", "Contexto"]
+
+# Colunas canônicas de cada tipo de arquivo; as demais não são lidas
+COLUNAS_POSTS = ["id Post", "Autor", "Upvotes", "Comentarios", "Data", "Contexto", "Classe Sentimento"]
+COLUNAS_COMENTARIOS = ["id Post", "Comentario", "Autor", "Upvotes", "Data", "Classe Sentimento"]
+COLUNAS_AMOSTRA_POSTS = ["id Post", "Contexto", "Classe Sentimento", "rotulo"] + COLUNAS_PROBABILIDADE
+COLUNAS_AMOSTRA_COMENTARIOS = ["id Post", "Comentario", "Classe Sentimento", "rotulo"] + COLUNAS_PROBABILIDADE
+
+# sep e colunas obrigatórios; encoding (padrão utf-8) e renomear (nome no CSV -> canônico) opcionais
+ESQUEMAS = {
+    "stf_posts_sentimentoDeVerdade.csv": {"sep": ";", "encoding": "utf-8-sig", "colunas": COLUNAS_POSTS},
+    "stf_comentarios_sentimento.csv": {"sep": ",", "colunas": COLUNAS_COMENTARIOS},
+    "amostraCompletaSTFPosts.csv": {"sep": ";", "colunas": COLUNAS_AMOSTRA_POSTS,
+                                    "renomear": {"contexto": "Contexto"}},
+    "amostraCompletaSTFComentarios.csv": {"sep": ";", "colunas": COLUNAS_AMOSTRA_COMENTARIOS},
+    "dfpostsAB.csv": {"sep": ",", "colunas": COLUNAS_POSTS},
+    "dfcomentariosAB.csv": {"sep": ",", "colunas": COLUNAS_COMENTARIOS},
+    "amostraCompletaABPosts.csv": {"sep": ";", "colunas": COLUNAS_AMOSTRA_POSTS},
+    "amostraCompletaABComentarios.csv": {"sep": ";", "colunas": COLUNAS_AMOSTRA_COMENTARIOS},
+    "PostsVacinacaoSaude_final.csv": {"sep": ";", "colunas": COLUNAS_POSTS},
+    "ComentariosVacinacaoSaude_final.csv": {"sep": ";", "colunas": COLUNAS_COMENTARIOS,
+                                            "renomear": {"Classe Sentimeto": "Classe Sentimento"}},
+    "amostraCompletoVSPosts1.csv": {"sep": ";", "colunas": COLUNAS_AMOSTRA_POSTS},
+    "amostraCompletoVSComentarios1.csv": {"sep": ";", "colunas": COLUNAS_AMOSTRA_COMENTARIOS}
+}
+
+
+def tipo_do_arquivo(chave):
+    """Tipo de carga ("completo" ou "amostra") a partir da chave em ARQUIVOS_DATASET"""
+    return "amostra" if chave.endswith("_amostra") else "completo"
+
+
+def arquivos_completos():
+    """Lista (tema, tipo, arquivo) dos arquivos completos, na ordem do dashboard"""
+    return [(tema, rotulo, arquivos[chave])
+            for tema, arquivos in ARQUIVOS_DATASET.items()
+            for chave, rotulo in TIPOS_TEXTO.items()]
+
+
+def esquema(arquivo):
+    """Esquema resolvido de um arquivo de ESQUEMAS
+
+    Além de sep, encoding, colunas e renomear, traz os papéis das colunas:
+    texto ('Comentario' ou 'Contexto'), data e rotulo (None quando ausentes).
+    """
+    if arquivo not in ESQUEMAS:
+        raise ValueError(f"{arquivo}: arquivo sem esquema registrado em ESQUEMAS")
+    registro = ESQUEMAS[arquivo]
+    colunas = registro["colunas"]
+    return {
+        "sep": registro["sep"],
+        "encoding": registro.get("encoding", "utf-8"),
+        "colunas": colunas,
+        "renomear": registro.get("renomear", {}),
+        "texto": next((c for c in COLUNAS_TEXTO if c in colunas), None),
+        "data": COLUNA_DATA if COLUNA_DATA in colunas else None,
+        "rotulo": "rotulo" if "rotulo" in colunas else None
+    }
+
+
+def separador(arquivo):
+    """Separador usado em cada CSV"""
+    return ESQUEMAS[arquivo]["sep"]
+
+
+def validar_colunas(df, arquivo):
+    """Renomeia as colunas para os nomes canônicos e confere as obrigatórias"""
+    registro = esquema(arquivo)
+    df.columns = [registro["renomear"].get(c.strip(), c.strip()) for c in df.columns]
+    ausentes = [c for c in registro["colunas"] if c not in df.columns]
+    if ausentes:
+        raise ValueError(f"{arquivo}: colunas do esquema ausentes no CSV: {', '.join(ausentes)}")
+    return df
+
+
+def validar_conteudo(df, arquivo):
+    """Linhas com data não reconhecida ou rótulo fora de NEG/NEU/POS, após a normalização"""
+    registro = esquema(arquivo)
+    problemas = {}
+    if registro["data"]:
+        problemas["data inválida"] = int(df[registro["data"]].isna().sum())
+    for col in (COLUNA_SENTIMENTO, registro["rotulo"]):
+        if col:
+            problemas[f"'{col}' fora de NEG/NEU/POS"] = int((~df[col].isin(CLASSES)).sum())
+    return {chave: valor for chave, valor in problemas.items() if valor}
+
+
+# ==================== NORMALIZAÇÃO ====================
+def categorizar_sentimento(serie):
+    """Converte uma coluna de sentimento em categórica com NEG/NEU/POS primeiro"""
+    extras = sorted(set(serie.dropna().unique()) - set(CLASSES))
+    return pd.Categorical(serie, categories=CLASSES + extras)
+
+
+def normalizar(df, arquivo, tipo="completo"):
+    """Aplica a limpeza padrão do dashboard a um DataFrame lido do CSV"""
+    # Nomes canônicos do esquema (as colunas descartadas nem foram lidas)
+    df = validar_colunas(df, arquivo)
+
+    # Padronizar valores de sentimento
+    if tipo == "amostra" and "rotulo" in df.columns:
+        df["rotulo"] = df["rotulo"].fillna("NEU").astype(str).replace(REPLACE_MAP)
+        if "Classe Sentimento" in df.columns:
+            df["Classe Sentimento"] = df["Classe Sentimento"].fillna("NEU").astype(str).replace(REPLACE_MAP)
+
+    return aplicar_esquema(df)
+
+
+def aplicar_esquema(df):
+    """Converte as colunas conhecidas para tipos compactos
+
+    Sentimentos categóricos (códigos int8), Subreddit/Autor/id Post categóricos
+    quando repetitivos, probabilidades float32, contagens inteiras compactas e
+    'Data' como datetime64 (convertida só aqui, uma vez por ingestão).
+    """
+    for col in COLUNAS_SENTIMENTO:
+        if col in df.columns:
+            df[col] = categorizar_sentimento(df[col])
+
+    for col in COLUNAS_CATEGORICAS:
+        if col in df.columns and df[col].nunique(dropna=True) < 0.5 * len(df):
+            df[col] = df[col].astype("category")
+
+    for col in COLUNAS_PROBABILIDADE:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float32")
+
+    compactar_contagens(df)
+
+    if COLUNA_DATA in df.columns:
+        df[COLUNA_DATA] = pd.to_datetime(df[COLUNA_DATA], errors="coerce")
+
+    return df
+
+
+def compactar_contagens(df):
+    """Upvotes/Comentarios no menor inteiro que comporta os valores (int8, int16...)"""
+    for col in COLUNAS_CONTAGEM:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce", downcast="integer")
+    return df
+
+
+# ==================== LEITURA DOS CSVs ====================
+PASTA_QUARENTENA = os.path.join(CACHE_PATH, "quarentena")
+BLOCO_PYARROW = 16 << 20
+
+# Os mesmos marcadores de ausência do read_csv do pandas, nos dois engines
+VALORES_NULOS = ["", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+                 "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"]
+
+
+def _encoding(arquivo):
+    # arquivo=None: CSV avulso, fora de ESQUEMAS (ex.: entrada do inferencia.py)
+    return esquema(arquivo)["encoding"] if arquivo else "utf-8"
+
+
+def _colunas_lidas(cabecalho, arquivo):
+    """Colunas do cabeçalho (com a grafia do CSV) que o esquema usa"""
+    registro = esquema(arquivo)
+    return [c for c in cabecalho if registro["renomear"].get(c.strip(), c.strip()) in registro["colunas"]]
+
+
+def _leitura_pyarrow(caminho, arquivo, sep, rejeitadas, todas=False):
+    """Opções do parser do pyarrow; cada linha malformada é anexada a `rejeitadas`
+
+    Os nomes das colunas vêm do cabeçalho lido pelo pandas, para coincidirem
+    com os do engine python (ex.: 'Unnamed: 0' na coluna sem nome). Tudo é
+    lido como texto; os tipos ficam com aplicar_esquema, como no fallback.
+    """
+    cabecalho = list(pd.read_csv(caminho, sep=sep, encoding=_encoding(arquivo), nrows=0).columns)
+    colunas = cabecalho if todas or not arquivo else _colunas_lidas(cabecalho, arquivo)
+
+    def rejeitar(linha):
+        rejeitadas.append({"campos": linha.actual_columns, "esperados": linha.expected_columns,
+                           "texto": linha.text})
+        return "skip"
+
+    return {
+        "read_options": pacsv.ReadOptions(column_names=cabecalho, skip_rows=1, block_size=BLOCO_PYARROW),
+        "parse_options": pacsv.ParseOptions(delimiter=sep, quote_char='"', double_quote=True,
+                                            newlines_in_values=True, invalid_row_handler=rejeitar),
+        "convert_options": pacsv.ConvertOptions(include_columns=colunas,
+                                                column_types={c: pa.string() for c in colunas},
+                                                null_values=VALORES_NULOS, strings_can_be_null=True)
+    }
+
+
+def _so_esquema(df, arquivo):
+    return df.drop(columns=df.columns.difference(_colunas_lidas(df.columns, arquivo)))
+
+
+def _para_pandas(tabela):
+    # Ausentes como NaN (e não None), como no engine python
+    return tabela.to_pandas().fillna(np.nan)
+
+
+def _leitura_python(arquivo, sep, rejeitadas):
+    """Argumentos de read_csv com engine python, o caminho de fallback
+
+    Sem usecols: com ele o engine python não detecta linhas com campos a mais.
+    """
+    def rejeitar(campos):
+        rejeitadas.append({"campos": len(campos), "esperados": None, "texto": sep.join(campos)})
+        return None
+
+    return {"sep": sep, "encoding": _encoding(arquivo), "on_bad_lines": rejeitar, "engine": "python"}
+
+
+def _pyarrow_compativel(arquivo):
+    # O parser do pyarrow só lê UTF-8 (o BOM é descartado por ele mesmo)
+    return PARQUET_DISPONIVEL and _encoding(arquivo).replace("-", "").lower() in ("utf8", "utf8sig")
+
+
+def ler_csv_bruto(caminho, arquivo, sep=None, todas=False):
+    """Lê um CSV com o esquema de `arquivo`, sem normalizar
+
+    Retorna (DataFrame, engine usado, linhas rejeitadas, erro do pyarrow ou
+    None). todas=True lê também as colunas fora do esquema.
+    """
+    sep = sep or separador(arquivo)
+    rejeitadas, erro = [], None
+    if _pyarrow_compativel(arquivo):
+        try:
+            tabela = pacsv.read_csv(caminho, **_leitura_pyarrow(caminho, arquivo, sep, rejeitadas, todas))
+            return _para_pandas(tabela), "pyarrow", rejeitadas, None
+        except (pa.ArrowException, UnicodeDecodeError) as falha:
+            rejeitadas, erro = [], str(falha)
+    df = pd.read_csv(caminho, **_leitura_python(arquivo, sep, rejeitadas))
+    return df if todas else _so_esquema(df, arquivo), "python", rejeitadas, erro
+
+
+def _blocos_brutos(caminho, arquivo, linhas, rejeitadas, leitura, todas=False, sep=None):
+    """Blocos de no máximo `linhas` linhas; leitura["engine"] recebe o engine usado"""
+    sep = sep or separador(arquivo)
+    if _pyarrow_compativel(arquivo):
+        produzidos = 0
+        try:
+            leitor = pacsv.open_csv(caminho, **_leitura_pyarrow(caminho, arquivo, sep, rejeitadas, todas))
+            for lote in leitor:
+                for inicio in range(0, lote.num_rows, linhas):
+                    produzidos += 1
+                    yield _para_pandas(lote.slice(inicio, linhas))
+            leitura["engine"] = "pyarrow"
+            return
+        except (pa.ArrowException, UnicodeDecodeError) as falha:
+            # Blocos já entregues não podem ser desfeitos: só sem nenhum recomeça no python
+            if produzidos:
+                raise ValueError(f"{arquivo}: falha do pyarrow no meio da leitura em blocos: {falha}") from falha
+            rejeitadas.clear()
+            leitura["erro"] = str(falha)
+
+    leitor = pd.read_csv(caminho, chunksize=linhas, **_leitura_python(arquivo, sep, rejeitadas))
+    with leitor:
+        for bloco in leitor:
+            yield bloco if todas or not arquivo else _so_esquema(bloco, arquivo)
+    leitura["engine"] = "python"
+
+
+def _caminho_quarentena(nome):
+    return os.path.join(PASTA_QUARENTENA, nome)
+
+
+def gravar_quarentena(nome, engine, linhas, rejeitadas, erro=None):
+    """Grava as linhas rejeitadas (JSON por linha) e o resumo da leitura de um arquivo"""
+    os.makedirs(PASTA_QUARENTENA, exist_ok=True)
+    if rejeitadas:
+        with open(_caminho_quarentena(nome + ".jsonl.tmp"), "w", encoding="utf-8") as f:
+            for linha in rejeitadas:
+                f.write(json.dumps(linha, ensure_ascii=False) + "\n")
+        os.replace(_caminho_quarentena(nome + ".jsonl.tmp"), _caminho_quarentena(nome + ".jsonl"))
+    else:
+        try:
+            os.remove(_caminho_quarentena(nome + ".jsonl"))
+        except OSError:
+            pass
+
+    with open(_caminho_quarentena(nome + ".json.tmp"), "w", encoding="utf-8") as f:
+        json.dump({"engine": engine, "linhas": linhas, "rejeitadas": len(rejeitadas), "erro_pyarrow": erro}, f)
+    os.replace(_caminho_quarentena(nome + ".json.tmp"), _caminho_quarentena(nome + ".json"))
+
+
+def resumo_quarentena(nome):
+    """Resumo da última leitura de um arquivo: engine, linhas, rejeitadas e erro do pyarrow"""
+    try:
+        with open(_caminho_quarentena(nome + ".json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def relatorio_quarentena():
+    """Linhas lidas e rejeitadas de cada arquivo na última ingestão, com o engine usado"""
+    linhas = []
+    for tema, arquivos in ARQUIVOS_DATASET.items():
+        for chave, arquivo in arquivos.items():
+            resumo = resumo_quarentena(arquivo)
+            linhas.append({
+                "Tema": tema,
+                "Arquivo": arquivo,
+                "Tipo": tipo_do_arquivo(chave),
+                "Engine": resumo.get("engine"),
+                "Linhas": resumo.get("linhas"),
+                "Rejeitadas": resumo.get("rejeitadas"),
+                "Erro pyarrow": resumo.get("erro_pyarrow")
+            })
+    tabela = pd.DataFrame(linhas)
+    tabela[["Linhas", "Rejeitadas"]] = tabela[["Linhas", "Rejeitadas"]].astype("Int64")
+    return tabela
+
+
+def memoria(df):
+    """Bytes ocupados pelo DataFrame, incluindo o conteúdo das strings"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def ler_csv(arquivo, tipo="completo", relatorio=None):
+    """Lê e normaliza um CSV de data/ sem passar pelo cache
+
+    Se `relatorio` for um dict, recebe a memória antes e depois da normalização.
+    """
+    caminho = os.path.join(DATA_PATH, arquivo)
+    df, engine, rejeitadas, erro = ler_csv_bruto(caminho, arquivo)
+    gravar_quarentena(arquivo, engine, len(df), rejeitadas, erro)
+    if relatorio is not None:
+        relatorio["memoria_antes"] = memoria(df)
+    df = normalizar(df, arquivo, tipo)
+    if relatorio is not None:
+        relatorio["memoria_depois"] = memoria(df)
+        relatorio["validacao"] = validar_conteudo(df, arquivo)
+    return df
+
+
+def ler_em_blocos(arquivo, tipo="completo", linhas=LINHAS_POR_BLOCO, todas=False):
+    """Lê um CSV de data/ em blocos normalizados de no máximo `linhas` linhas
+
+    todas=True mantém também as colunas fora do esquema (ex.: 'Subreddit').
+    """
+    caminho = os.path.join(DATA_PATH, arquivo)
+    rejeitadas, leitura, total = [], {}, 0
+    for bloco in _blocos_brutos(caminho, arquivo, linhas, rejeitadas, leitura, todas):
+        total += len(bloco)
+        yield normalizar(bloco, arquivo, tipo)
+    gravar_quarentena(arquivo, leitura["engine"], total, rejeitadas, leitura.get("erro"))
+
+
+def ler_blocos_avulsos(caminho, sep, linhas=LINHAS_POR_BLOCO, nome=None):
+    """Blocos brutos (todas as colunas) de um CSV UTF-8 fora de ESQUEMAS
+
+    Mesmo parser e mesma quarentena dos CSVs de data/: as linhas malformadas
+    ficam registradas sob `nome` (padrão: nome do arquivo) em vez de sumirem.
+    """
+    rejeitadas, leitura, total = [], {}, 0
+    for bloco in _blocos_brutos(caminho, None, linhas, rejeitadas, leitura, todas=True, sep=sep):
+        total += len(bloco)
+        yield bloco
+    gravar_quarentena(nome or os.path.basename(caminho), leitura["engine"], total, rejeitadas, leitura.get("erro"))
+
+
+def usar_streaming(arquivo):
+    """Indica se o arquivo deve ser agregado em blocos em vez de carregado inteiro"""
+    modo = os.environ.get("SENTIMENTLAB_STREAMING", "")
+    if modo in ("0", "1"):
+        return modo == "1"
+    return os.path.getsize(os.path.join(DATA_PATH, arquivo)) > LIMITE_STREAMING
+
+
+# ==================== CACHE COLUNAR ====================
+def hash_arquivo(caminho, tamanho_bloco=1 << 20):
+    """SHA-256 do conteúdo de um arquivo, lido em blocos"""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _caminho_manifesto(arquivo, tipo):
+    return os.path.join(CACHE_PATH, f"{arquivo}.{tipo}.json")
+
+
+def _ler_manifesto(arquivo, tipo):
+    try:
+        with open(_caminho_manifesto(arquivo, tipo), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _gravar_manifesto(arquivo, tipo, manifesto):
+    destino = _caminho_manifesto(arquivo, tipo)
+    temporario = destino + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f)
+    os.replace(temporario, destino)
+
+
+def _arquivos_parquet(manifesto):
+    """Caminhos do Parquet base e das partes anexadas incrementalmente"""
+    nomes = [manifesto.get("parquet", "")] + manifesto.get("partes", [])
+    return [os.path.join(CACHE_PATH, nome) for nome in nomes]
+
+
+def cache_valido(arquivo, tipo="completo"):
+    """Retorna o manifesto do cache se ele corresponde ao CSV atual, senão None"""
+    caminho = os.path.join(DATA_PATH, arquivo)
+    stat = os.stat(caminho)
+    manifesto = _ler_manifesto(arquivo, tipo)
+
+    if manifesto.get("versao") != VERSAO_CACHE or not all(map(os.path.isfile, _arquivos_parquet(manifesto))):
+        return None
+
+    # Caminho rápido: mesmo mtime e tamanho dispensam o hash
+    if manifesto.get("mtime_ns") == stat.st_mtime_ns and manifesto.get("tamanho") == stat.st_size:
+        return manifesto
+
+    # Arquivo tocado: só o hash decide se o conteúdo mudou
+    if manifesto.get("sha256") == hash_arquivo(caminho):
+        manifesto.update(mtime_ns=stat.st_mtime_ns, tamanho=stat.st_size)
+        _gravar_manifesto(arquivo, tipo, manifesto)
+        return manifesto
+
+    return None
+
+
+def _remover_cache(manifesto):
+    for parquet in _arquivos_parquet(manifesto) + [_caminho_chaves(manifesto)]:
+        try:
+            os.remove(parquet)
+        except OSError:
+            pass
+
+
+def converter_para_parquet(arquivo, tipo="completo"):
+    """Lê o CSV, normaliza e grava o Parquet correspondente. Retorna o DataFrame"""
+    caminho = os.path.join(DATA_PATH, arquivo)
+    os.makedirs(CACHE_PATH, exist_ok=True)
+
+    stat = os.stat(caminho)
+    sha = hash_arquivo(caminho)
+    relatorio = {}
+    df = ler_csv(arquivo, tipo, relatorio)
+
+    nome = f"{arquivo}.{tipo}.{sha[:16]}.parquet"
+    temporario = os.path.join(CACHE_PATH, nome + ".tmp")
+    df.to_parquet(temporario, index=False)
+    os.replace(temporario, os.path.join(CACHE_PATH, nome))
+
+    # Remover versões antigas do mesmo arquivo
+    anterior = _ler_manifesto(arquivo, tipo)
+    if anterior and anterior.get("parquet") != nome:
+        _remover_cache(anterior)
+
+    manifesto = {
+        "versao": VERSAO_CACHE,
+        "sha256": sha,
+        "mtime_ns": stat.st_mtime_ns,
+        "tamanho": stat.st_size,
+        "parquet": nome,
+        "partes": [],
+        "linhas": len(df),
+        **relatorio
+    }
+    if tipo == "completo":
+        np.save(_caminho_chaves(manifesto), chaves_deduplicacao(df))
+    _gravar_manifesto(arquivo, tipo, manifesto)
+    return df
+
+
+def ler_parquet(manifesto):
+    """Lê o Parquet base e as partes anexadas como um único DataFrame"""
+    arquivos = _arquivos_parquet(manifesto)
+    if len(arquivos) == 1:
+        return pd.read_parquet(arquivos[0], memory_map=True)
+
+    # pyarrow unifica os dicionários das colunas categóricas entre as partes e
+    # promove os inteiros: uma parte anexada pode ter contagens mais largas que a base
+    tabela = pa.concat_tables([pq.read_table(p, memory_map=True) for p in arquivos],
+                              promote_options="permissive")
+    return compactar_contagens(tabela.to_pandas())
+
+
+def carregar_tabela(arquivo, tipo="completo"):
+    """Carrega um arquivo normalizado, usando o cache Parquet quando possível"""
+    if not PARQUET_DISPONIVEL:
+        return ler_csv(arquivo, tipo)
+
+    manifesto = cache_valido(arquivo, tipo)
+    if manifesto:
+        return ler_parquet(manifesto)
+    return converter_para_parquet(arquivo, tipo)
+
+
+# ==================== INGESTÃO INCREMENTAL ====================
+def chaves_deduplicacao(df):
+    """Hash uint64 que identifica cada linha: 'id Post' nas postagens e
+    'id Post' + texto do comentário nos comentários"""
+    colunas = ["id Post", "Comentario"] if "Comentario" in df.columns else ["id Post"]
+    if not all(col in df.columns for col in colunas):
+        return np.empty(0, dtype=np.uint64)
+    chave = df[colunas].astype(str)
+    return pd.util.hash_pandas_object(chave, index=False).to_numpy()
+
+
+def _caminho_chaves(manifesto):
+    return os.path.join(CACHE_PATH, manifesto.get("parquet", "") + ".chaves.npy")
+
+
+def _alinhar_tipos(novos, modelo):
+    """Converte as colunas de `novos` para os tipos do Parquet base
+
+    Colunas numéricas vão para o tipo comum: as contagens da base foram
+    reduzidas (ex.: int16) e valores novos maiores não podem dar a volta.
+    """
+    novos = novos.reindex(columns=modelo.columns)
+    for col, dtype in modelo.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            if col in COLUNAS_SENTIMENTO:
+                novos[col] = categorizar_sentimento(novos[col].astype(object))
+            else:
+                novos[col] = novos[col].astype(object).astype("category")
+        elif dtype == object:
+            novos[col] = novos[col].astype(object)
+        elif pd.api.types.is_numeric_dtype(dtype) and pd.api.types.is_numeric_dtype(novos[col].dtype):
+            novos[col] = novos[col].astype(np.result_type(dtype, novos[col].dtype))
+        else:
+            novos[col] = novos[col].astype(dtype)
+    return novos
+
+
+def anexar_linhas(arquivo, caminho_novos, sep=None):
+    """Anexa a um arquivo completo só as linhas inéditas de `caminho_novos`
+
+    O CSV de origem recebe as linhas brutas e o cache ganha uma nova parte
+    Parquet, sem reler o histórico. O hash do manifesto vira um encadeamento
+    (hash anterior + hash das linhas anexadas); se o CSV for alterado por
+    outro meio, a verificação de hash falha e o cache é refeito do zero.
+    Retorna o DataFrame normalizado com as linhas inéditas.
+    """
+    if not PARQUET_DISPONIVEL or usar_streaming(arquivo):
+        raise ValueError(f"{arquivo}: a ingestão incremental requer o cache Parquet")
+
+    caminho = os.path.join(DATA_PATH, arquivo)
+    manifesto = cache_valido(arquivo, "completo")
+    if not manifesto:
+        converter_para_parquet(arquivo, "completo")
+        manifesto = _ler_manifesto(arquivo, "completo")
+
+    # Todas as colunas do lote vão para o CSV; só as do esquema, para o cache
+    brutos, engine, rejeitadas, erro = ler_csv_bruto(caminho_novos, arquivo, sep, todas=True)
+    gravar_quarentena(f"{arquivo}.anexo", engine, len(brutos), rejeitadas, erro)
+    canonico = esquema(arquivo)["renomear"]
+    brutos.columns = [canonico.get(c.strip(), c.strip()) for c in brutos.columns]
+    novos = normalizar(brutos[[c for c in esquema(arquivo)["colunas"] if c in brutos.columns]].copy(),
+                       arquivo, "completo")
+
+    # Deduplicar contra o histórico e dentro do próprio lote
+    chaves_antigas = np.load(_caminho_chaves(manifesto))
+    chaves = chaves_deduplicacao(novos)
+    ineditas = ~np.isin(chaves, chaves_antigas) & ~pd.Series(chaves).duplicated().to_numpy()
+    novos, brutos, chaves = novos[ineditas], brutos[ineditas], chaves[ineditas]
+    if novos.empty:
+        return novos
+
+    # CSV de origem: mesmas colunas (e mesma grafia) do cabeçalho original
+    with open(caminho, encoding=esquema(arquivo)["encoding"]) as f:
+        cabecalho = pd.read_csv(f, sep=separador(arquivo), nrows=0).columns
+    bruto_csv = brutos.reindex(columns=[canonico.get(c.strip(), c.strip()) for c in cabecalho])
+    texto = bruto_csv.to_csv(sep=separador(arquivo), header=False, index=False)
+
+    with open(caminho, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        precisa_quebra = f.read(1) != b"\n"
+    with open(caminho, "a", encoding="utf-8", newline="") as f:
+        if precisa_quebra:
+            f.write("\n")
+        f.write(texto)
+
+    # Cache: nova parte Parquet com os tipos do arquivo base
+    modelo = pq.read_schema(_arquivos_parquet(manifesto)[0]).empty_table().to_pandas()
+    novos = _alinhar_tipos(novos, modelo)
+    nome = f"{manifesto['parquet']}.parte{len(manifesto['partes']) + 1:04d}.parquet"
+    novos.to_parquet(os.path.join(CACHE_PATH, nome + ".tmp"), index=False)
+    os.replace(os.path.join(CACHE_PATH, nome + ".tmp"), os.path.join(CACHE_PATH, nome))
+    np.save(_caminho_chaves(manifesto), np.concatenate([chaves_antigas, chaves]))
+
+    stat = os.stat(caminho)
+    encadeado = hashlib.sha256((manifesto["sha256"] + hashlib.sha256(texto.encode("utf-8")).hexdigest()).encode())
+    manifesto.update(
+        sha256=encadeado.hexdigest(),
+        mtime_ns=stat.st_mtime_ns,
+        tamanho=stat.st_size,
+        partes=manifesto["partes"] + [nome],
+        linhas=manifesto["linhas"] + len(novos)
+    )
+    _gravar_manifesto(arquivo, "completo", manifesto)
+    return novos
+
+
+# ==================== CARGA PARALELA ====================
+def todos_arquivos():
+    """Lista (tema, arquivo, tipo) de todos os arquivos de ARQUIVOS_DATASET"""
+    return [(tema, arquivo, tipo_do_arquivo(chave))
+            for tema, arquivos in ARQUIVOS_DATASET.items()
+            for chave, arquivo in arquivos.items()]
+
+
+def _converter(arquivo, tipo):
+    # Executado no processo filho: só o número de linhas volta para o pai
+    return len(converter_para_parquet(arquivo, tipo))
+
+
+def relatorio_memoria(arquivo, tipo="completo"):
+    """(memória antes, memória depois) da normalização, registrada no manifesto do cache"""
+    manifesto = _ler_manifesto(arquivo, tipo)
+    return manifesto.get("memoria_antes"), manifesto.get("memoria_depois")
+
+
+def relatorio_validacao(arquivo, tipo="completo"):
+    """Problemas de conteúdo encontrados na ingestão (ver validar_conteudo)"""
+    return _ler_manifesto(arquivo, tipo).get("validacao", {})
+
+
+def preparar_caches(arquivos=None, ao_concluir=None, processos=None):
+    """Gera em paralelo os Parquets ausentes ou desatualizados
+
+    arquivos: lista (tema, arquivo, tipo); padrão: todos_arquivos().
+    ao_concluir(feitos, total, arquivo, linhas) é chamado no processo atual a
+    cada arquivo pronto; linhas é None quando o cache já era válido. Arquivos
+    em modo streaming ficam de fora, pois não passam pelo cache Parquet.
+    """
+    arquivos = todos_arquivos() if arquivos is None else arquivos
+    if not PARQUET_DISPONIVEL:
+        return
+
+    pendentes = []
+    feitos = 0
+    total = len(arquivos)
+    for _, arquivo, tipo in arquivos:
+        if usar_streaming(arquivo) or cache_valido(arquivo, tipo):
+            feitos += 1
+            if ao_concluir:
+                ao_concluir(feitos, total, arquivo, None)
+        else:
+            pendentes.append((arquivo, tipo))
+
+    if not pendentes:
+        return
+
+    # spawn: os filhos não herdam as threads do servidor do Streamlit
+    contexto = multiprocessing.get_context("spawn")
+    processos = processos or min(len(pendentes), os.cpu_count() or 1)
+    try:
+        with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as pool:
+            futuros = {pool.submit(_converter, arquivo, tipo): (arquivo, tipo) for arquivo, tipo in pendentes}
+            for futuro in as_completed(futuros):
+                linhas = futuro.result()
+                pendentes.remove(futuros[futuro])
+                feitos += 1
+                if ao_concluir:
+                    ao_concluir(feitos, total, futuros[futuro][0], linhas)
+    except (BrokenProcessPool, OSError):
+        # Ambiente sem suporte a subprocessos: converte o restante aqui mesmo
+        for arquivo, tipo in pendentes:
+            linhas = _converter(arquivo, tipo)
+            feitos += 1
+            if ao_concluir:
+                ao_concluir(feitos, total, arquivo, linhas)
+
+
+def ingerir_todos():
+    """Gera (ou revalida) o cache de todos os arquivos de ARQUIVOS_DATASET"""
+    tipos = {arquivo: tipo for _, arquivo, tipo in todos_arquivos()}
+
+    def relatar(feitos, total, arquivo, linhas):
+        situacao = "[ok]    " if linhas is None else "[gerado]"
+        detalhe = ""
+        antes, depois = relatorio_memoria(arquivo, tipos[arquivo])
+        if antes and depois:
+            detalhe = f" ({antes / 2**20:.1f} MB -> {depois / 2**20:.1f} MB em memória)"
+        print(f"{situacao} {feitos:>2}/{total} {arquivo}{detalhe}")
+        for problema, linhas_afetadas in relatorio_validacao(arquivo, tipos[arquivo]).items():
+            print(f"           aviso: {linhas_afetadas} linhas com {problema}")
+
+    preparar_caches(ao_concluir=relatar)
+
+    # Linhas malformadas descartadas na leitura, por tema
+    quarentena = relatorio_quarentena()
+    for tema, grupo in quarentena.groupby("Tema", sort=False):
+        rejeitadas = int(grupo["Rejeitadas"].sum())
+        if rejeitadas:
+            print(f"[quarentena] {tema}: {rejeitadas} linhas rejeitadas (ver {PASTA_QUARENTENA})")
+    for _, linha in quarentena[quarentena["Engine"] == "python"].iterrows():
+        motivo = f" ({linha['Erro pyarrow']})" if linha["Erro pyarrow"] else ""
+        print(f"[quarentena] {linha['Arquivo']}: lido com o engine python{motivo}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gera o cache colunar e os agregados do dashboard")
+    parser.add_argument("--anexar", nargs=3, metavar=("TEMA", "TIPO", "CSV"),
+                        help="anexa só as linhas inéditas de CSV ao arquivo completo "
+                             "do TEMA (TIPO: posts ou comentarios)")
+    parser.add_argument("--sep", default=None, help="separador do CSV anexado (padrão: o do arquivo de destino)")
+    args = parser.parse_args()
+
+    if not PARQUET_DISPONIVEL:
+        raise SystemExit("pyarrow não instalado: o cache Parquet está desativado.")
+
+    from agregacao import carregar_cubo_mensal, ingerir_incremental
+
+    if args.anexar:
+        tema, chave, caminho_novos = args.anexar
+        if tema not in ARQUIVOS_DATASET or chave not in TIPOS_TEXTO:
+            raise SystemExit(f"Tema ou tipo inválido: {tema} / {chave}")
+        linhas = ingerir_incremental(tema, chave, caminho_novos, args.sep)
+        print(f"[anexado] {linhas} linhas inéditas em {ARQUIVOS_DATASET[tema][chave]}")
+    else:
+        ingerir_todos()
+        cubo = carregar_cubo_mensal()
+        print(f"[cubo]   {len(cubo)} células mês × sentimento")
+
+    # Índice de busca textual (reconstruído se algum arquivo completo mudou)
+    from busca import carregar_indice
+    indice = carregar_indice()
+    print(f"[busca]  {len(indice['termos'])} termos em {len(indice['documentos'])} textos")
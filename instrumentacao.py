@@ -0,0 +1,159 @@
+"""Instrumentação leve das seções do dashboard.
+
+Cada seção registra tempo de parede, hit/miss de cache, linhas processadas e
+bytes enviados ao navegador. Os registros de uma execução do script ficam
+por thread (o Streamlit roda cada sessão na sua própria thread) e podem ser
+exibidos no painel de depuração ou emitidos como logs JSON, um por linha.
+
+SENTIMENTLAB_DEBUG=1 ativa o painel e a medição de bytes;
+SENTIMENTLAB_LOG_JSON=1 emite os logs estruturados no stderr.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+_local = threading.local()
+
+logger = logging.getLogger("sentimentlab")
+
+
+# ==================== CONFIGURAÇÃO ====================
+def _ativado(variavel):
+    return os.environ.get(variavel, "").strip().lower() in ("1", "true", "sim", "on")
+
+
+def debug_ativo():
+    return _ativado("SENTIMENTLAB_DEBUG")
+
+
+def log_json_ativo():
+    return _ativado("SENTIMENTLAB_LOG_JSON")
+
+
+def _configurar_logger():
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+# ==================== REGISTROS ====================
+def _estado():
+    if not hasattr(_local, "registros"):
+        _local.registros = []
+        _local.pilha = []
+        _local.sessao = None
+    return _local
+
+
+def iniciar_execucao(sessao=None):
+    """Descarta os registros da execução anterior desta thread"""
+    estado = _estado()
+    estado.registros = []
+    estado.pilha = []
+    estado.sessao = sessao
+
+
+def registros():
+    """Registros da execução atual, na ordem em que as seções terminaram"""
+    return list(_estado().registros)
+
+
+def _emitir(registro):
+    if log_json_ativo():
+        _configurar_logger()
+        logger.info(json.dumps(registro, ensure_ascii=False, default=str))
+
+
+@contextmanager
+def secao(nome, **dados):
+    """Mede o tempo de parede de um bloco; dados extras vão para o registro"""
+    estado = _estado()
+    registro = {"secao": nome, "sessao": estado.sessao, "nivel": len(estado.pilha),
+                "cache": None, "linhas": None, "bytes": None}
+    registro.update(dados)
+    estado.pilha.append(registro)
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        registro["segundos"] = round(time.perf_counter() - inicio, 6)
+        registro["timestamp"] = time.time()
+        estado.pilha.pop()
+        estado.registros.append(registro)
+        _emitir(registro)
+
+
+def contar_linhas(resultado):
+    """Linhas de um DataFrame/Series/array; None para outros resultados"""
+    if isinstance(resultado, (pd.DataFrame, pd.Series)):
+        return len(resultado)
+    if hasattr(resultado, "shape") and getattr(resultado, "ndim", 0) >= 1:
+        return int(resultado.shape[0])
+    return None
+
+
+def marcar_miss():
+    """Chamado dentro da função cacheada: a seção que a envolve foi um miss"""
+    pilha = _estado().pilha
+    if pilha:
+        pilha[-1]["cache"] = "miss"
+
+
+def instrumentar_cache(cache, nome=None):
+    """Aplica `cache` (st.cache_data/st.cache_resource) e registra cada chamada
+
+    A função original só roda em um miss; é isso que distingue hit de miss
+    sem depender de detalhes internos do cache.
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def executar(*args, **kwargs):
+            marcar_miss()
+            return funcao(*args, **kwargs)
+
+        cacheada = cache(executar)
+        rotulo = nome or funcao.__name__
+
+        @functools.wraps(funcao)
+        def chamar(*args, **kwargs):
+            with secao(rotulo, cache="hit") as registro:
+                resultado = cacheada(*args, **kwargs)
+                registro["linhas"] = contar_linhas(resultado)
+                return resultado
+
+        chamar.clear = cacheada.clear
+        return chamar
+    return decorador
+
+
+def tamanho_grafico(grafico):
+    """Bytes da especificação Vega-Lite (com os dados embutidos) de um gráfico Altair"""
+    return len(grafico.to_json(indent=None).encode("utf-8"))
+
+
+# ==================== RESUMO ====================
+def resumo(registros_execucao=None):
+    """Tempo total, chamadas, hits/misses, linhas e bytes por seção"""
+    df = pd.DataFrame(registros() if registros_execucao is None else registros_execucao)
+    if df.empty:
+        return df
+    for coluna in ("cache", "linhas", "bytes"):
+        if coluna not in df.columns:
+            df[coluna] = None
+    grupos = df.assign(hits=df["cache"].eq("hit"), misses=df["cache"].eq("miss")).groupby("secao", sort=False)
+    tabela = grupos.agg(chamadas=("segundos", "size"), segundos=("segundos", "sum"),
+                        hits=("hits", "sum"), misses=("misses", "sum"))
+    # Seções sem linhas/bytes medidos ficam vazias, não zeradas
+    for coluna in ("linhas", "bytes"):
+        tabela[coluna] = grupos[coluna].sum(min_count=1).astype("Int64")
+    return tabela.sort_values("segundos", ascending=False).reset_index()
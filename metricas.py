@@ -0,0 +1,232 @@
+"""Métricas de desempenho do classificador calculadas a partir da matriz de confusão."""
+import numpy as np
+
+from ingestao import CLASSES
+from agregacao import codigos_sentimento
+
+COLUNAS_PROB = ["prob_NEG", "prob_NEU", "prob_POS"]
+
+
+def _dividir(numerador, denominador):
+    """Divisão elemento a elemento que devolve 0 onde o denominador é 0"""
+    numerador = np.asarray(numerador, dtype=float)
+    denominador = np.asarray(denominador, dtype=float)
+    return np.divide(numerador, denominador, out=np.zeros_like(numerador), where=denominador > 0)
+
+
+def codificar_rotulos(serie):
+    """Códigos 0..2 para NEG/NEU/POS; qualquer outro rótulo vira 3 ("outros")"""
+    codigos = codigos_sentimento(serie).astype(np.int64)
+    codigos[codigos < 0] = len(CLASSES)
+    return codigos
+
+
+def matriz_confusao(codigos_true, codigos_pred):
+    """Matriz (n+1)×(n+1) com uma linha/coluna extra para rótulos fora de CLASSES"""
+    n = len(CLASSES) + 1
+    return np.bincount(codigos_true * n + codigos_pred, minlength=n * n).reshape(n, n)
+
+
+def auc_binaria(positivos, scores):
+    """AUC pela estatística de Mann-Whitney, com um único argsort e empates pela média"""
+    scores = np.asarray(scores, dtype=float)
+    n_pos = int(positivos.sum())
+    n_neg = len(positivos) - n_pos
+    if n_pos == 0 or n_neg == 0 or not np.isfinite(scores).all():
+        return 0.0
+
+    ordem = np.argsort(scores, kind="mergesort")
+    ordenados = scores[ordem]
+
+    # Posto médio de cada bloco de valores empatados
+    inicio_bloco = np.r_[True, ordenados[1:] != ordenados[:-1]]
+    bloco = np.cumsum(inicio_bloco) - 1
+    inicios = np.flatnonzero(inicio_bloco)
+    fins = np.r_[inicios[1:], len(ordenados)]
+    posto_medio = (inicios + fins + 1) / 2.0
+
+    postos = np.empty(len(scores))
+    postos[ordem] = posto_medio[bloco]
+    soma_pos = postos[positivos].sum()
+    return float((soma_pos - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg))
+
+
+def metricas_da_matriz(completa):
+    """Acurácia e métricas por classe de uma ou várias matrizes (..., n+1, n+1)
+
+    Aceita um lote de matrizes (ex.: uma por reamostra do bootstrap); as
+    métricas por classe saem com shape (..., n).
+    """
+    n = len(CLASSES)
+    matriz = completa[..., :n, :n]
+
+    diagonal = np.diagonal(completa, axis1=-2, axis2=-1)[..., :n]
+    precision = _dividir(diagonal, completa[..., :, :n].sum(axis=-2))
+    recall = _dividir(diagonal, completa[..., :n, :].sum(axis=-1))
+    f1 = _dividir(2 * precision * recall, precision + recall)
+
+    # Especificidade sobre a matriz restrita às três classes
+    diagonal_matriz = np.diagonal(matriz, axis1=-2, axis2=-1)
+    total = matriz.sum(axis=(-2, -1))[..., None]
+    fp = matriz.sum(axis=-2) - diagonal_matriz
+    vn = total - (matriz.sum(axis=-1) + matriz.sum(axis=-2) - diagonal_matriz)
+    especificidade = _dividir(vn, vn + fp)
+
+    acertos = np.trace(completa, axis1=-2, axis2=-1)
+    return {
+        "acuracia": _dividir(acertos, completa.sum(axis=(-2, -1))),
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "especificidade": especificidade
+    }
+
+
+def calcular_kernel(df):
+    """Todas as métricas de uma amostra rotulada a partir de uma única matriz de confusão
+
+    Retorna um dict com a matriz 3×3 (NEG/NEU/POS), acurácia e arrays por classe
+    de precision, recall, F1, especificidade e AUC (0 quando não há probabilidades).
+    """
+    n = len(CLASSES)
+    codigos_true = codificar_rotulos(df["rotulo"])
+    codigos_pred = codificar_rotulos(df["Classe Sentimento"])
+    completa = matriz_confusao(codigos_true, codigos_pred)
+    metricas = metricas_da_matriz(completa)
+
+    auc = np.zeros(n)
+    if all(col in df.columns for col in COLUNAS_PROB):
+        scores = df[COLUNAS_PROB].to_numpy(dtype=float)
+        for i in range(n):
+            auc[i] = auc_binaria(codigos_true == i, scores[:, i])
+
+    return {
+        "matriz": completa[:n, :n],
+        "acuracia": float(metricas["acuracia"]),
+        "precision": metricas["precision"],
+        "recall": metricas["recall"],
+        "f1": metricas["f1"],
+        "especificidade": metricas["especificidade"],
+        "auc": auc
+    }
+
+
+# ==================== INTERVALOS DE CONFIANÇA (BOOTSTRAP) ====================
+def auc_ponderada(positivos, scores, pesos):
+    """AUC de Mann-Whitney para várias reamostras de uma vez
+
+    pesos: (B, n) com quantas vezes cada linha aparece em cada reamostra.
+    Os scores são ordenados uma única vez; os empates contam meio ponto.
+    """
+    ordem = np.argsort(scores, kind="mergesort")
+    ordenados = scores[ordem]
+    inicios = np.flatnonzero(np.r_[True, ordenados[1:] != ordenados[:-1]])
+
+    pesos = pesos[:, ordem]
+    positivos = positivos[ordem]
+    pos_grupo = np.add.reduceat(pesos * positivos, inicios, axis=1)
+    neg_grupo = np.add.reduceat(pesos * ~positivos, inicios, axis=1)
+
+    # Negativos com score menor + metade dos empatados, para cada positivo
+    neg_abaixo = np.cumsum(neg_grupo, axis=1) - neg_grupo
+    u = (pos_grupo * (neg_abaixo + 0.5 * neg_grupo)).sum(axis=1)
+    return _dividir(u, pos_grupo.sum(axis=1) * neg_grupo.sum(axis=1))
+
+
+def bootstrap_kernel(df, reamostras=2000, nivel=0.95, semente=0, bloco=500):
+    """Intervalos de confiança percentis (bootstrap) das métricas de calcular_kernel
+
+    As reamostras são uma matriz de índices (B, n); as matrizes de confusão
+    de todas saem de um único bincount em true*(n+1)+pred + deslocamento da
+    reamostra. Processa `bloco` reamostras por vez para limitar a memória.
+    Retorna {métrica: (inferior, superior)}, com arrays por classe.
+    """
+    n = len(CLASSES) + 1
+    codigos_true = codificar_rotulos(df["rotulo"])
+    combinados = codigos_true * n + codificar_rotulos(df["Classe Sentimento"])
+    linhas = len(combinados)
+    tem_prob = all(col in df.columns for col in COLUNAS_PROB)
+    scores = df[COLUNAS_PROB].to_numpy(dtype=float) if tem_prob else None
+
+    rng = np.random.default_rng(semente)
+    partes = []
+    for inicio in range(0, reamostras, bloco):
+        b = min(bloco, reamostras - inicio)
+        indices = rng.integers(0, linhas, size=(b, linhas))
+        deslocamento = (np.arange(b) * n * n)[:, None]
+        matrizes = np.bincount((combinados[indices] + deslocamento).ravel(), minlength=b * n * n).reshape(b, n, n)
+        metricas = metricas_da_matriz(matrizes)
+
+        auc = np.zeros((b, len(CLASSES)))
+        if tem_prob and np.isfinite(scores).all():
+            pesos = np.bincount((indices + (np.arange(b) * linhas)[:, None]).ravel(),
+                                minlength=b * linhas).reshape(b, linhas)
+            for i in range(len(CLASSES)):
+                auc[:, i] = auc_ponderada(codigos_true == i, scores[:, i], pesos)
+        metricas["auc"] = auc
+        partes.append(metricas)
+
+    alfa = (1 - nivel) / 2
+    intervalos = {}
+    for nome in partes[0]:
+        valores = np.concatenate([p[nome] for p in partes])
+        inferior, superior = np.quantile(valores, [alfa, 1 - alfa], axis=0)
+        intervalos[nome] = (inferior, superior)
+    return intervalos
+
+
+# ==================== CURVAS ROC ====================
+def curva_roc(positivos, scores):
+    """FPR/TPR em cada limiar distinto (equivalente ao roc_curve do sklearn)"""
+    scores = np.asarray(scores, dtype=float)
+    ordem = np.argsort(-scores, kind="mergesort")
+    ordenados = scores[ordem]
+    acertos = positivos[ordem].astype(np.int64)
+
+    # Último índice de cada limiar distinto
+    limiares = np.r_[np.flatnonzero(np.diff(ordenados)), len(ordenados) - 1]
+    vp = np.cumsum(acertos)[limiares]
+    fp = limiares + 1 - vp
+
+    fpr = np.r_[0.0, fp / fp[-1]]
+    tpr = np.r_[0.0, vp / vp[-1]]
+    return fpr, tpr
+
+
+def simplificar_curva(fpr, tpr, tolerancia=0.01):
+    """Mantém só os pontos necessários para um erro máximo de ~tolerancia
+
+    Primeiro descarta pontos intermediários de segmentos retos (como o
+    drop_intermediate do sklearn). Como a curva ROC é monótona nos dois eixos,
+    fpr + tpr cresce de 0 a 2: guardar o primeiro ponto de cada faixa de
+    largura `tolerancia` limita o desvio da interpolação linear à faixa.
+    """
+    if len(fpr) > 2:
+        colinear = np.r_[False, np.logical_and(np.diff(fpr, 2) == 0, np.diff(tpr, 2) == 0), False]
+        fpr, tpr = fpr[~colinear], tpr[~colinear]
+
+    faixas = np.floor((fpr + tpr) / tolerancia)
+    _, manter = np.unique(faixas, return_index=True)
+    manter = np.union1d(manter, [len(fpr) - 1])
+    return fpr[manter], tpr[manter]
+
+
+def calcular_curvas_roc(df, tolerancia=0.01):
+    """Curvas ROC um-contra-todos simplificadas, por classe
+
+    Retorna {classe: (fpr, tpr)}; classes sem positivos ou sem negativos
+    (ou com probabilidades inválidas) ficam de fora.
+    """
+    if not all(col in df.columns for col in COLUNAS_PROB):
+        return {}
+
+    codigos_true = codificar_rotulos(df["rotulo"])
+    scores = df[COLUNAS_PROB].to_numpy(dtype=float)
+
+    curvas = {}
+    for i, classe in enumerate(CLASSES):
+        positivos = codigos_true == i
+        if positivos.all() or not positivos.any() or not np.isfinite(scores[:, i]).all():
+            continue
+        curvas[classe] = simplificar_curva(*curva_roc(positivos, scores[:, i]), tolerancia)
+    return curvas
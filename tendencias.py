@@ -0,0 +1,222 @@
+"""Tendências das séries mensais de sentimento de todos os temas.
+
+As séries de cada (tema, tipo) ficam em um único array séries × meses ×
+classes, sobre o mesmo calendário mensal. Médias móveis saem de somas
+acumuladas, a EWMA é calculada sobre todas as séries e classes de uma vez, e
+os pontos de mudança vêm de uma segmentação binária que avalia, a cada
+rodada, todos os cortes de todos os segmentos pendentes numa só operação.
+"""
+import numpy as np
+import pandas as pd
+
+from ingestao import CLASSES, arquivos_completos
+from agregacao import codigos_sentimento
+
+JANELA_MOVEL = 3        # meses da média móvel
+MEIA_VIDA = 3           # meses da EWMA
+SEGMENTO_MINIMO = 3     # meses com publicações de cada lado de um ponto de mudança
+MUDANCA_MINIMA = 0.10   # variação mínima da proporção de alguma classe
+ALFA = 0.01
+MAXIMO_PONTOS = 4       # por série
+
+
+# ==================== SÉRIES ====================
+def series_mensais(cubo):
+    """Publicações por (tema, tipo), mês e classe no calendário comum
+
+    Retorna (chaves, meses, contagens) com contagens de shape
+    (len(chaves), len(meses), len(CLASSES)); meses sem publicações valem 0.
+    """
+    chaves = [(tema, tipo) for tema, tipo, _ in arquivos_completos()]
+    if cubo.empty:
+        return chaves, pd.DatetimeIndex([]), np.zeros((len(chaves), 0, len(CLASSES)))
+
+    meses = pd.date_range(cubo['Mes'].min(), cubo['Mes'].max(), freq="MS")
+    serie = pd.MultiIndex.from_tuples(chaves).get_indexer(
+        pd.MultiIndex.from_arrays([cubo['Tema'].astype(str), cubo['Tipo'].astype(str)])
+    )
+    mes = meses.get_indexer(cubo['Mes'])
+    classe = codigos_sentimento(cubo['Classe'])
+    validos = (serie >= 0) & (mes >= 0) & (classe >= 0)
+
+    contagens = np.zeros((len(chaves), len(meses), len(CLASSES)))
+    np.add.at(contagens, (serie[validos], mes[validos], classe[validos]),
+              cubo['Quantidade'].to_numpy(dtype=float)[validos])
+    return chaves, meses, contagens
+
+
+def _acumular(contagens):
+    """Somas acumuladas no eixo dos meses, com uma linha de zeros no início"""
+    acumulado = np.zeros((contagens.shape[0], contagens.shape[1] + 1) + contagens.shape[2:])
+    np.cumsum(contagens, axis=1, out=acumulado[:, 1:])
+    return acumulado
+
+
+def proporcoes(contagens):
+    """Proporção de cada classe no último eixo; NaN onde não há publicações"""
+    total = contagens.sum(axis=-1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, contagens / total, np.nan)
+
+
+def proporcoes_moveis(contagens, janela=JANELA_MOVEL):
+    """Proporções nos últimos `janela` meses (somas da janela, não média das proporções)"""
+    acumulado = _acumular(contagens)
+    fins = np.arange(1, contagens.shape[1] + 1)
+    inicios = np.maximum(fins - janela, 0)
+    return proporcoes(acumulado[:, fins] - acumulado[:, inicios])
+
+
+def proporcoes_ewma(contagens, meia_vida=MEIA_VIDA):
+    """Proporções com média exponencial das contagens, todas as séries e classes juntas"""
+    s, t, n = contagens.shape
+    colunas = pd.DataFrame(contagens.transpose(1, 0, 2).reshape(t, s * n))
+    suavizadas = colunas.ewm(halflife=meia_vida).mean().to_numpy()
+    return proporcoes(suavizadas.reshape(t, s, n).transpose(1, 0, 2))
+
+
+# ==================== TESTE DE MUDANÇA ====================
+def teste_mudanca(antes, depois):
+    """Qui-quadrado de homogeneidade 2 × 3 entre duas distribuições de contagens
+
+    Aceita lotes (..., 3). Com 2 graus de liberdade a cauda da qui-quadrado é
+    exp(-x / 2), sem depender do scipy. Retorna (estatística, p-valor).
+    """
+    tabela = np.stack([np.asarray(antes, dtype=float), np.asarray(depois, dtype=float)], axis=-2)
+    linhas = tabela.sum(axis=-1, keepdims=True)
+    colunas = tabela.sum(axis=-2, keepdims=True)
+    total = linhas.sum(axis=-2, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        esperado = linhas * colunas / total
+        termos = np.where(esperado > 0, (tabela - esperado) ** 2 / esperado, 0.0)
+    estatistica = termos.sum(axis=(-2, -1))
+    return estatistica, np.exp(-estatistica / 2)
+
+
+# ==================== PONTOS DE MUDANÇA ====================
+def _custo(contagens):
+    """-log-verossimilhança multinomial de um segmento (último eixo = classes)"""
+    total = contagens.sum(axis=-1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        termos = np.where(contagens > 0, contagens * np.log(contagens / total), 0.0)
+    return -termos.sum(axis=-1)
+
+
+def segmentacao_binaria(contagens, minimo=SEGMENTO_MINIMO, alfa=ALFA, mudanca=MUDANCA_MINIMA,
+                        maximo=MAXIMO_PONTOS):
+    """Pontos de mudança da proporção das classes em todas as séries
+
+    Cada segmento pendente é cortado onde a razão de verossimilhança
+    multinomial é máxima; o corte vale se o p-valor é menor que `alfa` e alguma
+    classe muda pelo menos `mudanca` de proporção. Como o corte é o melhor de
+    todos os cortes válidos do segmento, o p-valor nominal de um corte (2 graus
+    de liberdade) é corrigido por Bonferroni: multiplicado pelo número de cortes
+    válidos, limitado a 1. Retorna arrays (serie, corte, p, antes, depois), com
+    `corte` = primeiro mês do novo regime e antes/depois = proporções (k, 3)
+    dos dois lados.
+    """
+    s, t, n = contagens.shape
+    acumulado = _acumular(contagens)
+    ativos = np.zeros((s, t + 1), dtype=np.int64)
+    np.cumsum(contagens.sum(axis=-1) > 0, axis=1, out=ativos[:, 1:])
+
+    serie, inicio, fim = np.arange(s), np.zeros(s, dtype=np.int64), np.full(s, t)
+    pontos = np.zeros(s, dtype=np.int64)
+    achados = []
+    cortes = np.arange(t + 1)
+    while len(serie):
+        # Todos os cortes de todos os segmentos pendentes: (segmentos, t + 1, classes)
+        esquerda = acumulado[serie[:, None], cortes] - acumulado[serie, inicio][:, None]
+        direita = acumulado[serie, fim][:, None] - acumulado[serie[:, None], cortes]
+        meses_esquerda = ativos[serie[:, None], cortes] - ativos[serie, inicio][:, None]
+        meses_direita = ativos[serie, fim][:, None] - ativos[serie[:, None], cortes]
+        validos = ((cortes > inicio[:, None]) & (cortes < fim[:, None]) &
+                   (meses_esquerda >= minimo) & (meses_direita >= minimo))
+
+        ganho = _custo(esquerda + direita) - _custo(esquerda) - _custo(direita)
+        ganho = np.where(validos, ganho, -np.inf)
+        melhor = ganho.argmax(axis=1)
+        linha = np.arange(len(serie))
+        antes = proporcoes(esquerda[linha, melhor])
+        depois = proporcoes(direita[linha, melhor])
+        # Máximo sobre todos os cortes: p nominal × cortes testados (Bonferroni)
+        with np.errstate(over="ignore", invalid="ignore"):
+            p = np.minimum(np.exp(-ganho[linha, melhor]) * validos.sum(axis=1), 1.0)
+
+        with np.errstate(invalid="ignore"):
+            variacao = np.nanmax(np.abs(depois - antes), axis=-1, initial=0.0)
+        aceitos = validos[linha, melhor] & (p < alfa) & (variacao >= mudanca)
+        # Os mais fortes primeiro, até o máximo de pontos por série
+        ordem = np.flatnonzero(aceitos)[np.argsort(ganho[linha, melhor][aceitos])[::-1]]
+        aceitos[:] = False
+        for i in ordem:
+            if pontos[serie[i]] < maximo:
+                pontos[serie[i]] += 1
+                aceitos[i] = True
+        if not aceitos.any():
+            break
+        achados.append((serie[aceitos], melhor[aceitos], p[aceitos], antes[aceitos], depois[aceitos]))
+
+        corte = melhor[aceitos]
+        serie = np.r_[serie[aceitos], serie[aceitos]]
+        inicio, fim = np.r_[inicio[aceitos], corte], np.r_[corte, fim[aceitos]]
+        continuar = pontos[serie] < maximo
+        serie, inicio, fim = serie[continuar], inicio[continuar], fim[continuar]
+
+    if not achados:
+        return (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0),
+                np.empty((0, n)), np.empty((0, n)))
+    return tuple(np.concatenate(partes) for partes in zip(*achados))
+
+
+# ==================== MOTOR ====================
+def calcular_tendencias(cubo):
+    """Séries, proporções suavizadas e pontos de mudança de todos os (tema, tipo)
+
+    Retorna um dict com chaves, meses, contagens, proporcoes, moveis e ewma
+    (arrays séries × meses × classes) e pontos, um DataFrame ordenado por mês
+    com Tema, Tipo, Mes, a Classe que mais mudou, as proporções Antes/Depois
+    dela, a Variacao e o P Ajustado (Bonferroni sobre os cortes do segmento).
+    """
+    chaves, meses, contagens = series_mensais(cubo)
+    serie, corte, p, antes, depois = segmentacao_binaria(contagens)
+
+    diferenca = np.nan_to_num(depois - antes)
+    classe = np.abs(diferenca).argmax(axis=1) if len(serie) else np.empty(0, dtype=np.int64)
+    linha = np.arange(len(serie))
+    pontos = pd.DataFrame({
+        "Tema": [chaves[i][0] for i in serie],
+        "Tipo": [chaves[i][1] for i in serie],
+        "Mes": meses[corte] if len(meses) else pd.DatetimeIndex([]),
+        "Classe": pd.Categorical.from_codes(classe, categories=CLASSES),
+        "Antes": antes[linha, classe],
+        "Depois": depois[linha, classe],
+        "Variacao": diferenca[linha, classe],
+        "P Ajustado": p,
+    }).sort_values(["Mes", "Tema", "Tipo"], kind="stable", ignore_index=True)
+
+    return {
+        "chaves": chaves,
+        "meses": meses,
+        "contagens": contagens,
+        "proporcoes": proporcoes(contagens),
+        "moveis": proporcoes_moveis(contagens),
+        "ewma": proporcoes_ewma(contagens),
+        "pontos": pontos,
+    }
+
+
+def serie_tendencia(tendencias, tema, tipo, suavizacao="ewma"):
+    """Proporções mensais de um (tema, tipo) em formato longo (Mes, Classe, Proporcao)"""
+    i = tendencias["chaves"].index((tema, tipo))
+    valores = tendencias[suavizacao][i]
+    meses = tendencias["meses"]
+    com_dados = tendencias["contagens"][i].sum(axis=-1) > 0
+    # Só entre o primeiro e o último mês com publicações da série
+    ativos = np.flatnonzero(com_dados)
+    fatia = slice(ativos[0], ativos[-1] + 1) if len(ativos) else slice(0, 0)
+    return pd.DataFrame({
+        "Mes": np.repeat(meses[fatia], len(CLASSES)),
+        "Classe": np.tile(CLASSES, len(meses[fatia])),
+        "Proporcao": valores[fatia].ravel(),
+    })
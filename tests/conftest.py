@@ -0,0 +1,52 @@
+"""Fixtures comuns: um diretório data/ pequeno com os arquivos completos do dashboard."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Os módulos do app ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingestao  # noqa: E402
+from ingestao import CLASSES, arquivos_completos, esquema  # noqa: E402
+
+
+def tabela_sintetica(arquivo, linhas=30, semente=0):
+    """DataFrame com as colunas do esquema de um arquivo completo, valores pequenos"""
+    rng = np.random.default_rng(semente)
+    colunas = esquema(arquivo)["colunas"]
+    dados = {
+        "id Post": [f"p{i % max(linhas // 2, 1)}" if "Comentario" in colunas else f"p{i}" for i in range(linhas)],
+        "Autor": rng.choice(["ana", "bia", "caio"], linhas),
+        "Upvotes": rng.integers(-3, 60, linhas),
+        "Comentarios": rng.integers(0, 20, linhas),
+        "Data": pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, 400, linhas), unit="D"),
+        "Contexto": [f"postagem {i}" for i in range(linhas)],
+        "Comentario": [f"comentário {i}" for i in range(linhas)],
+        "Classe Sentimento": rng.choice(CLASSES, linhas),
+    }
+    return pd.DataFrame({c: dados[c] for c in colunas})
+
+
+def escrever_csv(arquivo, df):
+    """Grava df em data/ com o separador e o encoding do esquema do arquivo"""
+    config = esquema(arquivo)
+    df.to_csv(os.path.join(ingestao.DATA_PATH, arquivo), sep=config["sep"], encoding=config["encoding"],
+              index=False)
+
+
+@pytest.fixture
+def pasta_dados(tmp_path, monkeypatch):
+    """Diretório de trabalho temporário com data/ e os seis arquivos completos"""
+    from agregacao import _agregar_em_blocos
+
+    monkeypatch.chdir(tmp_path)  # DATA_PATH e CACHE_PATH são relativos
+    monkeypatch.delenv("SENTIMENTLAB_STREAMING", raising=False)
+    os.makedirs(ingestao.DATA_PATH)
+    for indice, (_, _, arquivo) in enumerate(arquivos_completos()):
+        escrever_csv(arquivo, tabela_sintetica(arquivo, semente=indice))
+    _agregar_em_blocos.cache_clear()
+    yield tmp_path
+    _agregar_em_blocos.cache_clear()
@@ -0,0 +1,74 @@
+"""Recorte por período: limites de mês em fatia_periodo e somas acumuladas de indice_periodos."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingestao import CLASSES
+from agregacao import (
+    MEDIDAS, carregar_resumo, codigos_sentimento, contagens_periodo, fatia_periodo, indice_periodos,
+    totais_mensais, totais_periodo
+)
+
+
+DATAS = np.array([
+    "2022-02-28T23:59:59", "2022-03-01T00:00:00", "2022-03-15", "2022-03-31T23:59:59",
+    "2022-04-01T00:00:00", "2022-12-31T12:00", "2023-01-01", "NaT"
+], dtype="datetime64[ns]")
+
+
+@pytest.mark.parametrize("inicio, fim, esperado", [
+    ("2022-03-01", "2022-03-01", [1, 2, 3]),        # o mês de fim vale inteiro
+    (pd.Timestamp("2022-03-01"), pd.Timestamp("2022-04-01"), [1, 2, 3, 4]),
+    ("2022-12-01", "2022-12-01", [5]),              # virada de ano
+    (None, "2022-02-01", [0]),
+    ("2022-04-01", None, [4, 5, 6, 7]),             # sem fim, NaT fica dentro
+    (None, None, list(range(8))),
+    ("2024-01-01", None, [7]),
+    ("2022-05-01", "2022-03-01", []),              # início depois do fim
+])
+def test_fatia_periodo_nos_limites_do_mes(inicio, fim, esperado):
+    fatia = fatia_periodo(DATAS, inicio, fim)
+    assert list(range(len(DATAS))[fatia]) == esperado
+
+
+def _somas_do_cubo(cubo, tema, tipo, inicio, fim):
+    """Referência direta: filtra o cubo pelo mês e soma por classe"""
+    parte = cubo[(cubo["Tema"] == tema) & (cubo["Tipo"] == tipo)]
+    if inicio is not None:
+        parte = parte[parte["Mes"] >= pd.Timestamp(inicio)]
+    if fim is not None:
+        parte = parte[parte["Mes"] <= pd.Timestamp(fim)]
+    somas = np.zeros((len(MEDIDAS), len(CLASSES)))
+    np.add.at(somas, (slice(None), codigos_sentimento(parte["Classe"])), parte[MEDIDAS].to_numpy(dtype=float).T)
+    return somas
+
+
+PERIODOS = [(None, None), ("2022-03-01", "2022-08-01"), ("2022-01-01", "2022-01-01"), (None, "2022-06-01"),
+            ("2022-11-01", None), ("2030-01-01", None)]
+
+
+@pytest.mark.parametrize("inicio, fim", PERIODOS)
+def test_indice_periodos_igual_ao_filtro_do_cubo(pasta_dados, inicio, fim):
+    cubo, contagens = carregar_resumo()
+    indice = indice_periodos(cubo)
+    periodo = contagens_periodo(indice, inicio, fim)
+    for (tema, tipo), somas in periodo.items():
+        np.testing.assert_allclose(somas, _somas_do_cubo(cubo, tema, tipo, inicio, fim))
+        if inicio is None and fim is None:
+            np.testing.assert_allclose(somas, contagens[(tema, tipo)])
+
+
+@pytest.mark.parametrize("inicio, fim", PERIODOS)
+@pytest.mark.parametrize("medida", ["Quantidade", "Upvotes"])
+def test_totais_periodo_igual_aos_totais_mensais(pasta_dados, inicio, fim, medida):
+    cubo, _ = carregar_resumo()
+    mensais = totais_mensais(cubo, medida).astype({"Tema": str, "Tipo": str})
+    if inicio is not None:
+        mensais = mensais[mensais["Mes"] >= pd.Timestamp(inicio)]
+    if fim is not None:
+        mensais = mensais[mensais["Mes"] <= pd.Timestamp(fim)]
+    obtido = totais_periodo(indice_periodos(cubo), inicio, fim, medida)
+    chaves = ["Tema", "Tipo", "Mes"]
+    pd.testing.assert_frame_equal(obtido.sort_values(chaves, ignore_index=True),
+                                  mensais[chaves + ["Quantidade"]].sort_values(chaves, ignore_index=True),
+                                  check_dtype=False)
@@ -0,0 +1,71 @@
+"""Busca no índice invertido: termos em AND, prefixo, filtros e ordenação por data."""
+import pandas as pd
+import pytest
+
+from ingestao import ARQUIVOS_DATASET
+from busca import buscar, construir_indice, termo_em_digitacao
+from conftest import escrever_csv, tabela_sintetica
+
+
+@pytest.fixture
+def indice(pasta_dados):
+    comentarios = tabela_sintetica(ARQUIVOS_DATASET["STF"]["comentarios"], linhas=4)
+    comentarios["Comentario"] = ["Vacina obrigatória já", "vacinação atrasada de novo", "a vacina chegou",
+                                 "obrigatória a máscara"]
+    comentarios["Classe Sentimento"] = ["POS", "NEG", "NEU", "NEG"]
+    comentarios["Data"] = ["2022-05-01", "2022-03-01", None, "2021-01-01"]
+    escrever_csv(ARQUIVOS_DATASET["STF"]["comentarios"], comentarios)
+
+    posts = tabela_sintetica(ARQUIVOS_DATASET["Auxílio Brasil"]["posts"], linhas=1)
+    posts["Contexto"] = ["Vacina e auxílio"]
+    posts["Classe Sentimento"] = ["POS"]
+    posts["Data"] = ["2023-01-01"]
+    escrever_csv(ARQUIVOS_DATASET["Auxílio Brasil"]["posts"], posts)
+    return construir_indice()
+
+
+def _textos(indice, consulta, **filtros):
+    total, pagina = buscar(indice, consulta, por_pagina=50, **filtros)
+    assert total == len(pagina)
+    return pagina["Texto"].tolist()
+
+
+def test_termos_em_and_sem_prefixo_depois_do_espaco(indice):
+    assert _textos(indice, "vacina obrigatoria ") == ["Vacina obrigatória já"]
+    assert _textos(indice, "VACINA ") == ["Vacina e auxílio", "Vacina obrigatória já", "a vacina chegou"]
+
+
+def test_ultimo_termo_como_prefixo(indice):
+    assert _textos(indice, "vacin") == ["Vacina e auxílio", "Vacina obrigatória já", "vacinação atrasada de novo",
+                                        "a vacina chegou"]
+    assert _textos(indice, "obrigatória vac") == ["Vacina obrigatória já"]
+
+
+@pytest.mark.parametrize("consulta", ["vacina de", "vacina a", "vacina,"])
+def test_stopword_ou_token_curto_no_fim_nao_vira_prefixo(indice, consulta):
+    assert termo_em_digitacao(consulta) is None
+    assert _textos(indice, consulta) == _textos(indice, "vacina ")
+
+
+def test_filtros_none_e_lista_vazia(indice):
+    assert len(_textos(indice, "vacin", temas=None, classes=None)) == 4
+    assert _textos(indice, "vacin", temas=[]) == []
+    assert _textos(indice, "vacin", classes=[]) == []
+    assert len(_textos(indice, "vacin", temas=["STF"])) == 3
+    assert _textos(indice, "vacin", classes=["NEG"]) == ["vacinação atrasada de novo"]
+    assert _textos(indice, "vacin", tipo="Postagens") == ["Vacina e auxílio"]
+
+
+def test_datas_ausentes_no_fim_e_fora_de_periodos(indice):
+    total, pagina = buscar(indice, "vacin")
+    assert pagina["Data"].iloc[-1] is pd.NaT
+    assert pagina["Data"].iloc[:-1].is_monotonic_decreasing
+
+    periodo = _textos(indice, "vacin", inicio="2022-01-01", fim="2022-12-31")
+    assert periodo == ["Vacina obrigatória já", "vacinação atrasada de novo"]
+
+
+def test_paginacao(indice):
+    total, pagina = buscar(indice, "vacin", pagina=2, por_pagina=3)
+    assert total == 4
+    assert pagina["Texto"].tolist() == ["a vacina chegou"]
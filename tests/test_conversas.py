@@ -0,0 +1,105 @@
+"""Somas por conversa: dividir os comentários em blocos não muda nenhum agregado."""
+import functools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import conversas
+import ingestao
+from ingestao import ARQUIVOS_DATASET, CLASSES
+from conversas import (
+    agregar_conversas, concordancia_conversas, linhas_periodo, somar_arquivos, somar_conversas, tabela_conversas
+)
+
+
+def conversas_sinteticas(semente=0, n_posts=40, n_comentarios=500):
+    rng = np.random.default_rng(semente)
+    posts = pd.DataFrame({
+        "id Post": [f"p{i}" for i in range(n_posts)],
+        "Classe Sentimento": rng.choice(CLASSES + [None], n_posts, p=[0.3, 0.4, 0.2, 0.1]),
+        "Upvotes": rng.integers(-5, 100, n_posts),
+        "Data": pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, 365, n_posts), unit="D"),
+    })
+    # ~10% de órfãos (ids sem postagem), upvotes negativos e classes ausentes
+    ids = np.where(rng.random(n_comentarios) < 0.1, "orfao", rng.choice(posts["id Post"], n_comentarios))
+    comentarios = pd.DataFrame({
+        "id Post": pd.Categorical(ids),
+        "Classe Sentimento": rng.choice(CLASSES + [None], n_comentarios, p=[0.3, 0.4, 0.25, 0.05]),
+        "Upvotes": rng.integers(-10, 50, n_comentarios),
+    })
+    return posts, comentarios
+
+
+def _em_blocos(comentarios, tamanhos):
+    """Fatias consecutivas; cada bloco com as próprias categorias, como vêm de ler_em_blocos"""
+    limites = np.cumsum([0] + list(tamanhos))
+    for inicio, fim in zip(limites[:-1], limites[1:]):
+        bloco = comentarios.iloc[inicio:fim].copy()
+        bloco["id Post"] = bloco["id Post"].astype(str).astype("category")
+        yield bloco
+
+
+def _assert_somas_iguais(obtidas, esperadas):
+    assert obtidas.keys() >= esperadas.keys()
+    for chave, valor in esperadas.items():
+        if isinstance(valor, np.ndarray) and valor.dtype.kind == "f":
+            np.testing.assert_allclose(obtidas[chave], valor)
+        elif isinstance(valor, np.ndarray):
+            np.testing.assert_array_equal(obtidas[chave], valor)
+        else:
+            assert obtidas[chave] == valor
+
+
+@pytest.mark.parametrize("tamanhos", [[500], [1] * 500, [7] * 71 + [3], [250, 0, 250], [13, 300, 187]])
+def test_blocos_iguais_a_um_bloco_so(tamanhos):
+    posts, comentarios = conversas_sinteticas()
+    inteiro = somar_conversas(posts, [comentarios])
+    em_blocos = somar_conversas(posts, _em_blocos(comentarios, tamanhos))
+    _assert_somas_iguais(em_blocos, inteiro)
+    pd.testing.assert_frame_equal(tabela_conversas(em_blocos), tabela_conversas(inteiro))
+    np.testing.assert_array_equal(concordancia_conversas(em_blocos), concordancia_conversas(inteiro))
+
+
+def test_somas_contra_calculo_direto():
+    posts, comentarios = conversas_sinteticas(semente=1)
+    tabela = agregar_conversas(posts, comentarios).set_index("id Post")
+    assert somar_conversas(posts, [comentarios])["orfaos"] == int((comentarios["id Post"] == "orfao").sum())
+
+    validos = comentarios[comentarios["Classe Sentimento"].notna() & (comentarios["id Post"] != "orfao")]
+    for id_post, grupo in validos.groupby("id Post", observed=True):
+        linha = tabela.loc[id_post]
+        assert linha["Comentarios"] == len(grupo)
+        for c in CLASSES:
+            assert linha[c] == (grupo["Classe Sentimento"] == c).sum()
+        escores = grupo["Classe Sentimento"].map({"NEG": -1.0, "NEU": 0.0, "POS": 1.0})
+        pesos = np.maximum(grupo["Upvotes"], 0) + 1
+        assert linha["Polaridade"] == pytest.approx(escores.mean())
+        assert linha["Polaridade Ponderada"] == pytest.approx((escores * pesos).sum() / pesos.sum())
+        classe_post = posts.set_index("id Post").loc[id_post, "Classe Sentimento"]
+        if classe_post is None:
+            assert np.isnan(linha["Concordancia"])
+        else:
+            assert linha["Concordancia"] == pytest.approx((grupo["Classe Sentimento"] == classe_post).mean())
+
+
+def test_somar_arquivos_em_streaming_igual_ao_cache(pasta_dados, monkeypatch):
+    posts, comentarios = ARQUIVOS_DATASET["STF"]["posts"], ARQUIVOS_DATASET["STF"]["comentarios"]
+    do_cache = somar_arquivos(posts, comentarios)
+
+    monkeypatch.setenv("SENTIMENTLAB_STREAMING", "1")
+    monkeypatch.setattr(conversas, "ler_em_blocos", functools.partial(ingestao.ler_em_blocos, linhas=4))
+    em_blocos = somar_arquivos(posts, comentarios)
+    _assert_somas_iguais(em_blocos, do_cache)
+
+
+def test_linhas_periodo_pelas_datas_das_postagens(pasta_dados):
+    arquivo = ARQUIVOS_DATASET["Vacinação"]["posts"]
+    somas = somar_arquivos(arquivo, ARQUIVOS_DATASET["Vacinação"]["comentarios"])
+    tabela = ingestao.carregar_tabela(arquivo)
+    datas = pd.Series(tabela["Data"].to_numpy(), index=tabela["id Post"].astype(str))
+    linhas = linhas_periodo(somas, "2022-03-01", "2022-08-01")
+    no_periodo = datas[(datas >= "2022-03-01") & (datas < "2022-09-01")]
+    assert sorted(somas["ids"][linhas]) == sorted(no_periodo.index)
+    assert np.all(np.diff(linhas) > 0)
+    np.testing.assert_array_equal(linhas_periodo(somas), np.arange(len(somas["ids"])))
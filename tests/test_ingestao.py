@@ -0,0 +1,66 @@
+"""Ingestão incremental: o resumo atualizado por delta bate com uma releitura completa."""
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import ingestao
+from ingestao import ARQUIVOS_DATASET, TIPOS_TEXTO, carregar_tabela, esquema
+from agregacao import MEDIDAS, _agregar_em_blocos, carregar_resumo, contar_sentimentos, ingerir_incremental
+
+
+def _resumo_relido():
+    """Cubo e contagens reconstruídos do zero a partir dos CSVs"""
+    shutil.rmtree(ingestao.CACHE_PATH)
+    _agregar_em_blocos.cache_clear()
+    return carregar_resumo()
+
+
+def _cubo_comparavel(cubo):
+    cubo = cubo.astype({"Tema": str, "Tipo": str, "Classe": str})
+    return cubo.sort_values(["Tema", "Tipo", "Mes", "Classe"], ignore_index=True)
+
+
+def test_anexo_promove_contagens_e_bate_com_releitura(pasta_dados):
+    tema, chave = "Auxílio Brasil", "posts"
+    arquivo, tipo = ARQUIVOS_DATASET[tema][chave], TIPOS_TEXTO[chave]
+    base = carregar_tabela(arquivo)
+    assert base["Upvotes"].dtype == np.int8
+    carregar_resumo()
+
+    # p0 já está na base e n1 vem repetido no lote: só n1, n2 e n3 são inéditos.
+    # 70000 não cabe no int8 da base e 2.5 força a promoção para float.
+    novos = pd.DataFrame({
+        "id Post": ["p0", "n1", "n1", "n2", "n3"],
+        "Autor": ["ana"] * 5,
+        "Upvotes": [5, 7, 7, 70000, 2.5],
+        "Comentarios": [1, 2, 2, 40000, 3],
+        "Data": ["2022-02-01", "2022-03-05", "2022-03-05", "2023-01-10", "2023-01-11"],
+        "Contexto": ["repetida", "nova", "nova", "grande", "fracionária"],
+        "Classe Sentimento": ["NEG", "POS", "POS", "NEU", "NEG"],
+    })
+    novos.to_csv("novos.csv", sep=esquema(arquivo)["sep"], index=False)
+
+    assert ingerir_incremental(tema, chave, "novos.csv") == 3
+    anexadas = carregar_tabela(arquivo).iloc[-3:]
+    assert anexadas["id Post"].astype(str).tolist() == ["n1", "n2", "n3"]
+    assert anexadas["Upvotes"].tolist() == [7, 70000, 2.5]
+    assert anexadas["Comentarios"].tolist() == [2, 40000, 3]
+
+    cubo, contagens = carregar_resumo()
+    cubo_relido, contagens_relidas = _resumo_relido()
+    assert len(carregar_tabela(arquivo)) == len(base) + 3
+
+    assert contagens.keys() == contagens_relidas.keys()
+    for chave_fonte in contagens:
+        np.testing.assert_allclose(contagens[chave_fonte], contagens_relidas[chave_fonte])
+    for medida in MEDIDAS:
+        pd.testing.assert_frame_equal(contar_sentimentos(contagens, medida=medida),
+                                      contar_sentimentos(contagens_relidas, medida=medida))
+    pd.testing.assert_frame_equal(_cubo_comparavel(cubo), _cubo_comparavel(cubo_relido), check_dtype=False)
+
+    # As contagens do tema também batem com a tabela relida do CSV, sem cache
+    relida = ingestao.ler_csv(arquivo)
+    esperado = contar_sentimentos({(tema, tipo): relida}, medida="Upvotes")["Quantidade"].to_numpy()
+    obtido = contar_sentimentos({(tema, tipo): contagens[(tema, tipo)]}, medida="Upvotes")["Quantidade"]
+    np.testing.assert_allclose(obtido.to_numpy(), esperado)
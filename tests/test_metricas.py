@@ -0,0 +1,97 @@
+"""Métricas do kernel da matriz de confusão contra as implementações do scikit-learn."""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import (
+    accuracy_score, confusion_matrix, precision_recall_fscore_support, roc_auc_score
+)
+
+from ingestao import CLASSES
+from metricas import COLUNAS_PROB, bootstrap_kernel, calcular_kernel
+
+
+def amostra_rotulada(linhas=400, semente=0, outros=0):
+    """Amostra com rótulo humano, classe prevista (~70% de acerto) e prob_* com empates"""
+    rng = np.random.default_rng(semente)
+    rotulo = rng.choice(CLASSES, linhas, p=[0.3, 0.5, 0.2])
+    prevista = np.where(rng.random(linhas) < 0.7, rotulo, rng.choice(CLASSES, linhas))
+    if outros:
+        rotulo[:outros] = "MISTO"  # rótulo fora de CLASSES
+    # Arredondar gera empates, o caso que o posto médio precisa acertar
+    probs = np.round(rng.dirichlet(np.ones(len(CLASSES)), linhas), 2)
+    return pd.DataFrame({"rotulo": rotulo, "Classe Sentimento": prevista,
+                         **{c: probs[:, i] for i, c in enumerate(COLUNAS_PROB)}})
+
+
+@pytest.mark.parametrize("outros", [0, 7])
+def test_kernel_igual_ao_sklearn(outros):
+    df = amostra_rotulada(outros=outros)
+    kernel = calcular_kernel(df)
+    y_true, y_pred = df["rotulo"].to_numpy(), df["Classe Sentimento"].to_numpy()
+
+    np.testing.assert_array_equal(kernel["matriz"], confusion_matrix(y_true, y_pred, labels=CLASSES))
+    assert kernel["acuracia"] == pytest.approx(accuracy_score(y_true, y_pred))
+    precision, recall, f1, _ = precision_recall_fscore_support(y_true, y_pred, labels=CLASSES, zero_division=0)
+    np.testing.assert_allclose(kernel["precision"], precision)
+    np.testing.assert_allclose(kernel["recall"], recall)
+    np.testing.assert_allclose(kernel["f1"], f1)
+
+    probs = df[COLUNAS_PROB].to_numpy()
+    auc = [roc_auc_score(y_true == c, probs[:, i]) for i, c in enumerate(CLASSES)]
+    np.testing.assert_allclose(kernel["auc"], auc)
+
+
+def test_especificidade_pela_matriz_restrita():
+    df = amostra_rotulada(semente=1)
+    kernel = calcular_kernel(df)
+    matriz = confusion_matrix(df["rotulo"], df["Classe Sentimento"], labels=CLASSES)
+    for i in range(len(CLASSES)):
+        vp = matriz[i, i]
+        fp = matriz[:, i].sum() - vp
+        vn = matriz.sum() - matriz[i].sum() - matriz[:, i].sum() + vp
+        assert kernel["especificidade"][i] == pytest.approx(vn / (vn + fp))
+
+
+def test_auc_zero_sem_probabilidades_ou_sem_positivos():
+    df = amostra_rotulada().drop(columns=COLUNAS_PROB)
+    np.testing.assert_array_equal(calcular_kernel(df)["auc"], 0.0)
+
+    df = amostra_rotulada()
+    df["rotulo"] = "NEU"
+    assert calcular_kernel(df)["auc"][0] == 0.0
+
+
+# ==================== BOOTSTRAP ====================
+def test_bootstrap_igual_ao_sklearn_em_cada_reamostra():
+    df = amostra_rotulada(linhas=120, semente=2)
+    reamostras, nivel = 40, 0.9
+    intervalos = bootstrap_kernel(df, reamostras=reamostras, nivel=nivel, semente=5, bloco=16)
+
+    # Mesmas reamostras (mesma semente, mesma ordem de sorteio por bloco), métricas pelo sklearn
+    rng = np.random.default_rng(5)
+    indices = np.concatenate([rng.integers(0, len(df), size=(min(16, reamostras - i), len(df)))
+                              for i in range(0, reamostras, 16)])
+    y_true, y_pred = df["rotulo"].to_numpy(), df["Classe Sentimento"].to_numpy()
+    probs = df[COLUNAS_PROB].to_numpy()
+    valores = {"acuracia": [], "f1": [], "auc": []}
+    for linhas in indices:
+        valores["acuracia"].append(accuracy_score(y_true[linhas], y_pred[linhas]))
+        valores["f1"].append(precision_recall_fscore_support(y_true[linhas], y_pred[linhas], labels=CLASSES,
+                                                             zero_division=0)[2])
+        valores["auc"].append([roc_auc_score(y_true[linhas] == c, probs[linhas, i]) for i, c in enumerate(CLASSES)])
+
+    alfa = (1 - nivel) / 2
+    for nome, lista in valores.items():
+        esperado = np.quantile(np.asarray(lista), [alfa, 1 - alfa], axis=0)
+        np.testing.assert_allclose(intervalos[nome][0], esperado[0])
+        np.testing.assert_allclose(intervalos[nome][1], esperado[1])
+
+
+def test_bootstrap_contem_a_estimativa_pontual():
+    df = amostra_rotulada(linhas=300, semente=3)
+    intervalos = bootstrap_kernel(df, reamostras=200, semente=1)
+    kernel = calcular_kernel(df)
+    for nome in ("precision", "recall", "f1", "auc"):
+        inferior, superior = intervalos[nome]
+        assert np.all(inferior <= superior)
+        assert np.all((inferior <= kernel[nome] + 1e-9) & (kernel[nome] - 1e-9 <= superior))
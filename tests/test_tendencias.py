@@ -0,0 +1,50 @@
+"""Segmentação binária: degraus são encontrados e séries estáveis não geram pontos."""
+import numpy as np
+
+import tendencias
+from tendencias import ALFA, SEGMENTO_MINIMO, segmentacao_binaria
+
+
+def _log_verossimilhanca(contagens):
+    contagens = np.asarray(contagens, dtype=float)
+    p = contagens / contagens.sum()
+    return float((contagens[contagens > 0] * np.log(p[contagens > 0])).sum())
+
+
+def test_degrau_encontrado_com_p_corrigido():
+    meses, corte = 24, 12
+    serie = np.empty((meses, 3))
+    serie[:corte] = [20, 60, 20]
+    serie[corte:] = [50, 30, 20]
+
+    indice, cortes, p, antes, depois = segmentacao_binaria(serie[None])
+    assert indice.tolist() == [0] and cortes.tolist() == [corte]
+    np.testing.assert_allclose(antes[0], [0.2, 0.6, 0.2])
+    np.testing.assert_allclose(depois[0], [0.5, 0.3, 0.2])
+
+    # p nominal do melhor corte × cortes válidos do segmento (Bonferroni)
+    ganho = (_log_verossimilhanca(serie[:corte].sum(axis=0)) + _log_verossimilhanca(serie[corte:].sum(axis=0))
+             - _log_verossimilhanca(serie.sum(axis=0)))
+    cortes_validos = meses - 2 * SEGMENTO_MINIMO + 1
+    np.testing.assert_allclose(p[0], min(1.0, np.exp(-ganho) * cortes_validos), rtol=1e-9)
+
+
+def test_series_estaveis_sem_pontos():
+    rng = np.random.default_rng(0)
+    constante = np.tile([20.0, 60.0, 20.0], (36, 1))
+    # Ruído multinomial em torno da mesma proporção, várias séries
+    ruidosas = rng.multinomial(80, [0.25, 0.55, 0.2], size=(40, 36)).astype(float)
+    indice, *_ = segmentacao_binaria(np.concatenate([constante[None], ruidosas]))
+    assert len(indice) == 0
+
+
+def test_bonferroni_descarta_o_que_o_p_nominal_aceitaria():
+    # Degrau pequeno numa série longa: p nominal < ALFA, corrigido pelo número de cortes > ALFA
+    serie = np.empty((60, 3))
+    serie[:30] = [30, 50, 20]
+    serie[30:] = [34, 46, 20]
+    indice, *_ = segmentacao_binaria(serie[None], mudanca=0.0)
+    _, p_nominal = tendencias.teste_mudanca(serie[:30].sum(axis=0), serie[30:].sum(axis=0))
+    assert p_nominal < ALFA
+    assert len(indice) == 0
+